@@ -2,9 +2,34 @@
 Blog admin configuration for Neural Digital Garden.
 """
 from django.contrib import admin
+from django.db.models import F
+
+from core.admin import ScalableAdminMixin
+from core.cache import invalidate_tags
 from .models import Category, Tag, Post, Comment
 
 
+class TagListFilter(admin.SimpleListFilter):
+    """Filter posts by tag through the tag index on the M2M table.
+
+    Filtering on ``tags`` directly joins the M2M table, which makes the
+    changelist add a DISTINCT over every matching post; a ``pk IN
+    (subquery)`` filter can't produce duplicates.
+    """
+    title = 'tag'
+    parameter_name = 'tag'
+
+    def lookups(self, request, model_admin):
+        return Tag.objects.order_by('name').values_list('pk', 'name')
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        if not str(self.value()).isdigit():
+            return queryset.none()
+        return queryset.filter(pk__in=Post.tags.through.objects.filter(tag_id=self.value()).values('post_id'))
+
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     """Admin configuration for Category model."""
@@ -12,11 +37,7 @@ class CategoryAdmin(admin.ModelAdmin):
     list_filter = ['created_at']
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
-    readonly_fields = ['created_at']
-
-    def post_count(self, obj):
-        return obj.posts.filter(status='published').count()
-    post_count.short_description = 'Published Posts'
+    readonly_fields = ['post_count', 'created_at']
 
 
 @admin.register(Tag)
@@ -26,24 +47,23 @@ class TagAdmin(admin.ModelAdmin):
     list_filter = ['created_at']
     search_fields = ['name']
     prepopulated_fields = {'slug': ('name',)}
-    readonly_fields = ['created_at']
-
-    def post_count(self, obj):
-        return obj.posts.filter(status='published').count()
-    post_count.short_description = 'Published Posts'
+    readonly_fields = ['post_count', 'created_at']
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(ScalableAdminMixin, admin.ModelAdmin):
     """Admin configuration for Post model."""
     list_display = ['title', 'author', 'category', 'status', 'is_featured', 'view_count', 'reading_time', 'published_at']
-    list_filter = ['status', 'is_featured', 'category', 'tags', 'created_at', 'published_at']
+    list_select_related = ['author', 'category']
+    list_filter = ['status', 'is_featured', 'category', TagListFilter, 'created_at', 'published_at']
     search_fields = ['title', 'excerpt', 'content']
     prepopulated_fields = {'slug': ('title',)}
     filter_horizontal = ['tags']
     readonly_fields = ['view_count', 'created_at', 'updated_at', 'published_at']
-    date_hierarchy = 'published_at'
     ordering = ['-published_at', '-created_at']
+    changelist_defer = [
+        'excerpt', 'content', 'content_html', 'content_toc', 'search_vector', 'featured_image_variants',
+    ]
 
     fieldsets = (
         ('Content', {
@@ -67,25 +87,41 @@ class PostAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(ScalableAdminMixin, admin.ModelAdmin):
     """Admin configuration for Comment model."""
-    list_display = ['author_name', 'post', 'is_approved', 'parent', 'created_at']
+    list_display = ['author_name', 'post', 'is_approved', 'reply_to', 'created_at']
+    # Comment.__str__ (used for every row's checkbox label) reads the post's title
+    list_select_related = ['post']
     list_filter = ['is_approved', 'created_at']
-    search_fields = ['author_name', 'author_email', 'content']
-    readonly_fields = ['created_at', 'updated_at']
-    date_hierarchy = 'created_at'
+    search_fields = ['author_name', 'author_email', 'content', '=submission_id']
+    readonly_fields = ['submission_id', 'created_at', 'updated_at']
+    raw_id_fields = ['post', 'parent']
     ordering = ['-created_at']
+    changelist_defer = [
+        'content', 'post__excerpt', 'post__content', 'post__content_html', 'post__content_toc',
+        'post__search_vector', 'post__featured_image_variants',
+    ]
 
     actions = ['approve_comments', 'unapprove_comments']
 
+    def get_queryset(self, request):
+        # The parent's own __str__ would load its post too; its author's name is enough
+        return super().get_queryset(request).annotate(reply_to_value=F('parent__author_name'))
+
+    def reply_to(self, obj):
+        return obj.reply_to_value or '-'
+    reply_to.short_description = 'Reply to'
+
     def approve_comments(self, request, queryset):
         """Approve selected comments."""
         updated = queryset.update(is_approved=True)
+        invalidate_tags('blog.comment')
         self.message_user(request, f'{updated} comment(s) approved.')
     approve_comments.short_description = 'Approve selected comments'
 
     def unapprove_comments(self, request, queryset):
         """Unapprove selected comments."""
         updated = queryset.update(is_approved=False)
+        invalidate_tags('blog.comment')
         self.message_user(request, f'{updated} comment(s) unapproved.')
     unapprove_comments.short_description = 'Unapprove selected comments'
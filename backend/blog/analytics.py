@@ -0,0 +1,186 @@
+"""
+View analytics rollups for Neural Digital Garden.
+
+Page views never reach the database one by one: the view buffer flushes them
+as per-post counts into hourly ``PostViewBucket`` rows (see
+``blog.view_counter``). The ``blog.tasks.rollup_view_analytics`` task rolls
+those buckets up into daily ``PostViewDay`` rows, and those further into
+``CategoryViewDay`` and ``TagViewDay`` rows, then compacts the history:
+
+- hourly buckets are deleted once they are older than
+  ``ANALYTICS_HOURLY_RETENTION_DAYS`` (never before the leaderboards are done
+  with them, and never before their day has been rolled up);
+- daily rows are deleted once they are older than
+  ``ANALYTICS_DAILY_RETENTION_DAYS``.
+
+The time-series endpoints read only these tables. Each run recomputes the
+days since the last rolled-up one, so late flushes are picked up and
+running it twice changes nothing. A post's views count towards the category
+and tags it has when its day is rolled up.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core.cache import invalidate_tags, model_tag
+from .leaderboard import WINDOWS, trending_horizon
+from .models import CategoryViewDay, PostViewBucket, PostViewDay, TagViewDay
+
+INTERVALS = ('hour', 'day')
+DEFAULT_SPAN = {'hour': timedelta(days=2), 'day': timedelta(days=30)}
+MAX_POINTS = 1000  # Longest series one request may ask for
+
+
+def hourly_retention():
+    """How long hourly buckets are kept; at least as long as the leaderboards look back."""
+    days = timedelta(days=getattr(settings, 'ANALYTICS_HOURLY_RETENTION_DAYS', 14))
+    return max(days, trending_horizon(), *WINDOWS.values())
+
+
+def daily_retention():
+    return timedelta(days=getattr(settings, 'ANALYTICS_DAILY_RETENTION_DAYS', 730))
+
+
+def day_start(day):
+    """Aware start of a calendar day in the current time zone."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def rollup_start():
+    """First day whose rollups need (re)computing, or None when there is nothing to roll up."""
+    latest = PostViewDay.objects.aggregate(latest=Max('day'))['latest']
+    if latest is not None:
+        return latest  # It may have been rolled up before the day was over
+    earliest = PostViewBucket.objects.aggregate(earliest=Min('hour'))['earliest']
+    return timezone.localdate(earliest) if earliest else None
+
+
+def rollup_views():
+    """Recompute the daily post, category and tag rollups from ``rollup_start()`` on."""
+    since = rollup_start()
+    if since is None:
+        return {'since': None, 'posts': 0, 'categories': 0, 'tags': 0}
+
+    post_days = (
+        PostViewBucket.objects.filter(hour__gte=day_start(since))
+        .annotate(day=TruncDate('hour'))
+        .values_list('post', 'day')
+        .annotate(total=Sum('views'))
+        .order_by()
+    )
+    with transaction.atomic():
+        for model in (PostViewDay, CategoryViewDay, TagViewDay):
+            model.objects.filter(day__gte=since).delete()
+        PostViewDay.objects.bulk_create(
+            [PostViewDay(post_id=post_id, day=day, views=total) for post_id, day, total in post_days if total],
+            batch_size=2000,
+        )
+        rolled = PostViewDay.objects.filter(day__gte=since)
+        CategoryViewDay.objects.bulk_create(
+            [
+                CategoryViewDay(category_id=category_id, day=day, views=total)
+                for category_id, day, total in rolled.filter(post__category__isnull=False)
+                .values_list('post__category', 'day').annotate(total=Sum('views')).order_by()
+            ],
+            batch_size=2000,
+        )
+        TagViewDay.objects.bulk_create(
+            [
+                TagViewDay(tag_id=tag_id, day=day, views=total)
+                for tag_id, day, total in rolled.filter(post__tags__isnull=False)
+                .values_list('post__tags', 'day').annotate(total=Sum('views')).order_by()
+            ],
+            batch_size=2000,
+        )
+    # bulk_create and queryset deletes send no signals
+    invalidate_tags(model_tag(PostViewDay), model_tag(CategoryViewDay), model_tag(TagViewDay))
+    return {
+        'since': since.isoformat(),
+        'posts': rolled.count(),
+        'categories': CategoryViewDay.objects.filter(day__gte=since).count(),
+        'tags': TagViewDay.objects.filter(day__gte=since).count(),
+    }
+
+
+def compact_views(now=None):
+    """Delete hourly buckets and daily rows past their retention; return how many went."""
+    now = now or timezone.now()
+    hourly_cutoff = now - hourly_retention()
+    rolled_up_to = PostViewDay.objects.aggregate(latest=Max('day'))['latest']
+    # Buckets of days not rolled up yet must survive until they are
+    hourly_cutoff = min(hourly_cutoff, day_start(rolled_up_to)) if rolled_up_to else None
+
+    deleted = {'hourly': 0, 'daily': 0}
+    if hourly_cutoff is not None:
+        deleted['hourly'], _ = PostViewBucket.objects.filter(hour__lt=hourly_cutoff).delete()
+    daily_cutoff = timezone.localdate(now) - daily_retention()
+    for model in (PostViewDay, CategoryViewDay, TagViewDay):
+        count, _ = model.objects.filter(day__lt=daily_cutoff).delete()
+        deleted['daily'] += count
+    if deleted['daily']:
+        invalidate_tags(model_tag(PostViewDay), model_tag(CategoryViewDay), model_tag(TagViewDay))
+    return deleted
+
+
+def parse_series_params(params, intervals=INTERVALS):
+    """Read ``interval``, ``since`` and ``until`` (inclusive dates) from query parameters.
+
+    Raises ``ValueError`` with a message for the client when they are invalid.
+    """
+    interval = params.get('interval', 'day')
+    if interval not in intervals:
+        raise ValueError(f'interval must be one of: {", ".join(intervals)}.')
+    try:
+        until = parse_date(params['until']) if 'until' in params else timezone.localdate()
+        since = parse_date(params['since']) if 'since' in params else None
+    except ValueError:  # Well-formed but impossible, e.g. 2024-02-30
+        since = until = None
+    if until is None or ('since' in params and since is None):
+        raise ValueError('since and until must be dates (YYYY-MM-DD).')
+    if since is None:
+        since = until - DEFAULT_SPAN[interval] + timedelta(days=1)
+    if since > until:
+        raise ValueError('since must not be after until.')
+    points = (until - since).days + 1
+    if interval == 'hour':
+        points *= 24
+    if points > MAX_POINTS:
+        raise ValueError(f'A series may have at most {MAX_POINTS} points; narrow since/until.')
+    return interval, since, until
+
+
+def view_series(rollups, interval, since, until):
+    """Views per hour or day between two dates from a filtered rollup queryset, gaps filled with zero.
+
+    ``rollups`` is a ``PostViewBucket`` queryset for hourly series, or a
+    ``PostViewDay``/``CategoryViewDay``/``TagViewDay`` one for daily series.
+    """
+    if interval == 'hour':
+        # Step through hours in UTC so DST changes don't skip or repeat one
+        start = day_start(since).astimezone(dt_timezone.utc)
+        end = day_start(until + timedelta(days=1)).astimezone(dt_timezone.utc)
+        counts = dict(
+            rollups.filter(hour__gte=start, hour__lt=end)
+            .values_list('hour').annotate(total=Sum('views')).order_by()
+        )
+        points = [start + timedelta(hours=offset) for offset in range(int((end - start).total_seconds() // 3600))]
+    else:
+        counts = dict(
+            rollups.filter(day__gte=since, day__lte=until)
+            .values_list('day').annotate(total=Sum('views')).order_by()
+        )
+        points = [since + timedelta(days=offset) for offset in range((until - since).days + 1)]
+
+    series = [{'start': point.isoformat(), 'views': counts.get(point, 0)} for point in points]
+    return {
+        'interval': interval,
+        'since': since.isoformat(),
+        'until': until.isoformat(),
+        'total': sum(point['views'] for point in series),
+        'series': series,
+    }
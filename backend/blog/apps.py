@@ -2,9 +2,32 @@
 Blog application configuration.
 """
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Blog'
+
+    def ready(self):
+        from core.cache import invalidate_on_change
+        from core.images import derive_images_on_change
+        from core.snapshots import export_snapshots_on_change
+        from .pagination import create_page_indexes
+        from .search import create_search_index
+        from . import signals  # noqa: F401
+
+        Post = self.get_model('Post')
+        invalidate_on_change(
+            self.get_model('Category'), self.get_model('Tag'), Post, self.get_model('Comment'),
+            m2m={Post.tags.through: Post},
+        )
+        derive_images_on_change(Post, 'featured_image', 'featured_image_variants')
+        # Post detail snapshots embed the approved comments
+        export_snapshots_on_change(
+            self.get_model('Category'), self.get_model('Tag'), Post, self.get_model('Comment'),
+            m2m=(Post.tags.through,),
+        )
+        post_migrate.connect(create_search_index, sender=self)
+        post_migrate.connect(create_page_indexes, sender=self)
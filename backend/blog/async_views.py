@@ -0,0 +1,95 @@
+"""
+Async blog read views for Neural Digital Garden.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+
+from core.async_views import AsyncListView, AsyncReadView
+from .comment_tree import CommentTree
+from .leaderboard import LEADERBOARDS, popular_post_ids
+from .models import Comment
+from .pagination import CommentThreadPagination
+from .serializers import PostListSerializer
+from .view_counter import get_view_buffer
+
+
+async def attach_pending_views(posts):
+    """Look up buffered view counts for ``posts`` the way PostListListSerializer would."""
+    pending = await sync_to_async(get_view_buffer().pending_many)([post.pk for post in posts])
+    for post in posts:
+        post._pending_views = pending.get(post.pk, 0)
+
+
+class PostListView(AsyncListView):
+    """Async ``GET /api/blog/posts/``."""
+    query_params = frozenset({'cursor', 'page_size', 'ordering', 'fields'})
+
+
+class PostDetailView(AsyncReadView):
+    """Async ``GET /api/blog/posts/<slug>/``.
+
+    The post (with author, category and tags), its first page of comment
+    threads and its comment count are fetched concurrently, then the replies
+    below those threads and the buffered view count.
+    """
+    action = 'retrieve'
+    query_params = frozenset({'fields'})
+
+    async def get_data(self):
+        view = self.view
+        slug = self.kwargs['slug']
+        comments = Comment.objects.filter(post__slug=slug, is_approved=True)
+        roots = comments.filter(parent=None)[:CommentThreadPagination.page_size]
+        post, roots, comment_count = await asyncio.gather(
+            view.filter_queryset(view.get_queryset()).filter(slug=slug).afirst(),
+            sync_to_async(list)(roots),
+            comments.acount(),
+        )
+        if post is None:
+            return None
+
+        tree, pending = await asyncio.gather(
+            sync_to_async(CommentTree)(roots),
+            sync_to_async(get_view_buffer().pending)(post.pk),
+        )
+        post._comment_threads = (roots, tree)
+        post._pending_views = pending
+        post.approved_comment_count = comment_count
+        return view.get_serializer(post).data
+
+
+class FeaturedPostsView(AsyncReadView):
+    """Async ``GET /api/blog/posts/featured/``."""
+    action = 'featured'
+
+    async def get_data(self):
+        queryset = self.view.get_queryset().filter(is_featured=True, status='published')[:5]
+        posts = [post async for post in queryset]
+        await attach_pending_views(posts)
+        return PostListSerializer(posts, many=True).data
+
+
+class PopularPostsView(AsyncReadView):
+    """Async ``GET /api/blog/posts/popular/``."""
+    action = 'popular'
+    query_params = frozenset({'window'})
+
+    async def get_data(self):
+        window = self.request.GET.get('window', 'trending')
+        if window not in LEADERBOARDS:
+            return None
+        view = self.view
+        post_ids = await sync_to_async(popular_post_ids)(window)
+        posts = await view.get_queryset().filter(status='published').ain_bulk(post_ids)
+        popular_posts = [posts[post_id] for post_id in post_ids if post_id in posts]
+        await attach_pending_views(popular_posts)
+        return PostListSerializer(popular_posts, many=True, context=view.get_serializer_context()).data
+
+
+ASYNC_VIEWS = {
+    'post-list': PostListView,
+    'post-detail': PostDetailView,
+    'post-featured': FeaturedPostsView,
+    'post-popular': PopularPostsView,
+}
@@ -0,0 +1,240 @@
+"""
+Queued comment submissions for Neural Digital Garden.
+
+Comment POSTs are validated and checked for duplicates in the request, then
+queued and answered with 202 and a pending ID instead of being written
+straight away. Queued comments are inserted in batches with ``bulk_create``,
+so a burst of submissions costs a few INSERTs rather than one transaction per
+request. With ``REDIS_URL`` configured the queue is a Redis list shared by
+every web process and drained by the ``blog.tasks.flush_comment_queue``
+Celery task; otherwise each process keeps its own in-memory queue and
+flushes it itself every ``COMMENT_QUEUE_FLUSH_INTERVAL`` seconds.
+
+Every queued comment carries its pending ID into ``Comment.submission_id``,
+which is unique, so a batch inserted twice (say, after a worker died before
+acknowledging it) doesn't duplicate anything.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from core.cache import get_cache, invalidate_tags, model_tag
+from core.snapshots import queue_snapshot_export
+from .models import Comment, Post
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_PREFIX = 'comments:fingerprint:'
+
+
+class DuplicateComment(Exception):
+    """The same comment was already submitted on this post a moment ago."""
+
+
+class LocalCommentQueue:
+    """In-process comment queue, flushed inline once the interval has elapsed."""
+
+    def __init__(self, flush_interval):
+        self.flush_interval = flush_interval
+        self._items = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def push(self, submission):
+        with self._lock:
+            self._items.append(submission)
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            try:
+                flush_comment_queue(self)
+            except DatabaseError as exc:
+                # The submission is queued either way; failing now would invite a duplicate retry
+                logger.warning('Could not flush queued comments (%s); retrying on the next flush', exc)
+
+    def peek(self, limit):
+        with self._lock:
+            return list(self._items[:limit])
+
+    def ack(self, count):
+        with self._lock:
+            del self._items[:count]
+            self._last_flush = time.monotonic()
+
+    def __len__(self):
+        return len(self._items)
+
+    @contextmanager
+    def flushing(self):
+        acquired = self._flush_lock.acquire(blocking=False)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self._flush_lock.release()
+
+
+class RedisCommentQueue:
+    """Comment queue kept in a Redis list, shared by all processes."""
+    key = 'blog:comment_queue'
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def push(self, submission):
+        self.client.rpush(self.key, json.dumps(submission))
+
+    def peek(self, limit):
+        # Items stay queued until acknowledged, so a crash mid-flush loses nothing
+        return [json.loads(item) for item in self.client.lrange(self.key, 0, limit - 1)]
+
+    def ack(self, count):
+        self.client.ltrim(self.key, count, -1)
+
+    def __len__(self):
+        return self.client.llen(self.key)
+
+    @contextmanager
+    def flushing(self):
+        # One flusher at a time: peek/ack assume nobody else trims the list
+        lock = self.client.lock(f'{self.key}:flushing', timeout=300)
+        acquired = lock.acquire(blocking=False)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                lock.release()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_comment_queue():
+    """Return the process-wide comment queue, creating it on first use."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                redis_url = getattr(settings, 'REDIS_URL', None)
+                if redis_url:
+                    _queue = RedisCommentQueue(redis_url)
+                else:
+                    _queue = LocalCommentQueue(getattr(settings, 'COMMENT_QUEUE_FLUSH_INTERVAL', 0))
+                    atexit.register(flush_comment_queue, _queue)
+    return _queue
+
+
+def comment_fingerprint(post_id, content):
+    """Hash of a comment's post and whitespace- and case-normalised text."""
+    normalized = ' '.join(content.lower().split())
+    return hashlib.sha256(f'{post_id}:{normalized}'.encode()).hexdigest()
+
+
+def submit_comment(post, author_name, author_email, content, parent=None, is_approved=False):
+    """Queue a validated comment and return its pending ID.
+
+    Raises ``DuplicateComment`` if the same text was submitted on the post
+    within ``COMMENT_DUPLICATE_WINDOW`` seconds, whoever sent it.
+    """
+    pending_id = str(uuid.uuid4())
+    cache = get_cache()
+    fingerprint_key = DUPLICATE_KEY_PREFIX + comment_fingerprint(post.pk, content)
+    if not cache.add(fingerprint_key, pending_id, timeout=getattr(settings, 'COMMENT_DUPLICATE_WINDOW', 600)):
+        raise DuplicateComment('An identical comment was just submitted on this post.')
+
+    submission = {
+        'submission_id': pending_id,
+        'post': post.pk,
+        'parent': parent.pk if parent else None,
+        'author_name': author_name,
+        'author_email': author_email,
+        'content': content,
+        'is_approved': is_approved,
+    }
+    try:
+        get_comment_queue().push(submission)
+    except Exception:
+        cache.delete(fingerprint_key)  # Not queued, so let the client retry
+        raise
+    return pending_id
+
+
+def insert_comments(submissions):
+    """Insert queued submissions with one ``bulk_create`` and return how many were new.
+
+    Submissions whose post or parent comment was deleted while they waited
+    are dropped. Thread root and depth are filled in here because
+    ``bulk_create`` bypasses ``Comment.save``.
+    """
+    post_ids = set(Post.objects.filter(pk__in={s['post'] for s in submissions}).values_list('pk', flat=True))
+    parents = Comment.objects.only('post_id', 'thread_id', 'depth').in_bulk(
+        {s['parent'] for s in submissions if s['parent']}
+    )
+
+    comments = []
+    for submission in submissions:
+        parent = parents.get(submission['parent'])
+        if submission['post'] not in post_ids or (submission['parent'] and parent is None):
+            continue
+        comments.append(Comment(
+            submission_id=submission['submission_id'],
+            post_id=submission['post'],
+            parent_id=parent.pk if parent else None,
+            thread_id=(parent.thread_id or parent.pk) if parent else None,
+            depth=parent.depth + 1 if parent else 0,
+            author_name=submission['author_name'],
+            author_email=submission['author_email'],
+            content=submission['content'],
+            is_approved=submission['is_approved'],
+        ))
+    if not comments:
+        return 0
+
+    already_inserted = {
+        str(submission_id) for submission_id in
+        Comment.objects.filter(submission_id__in=[comment.submission_id for comment in comments])
+        .values_list('submission_id', flat=True)
+    }
+    new = [comment for comment in comments if comment.submission_id not in already_inserted]
+    Comment.objects.bulk_create(new, ignore_conflicts=True)
+    return len(new)
+
+
+def flush_comment_queue(queue=None):
+    """Insert every comment queued so far, in batches, and return how many were written.
+
+    Each batch is acknowledged only after its INSERT succeeds; if it fails
+    the batch stays at the head of the queue for the next flush.
+    """
+    if queue is None:
+        queue = get_comment_queue()
+    batch_size = getattr(settings, 'COMMENT_QUEUE_BATCH_SIZE', 500)
+    inserted = 0
+    with queue.flushing() as acquired:
+        if not acquired:
+            return 0  # Another flush is running
+        # Stop at what's queued now, so a steady stream can't keep one flush going forever
+        remaining = len(queue)
+        while remaining > 0:
+            batch = queue.peek(min(batch_size, remaining))
+            if not batch:
+                break
+            inserted += insert_comments(batch)
+            queue.ack(len(batch))
+            remaining -= len(batch)
+    if inserted:
+        # bulk_create sends no post_save
+        invalidate_tags(model_tag(Comment))
+        queue_snapshot_export()
+    return inserted
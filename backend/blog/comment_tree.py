@@ -0,0 +1,54 @@
+"""
+Threaded comment loading for Neural Digital Garden.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+
+from .models import Comment
+
+
+def max_comment_depth():
+    """Deepest reply level that is ever rendered below a top-level comment."""
+    return getattr(settings, 'COMMENT_TREE_MAX_DEPTH', 5)
+
+
+class CommentTree:
+    """Approved replies below a page of comments, fetched in a bounded number of queries.
+
+    Every reply carries its thread root and depth, so the replies below a page
+    of top-level comments are selected with one indexed lookup and linked up
+    in memory. Below replies (a page of ``?parent=``), the rest of the thread
+    isn't theirs to load, so their descendants are fetched one level at a
+    time instead. Replies nested more than ``max_depth`` levels below the
+    given roots are not loaded.
+    """
+
+    def __init__(self, roots, max_depth=None):
+        limit = max_comment_depth()
+        self.max_depth = limit if max_depth is None else max(0, min(max_depth, limit))
+        self._children = defaultdict(list)
+
+        roots = list(roots)
+        if not roots or not self.max_depth:
+            return
+
+        approved = Comment.objects.filter(is_approved=True).order_by('created_at', 'pk')
+        thread_ids = [root.pk for root in roots if root.thread_id is None]
+        if thread_ids:
+            # A top-level comment's thread is exactly its descendants
+            for reply in approved.filter(thread_id__in=thread_ids, depth__lte=self.max_depth):
+                self._children[reply.parent_id].append(reply)
+
+        level = [root.pk for root in roots if root.thread_id is not None]
+        for _ in range(self.max_depth):
+            if not level:
+                break
+            replies = list(approved.filter(parent_id__in=level))
+            for reply in replies:
+                self._children[reply.parent_id].append(reply)
+            level = [reply.pk for reply in replies]
+
+    def replies(self, comment):
+        """Return the approved direct replies of a comment."""
+        return self._children.get(comment.pk, [])
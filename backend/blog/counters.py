@@ -0,0 +1,41 @@
+"""
+Published-post counters for Neural Digital Garden.
+"""
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Category, Tag, Post
+
+
+def _published_count_subquery(**filters):
+    counts = (
+        Post.objects.filter(status='published', **filters)
+        .order_by()
+        .values('status')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def recount_post_counts(category_ids=None, tag_ids=None):
+    """Recompute stored published-post counters from the posts themselves.
+
+    Each model is fixed with a single UPDATE that only touches rows whose
+    stored value disagrees with the real count. Pass primary keys to limit
+    the recount to those rows; by default every row is checked. Returns the
+    number of rows corrected per model.
+    """
+    fixed = {}
+    for model, pks, filters in (
+        (Category, category_ids, {'category': OuterRef('pk')}),
+        (Tag, tag_ids, {'tags': OuterRef('pk')}),
+    ):
+        queryset = model.objects.all() if pks is None else model.objects.filter(pk__in=pks)
+        actual = _published_count_subquery(**filters)
+        fixed[model._meta.model_name] = (
+            queryset.annotate(actual=actual)
+            .filter(~Q(post_count=actual))
+            .update(post_count=actual)
+        )
+    return fixed
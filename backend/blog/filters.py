@@ -0,0 +1,20 @@
+"""
+Blog filter backends for Neural Digital Garden.
+"""
+from rest_framework.filters import BaseFilterBackend
+
+from .search import get_search_backend
+
+
+class RankedSearchFilter(BaseFilterBackend):
+    """Full-text search on ?q=, returning posts ordered by relevance.
+
+    Only applies to list requests and overrides any other ordering.
+    """
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query or getattr(view, 'action', None) != 'list':
+            return queryset
+        return get_search_backend().search(queryset, query)
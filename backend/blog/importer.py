@@ -0,0 +1,207 @@
+"""
+Bulk post import for Neural Digital Garden.
+
+Posts are read from JSON Lines (one post object per line) and written in
+chunks: each chunk resolves its categories and tags in bulk, inserts its posts
+with one ``bulk_create`` and their tag links with another, all inside a single
+transaction. Because ``bulk_create`` bypasses ``save()`` and signals, the
+derived data the signals would maintain (published counts, the search index,
+rendered content, related posts and the response cache) is brought up to date
+once at the end.
+
+Each record looks like::
+
+    {"title": "...", "content": "...", "slug": "optional", "excerpt": "",
+     "category": "Category name", "tags": ["Tag", ...], "status": "published",
+     "is_featured": false, "reading_time": 0, "published_at": "2024-01-01T00:00:00Z"}
+"""
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.db import transaction
+from django.utils.text import slugify
+from rest_framework import serializers
+
+from core.cache import invalidate_tags
+from core.enqueue import enqueue_on_commit
+from .counters import recount_post_counts
+from .models import Category, Post, Tag
+from .search import get_search_backend
+from .syndication import affected_sections, invalidate_sections
+from .tasks import rebuild_related_posts, render_post_content
+
+
+class PostImportSerializer(serializers.Serializer):
+    """Validates one imported post record without touching the database."""
+    title = serializers.CharField(max_length=200)
+    slug = serializers.SlugField(max_length=200, required=False, allow_blank=True)
+    category = serializers.CharField(max_length=100, required=False, allow_blank=True, allow_null=True)
+    tags = serializers.ListField(child=serializers.CharField(max_length=50), required=False)
+    excerpt = serializers.CharField(max_length=300, required=False, allow_blank=True)
+    content = serializers.CharField()
+    status = serializers.ChoiceField(choices=Post.STATUS_CHOICES, required=False)
+    is_featured = serializers.BooleanField(required=False)
+    reading_time = serializers.IntegerField(min_value=0, required=False)
+    published_at = serializers.DateTimeField(required=False, allow_null=True)
+
+
+@dataclass
+class ImportResult:
+    """Outcome of an import run."""
+    created: int = 0
+    skipped: int = 0
+    errors: list = field(default_factory=list)
+
+    def as_dict(self):
+        return {'created': self.created, 'skipped': self.skipped, 'errors': self.errors}
+
+
+def iter_jsonl(lines):
+    """Yield ``(line_number, record)`` pairs from JSON Lines, skipping blanks.
+
+    Lines that are not valid JSON yield ``(line_number, None)`` so the caller
+    can report them.
+    """
+    for number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, None
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class PostImporter:
+    """Imports posts for one author in chunked transactions.
+
+    Records whose slug already exists are skipped, so re-running an import
+    is harmless; posts without a slug get one derived from the title, made
+    unique within the import and against the database.
+    """
+
+    def __init__(self, author, batch_size=500):
+        self.author = author
+        self.batch_size = max(1, batch_size)
+
+    def run(self, records):
+        """Import ``(line_number, record)`` pairs and return an ImportResult."""
+        result = ImportResult()
+        created_ids = []
+        for chunk in _chunks(records, self.batch_size):
+            created_ids.extend(self._import_chunk(chunk, result))
+
+        if created_ids:
+            self._refresh_derived_data(created_ids)
+        return result
+
+    def _import_chunk(self, chunk, result):
+        valid = []
+        for number, record in chunk:
+            if not isinstance(record, dict):
+                result.errors.append({'line': number, 'errors': 'Expected a JSON object.'})
+                continue
+            serializer = PostImportSerializer(data=record)
+            if serializer.is_valid():
+                valid.append((number, serializer.validated_data))
+            else:
+                result.errors.append({'line': number, 'errors': serializer.errors})
+        if not valid:
+            return []
+
+        with transaction.atomic():
+            categories = self._resolve(Category, (data.get('category') for _, data in valid))
+            tags = self._resolve(Tag, (name for _, data in valid for name in data.get('tags', ())))
+
+            posts, post_tags = [], []
+            for slug, data in self._assign_slugs(valid, result):
+                post = Post(
+                    title=data['title'],
+                    slug=slug,
+                    author=self.author,
+                    category=categories.get(data.get('category')),
+                    excerpt=data.get('excerpt', ''),
+                    content=data['content'],
+                    status=data.get('status', 'draft'),
+                    is_featured=data.get('is_featured', False),
+                    reading_time=data.get('reading_time', 0),
+                    published_at=data.get('published_at'),
+                )
+                post.populate_derived_fields()
+                posts.append(post)
+                post_tags.append(data.get('tags', ()))
+
+            Post.objects.bulk_create(posts)
+            Post.tags.through.objects.bulk_create(
+                [
+                    Post.tags.through(post_id=post.pk, tag_id=tags[name].pk)
+                    for post, names in zip(posts, post_tags)
+                    for name in dict.fromkeys(name.strip() for name in names)
+                    if name in tags
+                ],
+                ignore_conflicts=True,
+            )
+
+        result.created += len(posts)
+        return [post.pk for post in posts]
+
+    def _resolve(self, model, names):
+        names = [name.strip() for name in names if name and name.strip()]
+        return {obj.name: obj for obj in model.objects.resolve(names)}
+
+    def _assign_slugs(self, valid, result):
+        """Yield ``(slug, data)`` for records to create, skipping existing slugs."""
+        explicit = {data['slug'] for _, data in valid if data.get('slug')}
+        derived = Counter(slugify(data['title']) or 'post' for _, data in valid if not data.get('slug'))
+        taken = set(Post.objects.filter(slug__in=explicit | set(derived)).values_list('slug', flat=True))
+        # Only bases that already collide can need a numeric suffix; load those suffixes too
+        for base, uses in derived.items():
+            if uses > 1 or base in taken or base in explicit:
+                taken.update(Post.objects.filter(slug__startswith=f'{base}-').values_list('slug', flat=True))
+
+        for _, data in valid:
+            slug = data.get('slug')
+            if slug:
+                if slug in taken:
+                    result.skipped += 1
+                    continue
+            else:
+                base = slugify(data['title']) or 'post'
+                slug, suffix = base, 2
+                while slug in taken:
+                    slug, suffix = f'{base}-{suffix}', suffix + 1
+            taken.add(slug)
+            yield slug, data
+
+    def _refresh_derived_data(self, post_ids):
+        touched = Post.objects.filter(pk__in=post_ids)
+        category_ids = set(touched.exclude(category=None).values_list('category', flat=True))
+        tag_ids = set(
+            Post.tags.through.objects.filter(post_id__in=post_ids).values_list('tag_id', flat=True)
+        )
+        recount_post_counts(category_ids=category_ids, tag_ids=tag_ids)
+
+        backend = get_search_backend()
+        for chunk in _chunks(post_ids, self.batch_size):
+            backend.index_posts(chunk)
+            enqueue_on_commit(render_post_content, chunk)
+        # A batch of new posts shifts term weights for everyone, so refit rather than patch
+        enqueue_on_commit(rebuild_related_posts)
+
+        invalidate_tags('blog.post', 'blog.category', 'blog.tag')
+        invalidate_sections(affected_sections(post_ids, category_ids, tag_ids))
+
+
+def import_posts(lines, author, batch_size=500):
+    """Import posts from an iterable of JSON Lines and return an ImportResult."""
+    return PostImporter(author, batch_size=batch_size).run(iter_jsonl(lines))
@@ -0,0 +1,98 @@
+"""
+Precomputed popular-post leaderboards for Neural Digital Garden.
+
+Leaderboards are built from the hourly ``PostViewBucket`` rows by the
+``blog.tasks.refresh_leaderboards`` Celery task and stored in the cache as
+short ``[(post_id, score), ...]`` lists, so serving one costs a cache read
+plus a primary-key lookup of at most ``LEADERBOARD_SIZE`` posts.
+
+- ``trending``: views weighted by ``2 ** (-age / TRENDING_HALF_LIFE_HOURS)``
+- ``24h`` / ``7d``: raw views within the window
+- ``all``: all-time ``Post.view_count``
+"""
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Post, PostViewBucket
+
+WINDOWS = {
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+}
+LEADERBOARDS = ('trending', *WINDOWS, 'all')
+CACHE_KEY = 'blog:leaderboard:{}'
+
+
+def leaderboard_size():
+    return getattr(settings, 'LEADERBOARD_SIZE', 10)
+
+
+def trending_horizon():
+    """How far back trending looks; older views have decayed to nearly nothing."""
+    return timedelta(hours=getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 24) * 7)
+
+
+def compute_leaderboard(name, now=None):
+    """Return the top posts for a leaderboard as ``[(post_id, score), ...]``."""
+    now = now or timezone.now()
+    size = leaderboard_size()
+    published = PostViewBucket.objects.filter(post__status='published')
+
+    if name == 'all':
+        return list(
+            Post.objects.filter(status='published', view_count__gt=0)
+            .order_by('-view_count', '-pk')
+            .values_list('pk', 'view_count')[:size]
+        )
+
+    if name in WINDOWS:
+        return list(
+            published.filter(hour__gte=now - WINDOWS[name])
+            .values('post')
+            .annotate(score=Sum('views'))
+            .order_by('-score', '-post')
+            .values_list('post', 'score')[:size]
+        )
+
+    if name == 'trending':
+        half_life = getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 24)
+        scores = defaultdict(float)
+        buckets = published.filter(hour__gte=now - trending_horizon()).values_list('post', 'hour', 'views')
+        for post_id, hour, views in buckets.iterator():
+            age_hours = (now - hour).total_seconds() / 3600
+            scores[post_id] += views * math.pow(2, -age_hours / half_life)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return [(post_id, round(score, 3)) for post_id, score in ranked[:size]]
+
+    raise ValueError(f'Unknown leaderboard: {name}')
+
+
+def refresh_leaderboards(now=None):
+    """Recompute every leaderboard and store it in the cache."""
+    boards = {name: compute_leaderboard(name, now=now) for name in LEADERBOARDS}
+    cache.set_many({CACHE_KEY.format(name): board for name, board in boards.items()}, timeout=None)
+    return boards
+
+
+def get_leaderboard(name):
+    """Return a cached leaderboard, computing it on a cold cache."""
+    board = cache.get(CACHE_KEY.format(name))
+    if board is None:
+        board = compute_leaderboard(name)
+        cache.set(CACHE_KEY.format(name), board, timeout=None)
+    return board
+
+
+def popular_post_ids(window):
+    """Post ids on a leaderboard, best first; all-time until recent views are recorded."""
+    board = get_leaderboard(window)
+    if not board and window != 'all':
+        board = get_leaderboard('all')
+    return [post_id for post_id, _ in board]
+
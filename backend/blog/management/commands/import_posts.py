@@ -0,0 +1,41 @@
+"""
+Bulk-import posts from a JSON Lines file.
+"""
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.importer import import_posts
+
+
+class Command(BaseCommand):
+    help = 'Import posts from a JSON Lines file (one post object per line, "-" for stdin)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSON Lines file to import, or "-" for stdin')
+        parser.add_argument('--author', required=True, help='Username the imported posts belong to')
+        parser.add_argument('--batch-size', type=int, default=500, help='Posts written per transaction')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            author = User.objects.get(**{User.USERNAME_FIELD: options['author']})
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["author"]}" does not exist.')
+
+        if options['path'] == '-':
+            result = import_posts(sys.stdin, author, batch_size=options['batch_size'])
+        else:
+            try:
+                with open(options['path'], encoding='utf-8') as lines:
+                    result = import_posts(lines, author, batch_size=options['batch_size'])
+            except OSError as exc:
+                raise CommandError(f'Cannot read {options["path"]}: {exc}')
+
+        for error in result.errors:
+            self.stderr.write(f'Line {error["line"]}: {error["errors"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.created} post(s), skipped {result.skipped} existing, '
+            f'{len(result.errors)} error(s).'
+        ))
@@ -0,0 +1,20 @@
+"""
+Refit the related-posts index and recompute every related list.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import related
+
+
+class Command(BaseCommand):
+    help = 'Refit the related-posts TF-IDF index and recompute related posts for all published posts'
+
+    def handle(self, *args, **options):
+        with related.index_lock() as acquired:
+            if not acquired:
+                raise CommandError('A related-posts rebuild or update is already running.')
+            summary = related.rebuild_related_posts()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {summary['posts']} post(s) over {summary['terms']} term(s); "
+            f"stored {summary['related']} related link(s)."
+        ))
@@ -0,0 +1,22 @@
+"""
+Rebuild the post search index from scratch.
+"""
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+from blog.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for all posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Posts indexed per batch')
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        batch_size = options['batch_size']
+        post_ids = list(Post.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(post_ids), batch_size):
+            backend.index_posts(post_ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {len(post_ids)} post(s).'))
@@ -0,0 +1,26 @@
+"""
+Pre-render post content that is missing or out of date.
+"""
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+from blog.rendering import render_posts, stale_post_ids
+
+
+class Command(BaseCommand):
+    help = 'Render post bodies to HTML, table of contents and word count'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Re-render every post, even unchanged ones')
+        parser.add_argument('--batch-size', type=int, default=500, help='Posts rendered per batch')
+
+    def handle(self, *args, **options):
+        if options['force']:
+            post_ids = list(Post.objects.order_by('pk').values_list('pk', flat=True))
+        else:
+            post_ids = stale_post_ids()
+        batch_size = options['batch_size']
+        rendered = 0
+        for start in range(0, len(post_ids), batch_size):
+            rendered += render_posts(post_ids[start:start + batch_size], force=options['force'])
+        self.stdout.write(self.style.SUCCESS(f'Rendered {rendered} post(s).'))
@@ -2,19 +2,59 @@
 Blog models for Neural Digital Garden.
 """
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from django.urls import reverse
 from django.utils.text import slugify
 from django.utils import timezone
 
 
+class NamedQuerySet(models.QuerySet):
+    """QuerySet for models identified by a unique name with a derived slug."""
+
+    def resolve(self, names):
+        """Return objects for the given names in order, creating missing ones in bulk.
+
+        Costs one lookup, plus one bulk insert and one re-read when some
+        names are new, however many names are given.
+        """
+        names = list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+        if not names:
+            return []
+
+        found = {obj.name: obj for obj in self.filter(name__in=names)}
+        missing = [name for name in names if name not in found]
+        if missing:
+            self.bulk_create(
+                [self.model(name=name, slug=slugify(name)) for name in missing],
+                ignore_conflicts=True,
+            )
+            found.update((obj.name, obj) for obj in self.filter(name__in=missing))
+            # Names whose slug collided with an existing row get a numbered slug
+            for name in missing:
+                if name not in found:
+                    found[name] = self._create_with_unique_slug(name)
+        return [found[name] for name in names]
+
+    def _create_with_unique_slug(self, name):
+        base = slugify(name) or 'item'
+        slug, suffix = base, 2
+        while self.filter(slug=slug).exists():
+            slug, suffix = f'{base}-{suffix}', suffix + 1
+        return self.create(name=name, slug=slug)
+
+
 class Category(models.Model):
     """Blog category model."""
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True)
     description = models.TextField(blank=True)
+    post_count = models.PositiveIntegerField('published posts', default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = NamedQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = 'Categories'
         ordering = ['name']
@@ -32,8 +72,11 @@ class Tag(models.Model):
     """Blog tag model."""
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(max_length=50, unique=True)
+    post_count = models.PositiveIntegerField('published posts', default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = NamedQuerySet.as_manager()
+
     class Meta:
         ordering = ['name']
 
@@ -46,6 +89,27 @@ class Tag(models.Model):
         super().save(*args, **kwargs)
 
 
+def approved_comment_count():
+    """Expression counting a post's approved comments.
+
+    A correlated subquery rather than ``Count()`` over a join, so it stays
+    right when the queryset is also filtered on tags.
+    """
+    counts = (
+        Comment.objects.filter(post=models.OuterRef('pk'), is_approved=True)
+        .order_by().values('post').annotate(total=models.Count('pk')).values('total')
+    )
+    return Coalesce(models.Subquery(counts, output_field=models.IntegerField()), 0)
+
+
+class PostQuerySet(models.QuerySet):
+    """QuerySet for posts."""
+
+    def with_comment_counts(self):
+        """Annotate ``approved_comment_count`` so serializers need no query per post."""
+        return self.annotate(approved_comment_count=approved_comment_count())
+
+
 class Post(models.Model):
     """Blog post model."""
     STATUS_CHOICES = [
@@ -62,6 +126,7 @@ class Post(models.Model):
     excerpt = models.TextField(max_length=300, blank=True, help_text='Short description for listing pages')
     content = models.TextField()
     featured_image = models.ImageField(upload_to='blog/images/', blank=True, null=True)
+    featured_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     is_featured = models.BooleanField(default=False, help_text='Show in featured section')
     reading_time = models.PositiveIntegerField(default=0, help_text='Reading time in minutes')
@@ -69,40 +134,71 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     published_at = models.DateTimeField(null=True, blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Rendered by blog.rendering off the request path; see render_posts task
+    content_html = models.TextField(blank=True, editable=False)
+    content_toc = models.JSONField(default=list, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-published_at', '-created_at']
         indexes = [
             models.Index(fields=['slug']),
-            models.Index(fields=['status']),
+            models.Index(fields=['status', '-published_at']),
             models.Index(fields=['-published_at']),
+            # Admin changelist filters
+            models.Index(fields=['is_featured', '-published_at']),
+            # Keyset pages of the API list; the published_at ones are added after migrate
+            # (blog.pagination.create_page_indexes)
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['status', 'created_at', 'id']),
         ]
+        # The GIN index on search_vector is created after migrate (blog.search.create_search_index)
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
+        self.populate_derived_fields()
+        super().save(*args, **kwargs)
+
+    def populate_derived_fields(self):
+        """Fill in slug and publish date (also used by bulk imports).
+
+        Reading time is derived from the rendered word count by
+        ``render_posts`` rather than here, on every save.
+        """
         if not self.slug:
             self.slug = slugify(self.title)
         
-        # Auto-calculate reading time if not set
-        if not self.reading_time and self.content:
-            word_count = len(self.content.split())
-            self.reading_time = max(1, word_count // 200)  # ~200 words per minute
-        
         # Set published_at when status changes to published
         if self.status == 'published' and not self.published_at:
             self.published_at = timezone.now()
-        
-        super().save(*args, **kwargs)
 
     def get_absolute_url(self):
         return reverse('blog:post-detail', kwargs={'slug': self.slug})
 
-    def increment_view_count(self):
-        """Increment the view count."""
-        self.view_count += 1
-        self.save(update_fields=['view_count'])
+    def increment_view_count(self, amount=1):
+        """Record a view; it is buffered and written to view_count in batches."""
+        from .view_counter import get_view_buffer
+        buffer = get_view_buffer()
+        if not hasattr(self, '_pending_views'):
+            # Read before incrementing: the increment may flush the buffer into
+            # view_count, which this instance loaded before the flush
+            self._pending_views = buffer.pending(self.pk)
+        buffer.increment(self.pk, amount)
+        self._pending_views += amount
+
+    @property
+    def live_view_count(self):
+        """Stored view count plus views still waiting in the write buffer."""
+        if not hasattr(self, '_pending_views'):
+            from .view_counter import get_view_buffer
+            self._pending_views = get_view_buffer().pending(self.pk)
+        return self.view_count + self._pending_views
 
 
 class Comment(models.Model):
@@ -112,12 +208,152 @@ class Comment(models.Model):
     author_email = models.EmailField()
     content = models.TextField()
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+    thread = models.ForeignKey(
+        'self', on_delete=models.CASCADE, null=True, blank=True, editable=False,
+        related_name='thread_replies', help_text='Top-level comment this reply belongs to'
+    )
+    depth = models.PositiveSmallIntegerField(default=0, editable=False, help_text='Nesting level (0 for top-level)')
     is_approved = models.BooleanField(default=False)
+    submission_id = models.UUIDField(
+        null=True, blank=True, unique=True, editable=False,
+        help_text='Pending ID returned when the comment was queued'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['post', 'parent', 'is_approved', 'created_at', 'id']),
+            models.Index(fields=['thread', 'is_approved', 'depth']),
+            # Keyset pages on (created_at, id); the admin changelist reads them backwards, newest first
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['is_approved', 'created_at', 'id']),
+        ]
 
     def __str__(self):
         return f'Comment by {self.author_name} on {self.post.title}'
+
+    def save(self, *args, **kwargs):
+        # Denormalize the thread root and depth so a whole thread loads in one query
+        if self.parent_id:
+            parent = self.parent
+            self.thread_id = parent.thread_id or parent.pk
+            self.depth = parent.depth + 1
+        else:
+            self.thread = None
+            self.depth = 0
+        super().save(*args, **kwargs)
+
+
+class PostViewBucket(models.Model):
+    """Page views of a post within one hour, fed by the view counter flush."""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='view_buckets')
+    hour = models.DateTimeField(help_text='Start of the hour the views were recorded in')
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-hour']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'hour'], name='blog_viewbucket_unique_post_hour'),
+        ]
+        indexes = [
+            models.Index(fields=['hour']),
+        ]
+
+    def __str__(self):
+        return f'{self.views} view(s) of post {self.post_id} at {self.hour:%Y-%m-%d %H:00}'
+
+
+class ViewDay(models.Model):
+    """Page views within one day, rolled up from the hourly buckets by ``blog.analytics``."""
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+        ordering = ['-day']
+
+
+class PostViewDay(ViewDay):
+    """Daily page views of a post."""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='view_days')
+
+    class Meta(ViewDay.Meta):
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'day'], name='blog_postviewday_unique_post_day'),
+        ]
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        return f'{self.views} view(s) of post {self.post_id} on {self.day:%Y-%m-%d}'
+
+
+class CategoryViewDay(ViewDay):
+    """Daily page views of all posts in a category."""
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='view_days')
+
+    class Meta(ViewDay.Meta):
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'day'], name='blog_categoryviewday_unique_day'),
+        ]
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        return f'{self.views} view(s) of category {self.category_id} on {self.day:%Y-%m-%d}'
+
+
+class TagViewDay(ViewDay):
+    """Daily page views of all posts with a tag."""
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='view_days')
+
+    class Meta(ViewDay.Meta):
+        constraints = [
+            models.UniqueConstraint(fields=['tag', 'day'], name='blog_tagviewday_unique_day'),
+        ]
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        return f'{self.views} view(s) of tag {self.tag_id} on {self.day:%Y-%m-%d}'
+
+
+class RelatedPost(models.Model):
+    """One of a post's most similar posts, precomputed by ``blog.related``."""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_to_entries')
+    score = models.FloatField(help_text='Cosine similarity of the two posts (0-1)')
+    rank = models.PositiveSmallIntegerField(help_text='Position in the post\'s related list, from 0')
+
+    class Meta:
+        ordering = ['post', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'related'], name='blog_relatedpost_unique_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['post', 'rank']),
+        ]
+
+    def __str__(self):
+        return f'Post {self.related_id} is related to post {self.post_id} ({self.score:.2f})'
+
+
+class PostSearchTerm(models.Model):
+    """Inverted index entry used for post search on databases without full-text support."""
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='search_terms')
+    title_hits = models.PositiveIntegerField(default=0)
+    body_hits = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'post'], name='blog_searchterm_unique_term_post'),
+        ]
+
+    def __str__(self):
+        return f'{self.term} in post {self.post_id}'
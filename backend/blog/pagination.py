@@ -0,0 +1,48 @@
+"""
+Blog pagination classes for Neural Digital Garden.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import F, Index
+
+from core.pagination import KeysetPagination
+from .models import Post
+
+# Post pages walk (published_at DESC NULLS LAST, id DESC). Other databases
+# sort NULLs that way anyway, but PostgreSQL needs the order in the index, and
+# SQLite can't declare it, so these aren't on Post.Meta.
+POST_PAGE_INDEXES = [
+    Index(F('published_at').desc(nulls_last=True), F('id').desc(), name='blog_post_published_page'),
+    Index(F('status'), F('published_at').desc(nulls_last=True), F('id').desc(), name='blog_post_status_pub_page'),
+]
+
+
+class PostCursorPagination(KeysetPagination):
+    """Keyset pages of posts on (published_at, id), honouring ?ordering=."""
+    ordering = '-published_at'
+
+
+class CommentCursorPagination(KeysetPagination):
+    """Keyset pages of comments on (created_at, id), oldest first."""
+    ordering = 'created_at'
+
+
+class CommentThreadPagination(CommentCursorPagination):
+    """Keyset pages of top-level comment threads for a post."""
+    page_size = getattr(settings, 'COMMENT_THREADS_PAGE_SIZE', 20)
+    max_page_size = getattr(settings, 'COMMENT_THREADS_MAX_PAGE_SIZE', 100)
+
+
+def create_page_indexes(using=DEFAULT_DB_ALIAS, **kwargs):
+    """``post_migrate`` handler adding ``POST_PAGE_INDEXES`` on PostgreSQL."""
+    target = connections[using]
+    if target.vendor != 'postgresql':
+        return
+    with target.cursor() as cursor:
+        if Post._meta.db_table not in target.introspection.table_names(cursor):
+            return
+        existing = target.introspection.get_constraints(cursor, Post._meta.db_table)
+    with target.schema_editor() as editor:
+        for index in POST_PAGE_INDEXES:
+            if index.name not in existing:
+                editor.add_index(Post, index)
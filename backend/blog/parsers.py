@@ -0,0 +1,13 @@
+"""
+Blog request parsers for Neural Digital Garden.
+"""
+from rest_framework.parsers import BaseParser
+
+
+class JSONLinesParser(BaseParser):
+    """Passes a JSON Lines body through as a lazy iterator of lines."""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        return (line.decode(encoding) for line in stream)
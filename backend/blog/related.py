@@ -0,0 +1,288 @@
+"""
+Precomputed related posts for Neural Digital Garden.
+
+Every published post is described by a TF-IDF vector over the terms of its
+title, excerpt and content (title and excerpt terms count extra), plus one
+feature per tag and one for its category. Cosine similarities between all
+vectors are computed in blocks of sparse matrix products, and the
+``RELATED_POSTS_COUNT`` best matches of each post are stored as
+``RelatedPost`` rows, so serving ``/api/blog/posts/<slug>/related/`` is one
+indexed query.
+
+The fitted index (vocabulary, IDF weights and normalised vectors) is kept
+at ``RELATED_INDEX_PATH``. When posts change only their vectors are rebuilt
+against that vocabulary, and only the related lists they can enter or
+leave are recomputed. Terms that appear after the last full build are
+ignored until the periodic ``rebuild_related_posts`` task refits the index.
+"""
+import math
+import os
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Min
+from scipy import sparse
+
+from core.cache import invalidate_tags, model_tag
+from .models import Post, RelatedPost
+from .search import tokenize
+
+TITLE_WEIGHT = 3.0
+EXCERPT_WEIGHT = 2.0
+TAG_WEIGHT = 2.0
+CATEGORY_WEIGHT = 1.0
+BLOCK_SIZE = 1000  # Rows multiplied at once when computing all similarities
+
+
+LOCK_KEY = 'blog:related:lock'
+
+
+@contextmanager
+def index_lock(timeout=30 * 60):
+    """Hold the related index for one rebuild or update at a time; yields whether it was acquired."""
+    acquired = cache.add(LOCK_KEY, True, timeout=timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            cache.delete(LOCK_KEY)
+
+
+def related_count():
+    return getattr(settings, 'RELATED_POSTS_COUNT', 5)
+
+
+def index_path():
+    return Path(getattr(settings, 'RELATED_INDEX_PATH', settings.BASE_DIR / 'var' / 'related_index.npz'))
+
+
+def post_features(post, tag_ids):
+    """Raw feature weights of a post: sublinear term frequencies plus tag and category features."""
+    counts = Counter()
+    for text, weight in ((post.title, TITLE_WEIGHT), (post.excerpt, EXCERPT_WEIGHT), (post.content, 1.0)):
+        for term in tokenize(text):
+            counts[term] += weight
+    features = {term: 1.0 + math.log(count) for term, count in counts.items()}
+    for tag_id in tag_ids:
+        features[f'tag:{tag_id}'] = TAG_WEIGHT
+    if post.category_id:
+        features[f'category:{post.category_id}'] = CATEGORY_WEIGHT
+    return features
+
+
+def load_documents(post_ids=None):
+    """``{post_id: features}`` for published posts (all of them, or those in ``post_ids``)."""
+    posts = Post.objects.filter(status='published').only('title', 'excerpt', 'content', 'category_id')
+    links = Post.tags.through.objects.filter(post__status='published')
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+        links = links.filter(post_id__in=post_ids)
+
+    tags = defaultdict(list)
+    for post_id, tag_id in links.values_list('post_id', 'tag_id'):
+        tags[post_id].append(tag_id)
+    return {post.pk: post_features(post, tags[post.pk]) for post in posts.iterator(chunk_size=2000)}
+
+
+def _normalize(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix)
+
+
+def _top_k(similarities, row_ids, post_ids, k):
+    """Best ``k`` ``(post_id, score)`` pairs for each row of a sparse similarity block."""
+    results = {}
+    for offset, row_id in enumerate(row_ids):
+        start, end = similarities.indptr[offset], similarities.indptr[offset + 1]
+        columns, scores = similarities.indices[start:end], similarities.data[start:end]
+        keep = (post_ids[columns] != row_id) & (scores > 0)
+        columns, scores = columns[keep], scores[keep]
+        if len(scores) > k:
+            best = np.argpartition(-scores, k)[:k]
+            columns, scores = columns[best], scores[best]
+        order = np.lexsort((post_ids[columns], -scores))  # Best first; ties by post id
+        results[int(row_id)] = [
+            (int(post_ids[column]), float(score)) for column, score in zip(columns[order], scores[order])
+        ]
+    return results
+
+
+class RelatedIndex:
+    """TF-IDF vectors of all published posts, one L2-normalised row per post."""
+
+    def __init__(self, post_ids, terms, idf, matrix):
+        self.post_ids = np.asarray(post_ids, dtype=np.int64)
+        self.terms = list(terms)
+        self.vocabulary = {term: column for column, term in enumerate(self.terms)}
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.matrix = sparse.csr_matrix(matrix, shape=(len(self.post_ids), len(self.terms)))
+
+    @classmethod
+    def fit(cls, documents, max_df=None):
+        """Build the vocabulary, IDF weights and vectors from ``{post_id: features}``.
+
+        Features found in a single post can't relate two posts, and those in
+        more than ``max_df`` of them don't tell posts apart, so both are left
+        out of the vocabulary.
+        """
+        max_df = getattr(settings, 'RELATED_MAX_DF', 0.5) if max_df is None else max_df
+        total = len(documents)
+        frequencies = Counter(feature for features in documents.values() for feature in features)
+        terms = sorted(
+            feature for feature, frequency in frequencies.items()
+            if frequency >= 2 and frequency <= max(2, max_df * total)
+        )
+        idf = np.array([math.log((1 + total) / (1 + frequencies[term])) + 1.0 for term in terms])
+        index = cls(list(documents), terms, idf, sparse.csr_matrix((len(documents), len(terms))))
+        index.matrix = index.vectorize(documents.values())
+        return index
+
+    def vectorize(self, documents):
+        """Normalised TF-IDF rows for an iterable of feature dicts, ignoring unknown features."""
+        rows, columns, values = [], [], []
+        count = 0
+        for row, features in enumerate(documents):
+            count += 1
+            for feature, weight in features.items():
+                column = self.vocabulary.get(feature)
+                if column is not None:
+                    rows.append(row)
+                    columns.append(column)
+                    values.append(weight * self.idf[column])
+        matrix = sparse.csr_matrix((values, (rows, columns)), shape=(count, len(self.terms)))
+        return _normalize(matrix)
+
+    def neighbours(self, row_ids, k):
+        """Top ``k`` related posts for each post in ``row_ids`` (which must be indexed)."""
+        positions = {int(post_id): position for position, post_id in enumerate(self.post_ids)}
+        results = {}
+        transposed = self.matrix.T
+        row_ids = list(row_ids)
+        for start in range(0, len(row_ids), BLOCK_SIZE):
+            block_ids = row_ids[start:start + BLOCK_SIZE]
+            block = self.matrix[[positions[post_id] for post_id in block_ids]]
+            similarities = sparse.csr_matrix(block @ transposed)
+            results.update(_top_k(similarities, block_ids, self.post_ids, k))
+        return results
+
+    def similarities_to(self, vectors):
+        """Similarity of every indexed post to each row of ``vectors``, as an (indexed, len(vectors)) matrix."""
+        return sparse.csr_matrix(self.matrix @ vectors.T)
+
+    def replace(self, documents, removed=()):
+        """Swap in new vectors for ``documents`` (adding new posts) and drop ``removed`` posts."""
+        drop = set(documents) | set(removed)
+        keep = np.array([int(post_id) not in drop for post_id in self.post_ids], dtype=bool)
+        self.matrix = sparse.vstack([self.matrix[keep], self.vectorize(documents.values())], format='csr')
+        self.post_ids = np.concatenate([self.post_ids[keep], np.array(list(documents), dtype=np.int64)])
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f'.{path.name}.tmp')
+        with open(temporary, 'wb') as handle:
+            np.savez_compressed(
+                handle,
+                post_ids=self.post_ids, terms=np.array(self.terms, dtype=str), idf=self.idf,
+                data=self.matrix.data, indices=self.matrix.indices, indptr=self.matrix.indptr,
+            )
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as stored:
+            terms = stored['terms'].tolist()
+            matrix = sparse.csr_matrix(
+                (stored['data'], stored['indices'], stored['indptr']),
+                shape=(len(stored['post_ids']), len(terms)),
+            )
+            return cls(stored['post_ids'], terms, stored['idf'], matrix)
+
+
+def _write_lists(lists, replace_post_ids=None):
+    """Store ``{post_id: [(related_id, score), ...]}``, replacing the rows of ``replace_post_ids`` (or all)."""
+    entries = [
+        RelatedPost(post_id=post_id, related_id=related_id, score=score, rank=rank)
+        for post_id, related in lists.items()
+        for rank, (related_id, score) in enumerate(related)
+    ]
+    mentioned = {entry.post_id for entry in entries} | {entry.related_id for entry in entries}
+    existing = set(Post.objects.filter(pk__in=mentioned).values_list('pk', flat=True))
+    entries = [entry for entry in entries if entry.post_id in existing and entry.related_id in existing]
+    with transaction.atomic():
+        stale = RelatedPost.objects.all()
+        if replace_post_ids is not None:
+            stale = stale.filter(post_id__in=replace_post_ids)
+        stale.delete()
+        RelatedPost.objects.bulk_create(entries, batch_size=2000)
+    invalidate_tags(model_tag(RelatedPost))
+    return len(entries)
+
+
+def rebuild_related_posts():
+    """Refit the index over every published post and recompute all related lists."""
+    documents = load_documents()
+    index = RelatedIndex.fit(documents)
+    written = _write_lists(index.neighbours(documents, related_count()))
+    index.save(index_path())
+    return {'posts': len(documents), 'terms': len(index.terms), 'related': written}
+
+
+def update_related_posts(post_ids):
+    """Bring the related lists up to date after ``post_ids`` were saved, unpublished or deleted.
+
+    Besides the changed posts' own lists, only lists that a changed post
+    is in, or could now enter (it beats their weakest entry, or they have
+    room left), are recomputed.
+    """
+    try:
+        index = RelatedIndex.load(index_path())
+    except (OSError, ValueError, KeyError):
+        return rebuild_related_posts()  # No usable index yet
+
+    k = related_count()
+    post_ids = {int(post_id) for post_id in post_ids}
+    documents = load_documents(post_ids)
+    removed = post_ids - set(documents)
+
+    # Posts similar to a changed post before the change (old vectors) or after it (new ones)
+    indexed = {int(post_id): position for position, post_id in enumerate(index.post_ids)}
+    old_rows = [indexed[post_id] for post_id in post_ids if post_id in indexed]
+    old_similar = set(index.post_ids[index.similarities_to(index.matrix[old_rows]).nonzero()[0]].tolist())
+    index.replace(documents, removed)
+    new_similarities = index.similarities_to(index.vectorize(documents.values())).tocsr()
+    best_new = np.asarray(new_similarities.max(axis=1).todense()).ravel() if documents else np.zeros(len(index.post_ids))
+    new_similar = {
+        int(post_id): score for post_id, score in zip(index.post_ids, best_new) if score > 0
+    }
+
+    candidates = (old_similar | set(new_similar)) - post_ids
+    current = {
+        row['post_id']: row for row in
+        RelatedPost.objects.filter(post_id__in=candidates)
+        .values('post_id').annotate(weakest=Min('score'), size=Count('id'))
+    }
+    listing_changed = set(
+        RelatedPost.objects.filter(related_id__in=post_ids).values_list('post_id', flat=True)
+    )
+    affected = {
+        post_id for post_id in candidates
+        if post_id in listing_changed
+        or current.get(post_id, {}).get('size', 0) < k
+        or new_similar.get(post_id, 0) > current[post_id]['weakest']
+    } | listing_changed
+    still_indexed = set(index.post_ids.tolist())
+    affected = {post_id for post_id in affected if post_id in still_indexed}
+
+    lists = index.neighbours(sorted(affected | set(documents)), k)
+    for post_id in removed:
+        lists[post_id] = []
+    written = _write_lists(lists, replace_post_ids=set(lists))
+    index.save(index_path())
+    return {'changed': len(post_ids), 'recomputed': len(lists), 'related': written}
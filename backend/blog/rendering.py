@@ -0,0 +1,125 @@
+"""
+Post content rendering for Neural Digital Garden.
+
+Post bodies are written in Markdown. They are rendered once, off the request
+path, to sanitized HTML together with a table of contents and a word count,
+and the results are stored on the post next to a hash of the source they were
+rendered from. Re-rendering is skipped while the hash is unchanged; bump
+``RENDERER_VERSION`` when the output format changes to force a full rebuild.
+"""
+import hashlib
+import html
+from dataclasses import dataclass
+
+import markdown
+import nh3
+from django.utils.html import strip_tags
+
+from core.cache import invalidate_tags
+from .models import Post
+
+RENDERER_VERSION = '1'
+
+MARKDOWN_EXTENSIONS = ['extra', 'sane_lists', 'toc']
+MARKDOWN_EXTENSION_CONFIGS = {'toc': {'permalink': False, 'toc_depth': '2-4'}}
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'blockquote', 'br', 'code', 'dd', 'del', 'div', 'dl', 'dt', 'em',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'img', 'li', 'ol', 'p', 'pre',
+    'span', 'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'tfoot', 'th',
+    'thead', 'tr', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    '*': {'id', 'class'},
+    'a': {'href', 'title'},
+    'abbr': {'title'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+    'td': {'align'},
+    'th': {'align'},
+}
+
+
+@dataclass
+class RenderedContent:
+    """Everything derived from a post body."""
+    html: str
+    toc: list
+    word_count: int
+    content_hash: str
+
+    @property
+    def reading_time(self):
+        return max(1, self.word_count // 200)  # ~200 words per minute
+
+
+def content_hash(content):
+    """Hash identifying a post body as rendered by the current renderer."""
+    return hashlib.sha256(f'{RENDERER_VERSION}\0{content}'.encode('utf-8')).hexdigest()
+
+
+def _toc_entries(tokens):
+    return [
+        {
+            'id': token['id'],
+            'title': html.unescape(strip_tags(token['name'])),
+            'level': token['level'],
+            'children': _toc_entries(token['children']),
+        }
+        for token in tokens
+    ]
+
+
+def render_content(content):
+    """Render a Markdown post body to sanitized HTML, a TOC and a word count."""
+    md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS, extension_configs=MARKDOWN_EXTENSION_CONFIGS)
+    rendered = nh3.clean(
+        md.convert(content or ''),
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        url_schemes={'http', 'https', 'mailto'},
+        link_rel='noopener noreferrer',
+    )
+    return RenderedContent(
+        html=rendered,
+        toc=_toc_entries(md.toc_tokens),
+        word_count=len(html.unescape(strip_tags(rendered)).split()),
+        content_hash=content_hash(content),
+    )
+
+
+def render_posts(post_ids, force=False):
+    """Render and store the content of the given posts; return how many changed.
+
+    Posts whose stored hash matches their current body are skipped unless
+    ``force`` is set. Results are written with ``QuerySet.update()`` guarded
+    on ``updated_at``, so a render that raced with a newer save is dropped
+    (that save queues its own render) and ``updated_at`` is left alone.
+    """
+    rendered = 0
+    posts = Post.objects.filter(pk__in=post_ids).values_list(
+        'pk', 'content', 'content_hash', 'word_count', 'reading_time', 'updated_at'
+    )
+    for pk, content, stored_hash, word_count, reading_time, updated_at in posts.iterator():
+        if not force and stored_hash == content_hash(content):
+            continue
+        result = render_content(content)
+        # Keep an author-supplied reading time; refresh one we estimated ourselves
+        estimated = not reading_time or (word_count and reading_time == max(1, word_count // 200))
+        if estimated:
+            reading_time = result.reading_time if result.word_count else 0
+        rendered += Post.objects.filter(pk=pk, updated_at=updated_at).update(
+            content_html=result.html,
+            content_toc=result.toc,
+            word_count=result.word_count,
+            content_hash=result.content_hash,
+            reading_time=reading_time,
+        )
+    if rendered:
+        invalidate_tags('blog.post')
+    return rendered
+
+
+def stale_post_ids():
+    """Primary keys of posts never rendered or rendered by an older renderer."""
+    posts = Post.objects.values_list('pk', 'content', 'content_hash')
+    return [pk for pk, content, stored_hash in posts.iterator() if stored_hash != content_hash(content)]
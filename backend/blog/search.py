@@ -0,0 +1,219 @@
+"""
+Full-text post search for Neural Digital Garden.
+
+PostgreSQL keeps a weighted ``tsvector`` per post (title > excerpt > content)
+behind a GIN index and ranks with ``ts_rank``. The index is created after
+``migrate`` by ``create_search_index`` rather than declared on ``Post``, so
+the migrations ``makemigrations`` writes don't depend on the database. Other databases use the
+``PostSearchTerm`` inverted index with TF-IDF scoring in Python. Both are
+updated incrementally whenever a post is saved.
+"""
+import math
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Count, F, Value
+from django.db.models.functions import Replace
+from django.utils.html import escape
+
+from .models import Post, PostSearchTerm
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+STOP_WORDS = frozenset("""
+    a an and are as at be but by for from has have if in into is it its of on
+    or that the their then there these this to was were will with
+""".split())
+
+TITLE_WEIGHT = 3.0
+BODY_WEIGHT = 1.0
+SNIPPET_WORDS = 30
+
+# ts_headline marks matches with these private-use characters, so the headline
+# can be escaped before they become <mark> tags; a post containing one can't
+# inject anything but a <mark>
+HEADLINE_START = '\ue000'
+HEADLINE_STOP = '\ue001'
+# What django.utils.html.escape replaces, ampersand first
+HTML_ESCAPES = (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;'), ("'", '&#x27;'))
+
+
+def tokenize(text):
+    """Split text into lowercase index terms, dropping stop words."""
+    return [
+        token[:64] for token in TOKEN_RE.findall(text.lower())
+        if token not in STOP_WORDS
+    ]
+
+
+def build_snippet(text, terms, words=SNIPPET_WORDS):
+    """Return an escaped excerpt around the first match with terms wrapped in <mark>."""
+    tokens = text.split()
+    if not tokens:
+        return ''
+    terms = set(terms)
+
+    def matches(token):
+        return any(term in terms for term in tokenize(token))
+
+    first = next((i for i, token in enumerate(tokens) if matches(token)), 0)
+    start = max(0, first - words // 3)
+    window = tokens[start:start + words]
+    highlighted = ' '.join(
+        f'<mark>{escape(token)}</mark>' if matches(token) else escape(token)
+        for token in window
+    )
+    prefix = '… ' if start else ''
+    suffix = ' …' if start + words < len(tokens) else ''
+    return f'{prefix}{highlighted}{suffix}'
+
+
+def escaped_headline(headline):
+    """SQL for ``headline``, matched with the sentinels above, escaped like ``build_snippet``."""
+    for char, entity in HTML_ESCAPES:
+        headline = Replace(headline, Value(char), Value(entity))
+    headline = Replace(headline, Value(HEADLINE_START), Value('<mark>'))
+    return Replace(headline, Value(HEADLINE_STOP), Value('</mark>'))
+
+
+class PostgresSearchBackend:
+    """Ranked search backed by a weighted tsvector column and a GIN index."""
+
+    def __init__(self):
+        self.config = getattr(settings, 'SEARCH_CONFIG', 'english')
+
+    def _vector(self):
+        from django.contrib.postgres.search import SearchVector
+
+        return (
+            SearchVector('title', weight='A', config=self.config)
+            + SearchVector('excerpt', weight='B', config=self.config)
+            + SearchVector('content', weight='C', config=self.config)
+        )
+
+    def index_posts(self, post_ids):
+        Post.objects.filter(pk__in=post_ids).update(search_vector=self._vector())
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+
+        search_query = SearchQuery(query, search_type='websearch', config=self.config)
+        return (
+            queryset.filter(search_vector=search_query)
+            .annotate(
+                search_rank=SearchRank(F('search_vector'), search_query),
+                search_snippet=escaped_headline(SearchHeadline(
+                    'content', search_query, config=self.config,
+                    start_sel=HEADLINE_START, stop_sel=HEADLINE_STOP, max_words=SNIPPET_WORDS,
+                )),
+            )
+            .order_by('-search_rank', '-published_at', '-pk')
+        )
+
+
+class RankedResults:
+    """Lazily materialized, relevance-ordered search hits.
+
+    Supports ``len()`` and indexing so it can be handed straight to a
+    paginator; only the posts on the requested page are loaded. Posts deleted
+    or unpublished since they were scored are left out of the page.
+    """
+
+    def __init__(self, queryset, scores, terms):
+        self.queryset = queryset
+        self.terms = terms
+        self.scores = scores
+        self.ranked_ids = sorted(scores, key=lambda pk: (-scores[pk], -pk))
+
+    def __len__(self):
+        return len(self.ranked_ids)
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            results = self._load([self.ranked_ids[index]])
+            if not results:
+                raise IndexError('search result no longer available')
+            return results[0]
+        return self._load(self.ranked_ids[index])
+
+    def _load(self, ids):
+        posts = self.queryset.in_bulk(ids)
+        results = []
+        for pk in ids:
+            post = posts.get(pk)
+            if post is None:
+                continue
+            post.search_rank = self.scores[pk]
+            post.search_snippet = build_snippet(post.content, self.terms)
+            results.append(post)
+        return results
+
+
+class InvertedIndexSearchBackend:
+    """Pure-Python fallback that ranks posts from the PostSearchTerm table."""
+
+    def index_posts(self, post_ids):
+        posts = Post.objects.filter(pk__in=post_ids).values_list('pk', 'title', 'excerpt', 'content')
+        entries = []
+        for pk, title, excerpt, content in posts:
+            title_counts = Counter(tokenize(title))
+            body_counts = Counter(tokenize(f'{excerpt} {content}'))
+            entries.extend(
+                PostSearchTerm(
+                    post_id=pk, term=term,
+                    title_hits=title_counts[term], body_hits=body_counts[term],
+                )
+                for term in title_counts.keys() | body_counts.keys()
+            )
+        PostSearchTerm.objects.filter(post_id__in=post_ids).delete()
+        PostSearchTerm.objects.bulk_create(entries, batch_size=1000)
+
+    def search(self, queryset, query):
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return RankedResults(queryset, {}, terms)
+
+        total_posts = Post.objects.count() or 1
+        doc_freq = dict(
+            PostSearchTerm.objects.filter(term__in=terms)
+            .values_list('term')
+            .annotate(posts=Count('post'))
+            .order_by()
+        )
+        idf = {
+            term: math.log(1 + total_posts / doc_freq[term])
+            for term in terms if term in doc_freq
+        }
+
+        scores = Counter()
+        hits = PostSearchTerm.objects.filter(
+            term__in=idf.keys(), post__in=queryset.values('pk')
+        ).values_list('post_id', 'term', 'title_hits', 'body_hits')
+        for post_id, term, title_hits, body_hits in hits:
+            tf = TITLE_WEIGHT * math.log1p(title_hits) + BODY_WEIGHT * math.log1p(body_hits)
+            scores[post_id] += tf * idf[term]
+        return RankedResults(queryset, dict(scores), terms)
+
+
+def create_search_index(using=DEFAULT_DB_ALIAS, **kwargs):
+    """``post_migrate`` handler adding the GIN index on ``search_vector`` on PostgreSQL."""
+    target = connections[using]
+    if target.vendor != 'postgresql':
+        return
+    with target.cursor() as cursor:
+        if Post._meta.db_table in target.introspection.table_names(cursor):
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS blog_post_search_gin ON {Post._meta.db_table} USING gin (search_vector)'
+            )
+
+
+def get_search_backend():
+    """Return the search backend for the default database."""
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return InvertedIndexSearchBackend()
@@ -2,33 +2,45 @@
 Blog serializers for Neural Digital Garden.
 """
 from rest_framework import serializers
-from .models import Category, Tag, Post, Comment
 
+from core.fieldsets import (
+    DynamicFieldsMixin, Related, Value, ValuesSerializer, datetime_representation, datetime_value, file_value,
+    srcset_value,
+)
+from core.images import SrcsetField
+from .comment_tree import CommentTree
+from .models import Category, Tag, Post, Comment, approved_comment_count
+from .pagination import CommentThreadPagination
+from .rendering import RenderedContent, content_hash, render_content
+from .view_counter import get_view_buffer
 
-class CategorySerializer(serializers.ModelSerializer):
+
+class CategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Category model."""
-    post_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Category
         fields = ['id', 'name', 'slug', 'description', 'post_count', 'created_at']
-        read_only_fields = ['slug', 'created_at']
-
-    def get_post_count(self, obj):
-        return obj.posts.filter(status='published').count()
+        read_only_fields = ['slug', 'post_count', 'created_at']
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Tag model."""
-    post_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Tag
         fields = ['id', 'name', 'slug', 'post_count', 'created_at']
-        read_only_fields = ['slug', 'created_at']
+        read_only_fields = ['slug', 'post_count', 'created_at']
+
 
-    def get_post_count(self, obj):
-        return obj.posts.filter(status='published').count()
+class CommentListSerializer(serializers.ListSerializer):
+    """List serializer that loads the replies below a whole page of comments at once."""
+
+    def to_representation(self, data):
+        comments = list(data.all() if hasattr(data, 'all') else data)
+        if 'comment_tree' not in self.context:
+            self._context = {**self.context, 'comment_tree': CommentTree(comments), 'comment_depth': 0}
+        return super().to_representation(comments)
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -43,51 +55,175 @@ class CommentSerializer(serializers.ModelSerializer):
             'content', 'parent', 'is_approved', 'replies', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
+        list_serializer_class = CommentListSerializer
 
     def get_replies(self, obj):
-        replies = obj.replies.filter(is_approved=True)
-        return CommentSerializer(replies, many=True).data
+        tree = self.context.get('comment_tree')
+        if tree is None:
+            # A single comment: load its whole reply thread in one query
+            tree = CommentTree([obj])
+            self._context = {**self.context, 'comment_tree': tree, 'comment_depth': 0}
+
+        depth = self.context.get('comment_depth', 0) + 1
+        if depth > tree.max_depth:
+            return []
+        context = {**self.context, 'comment_depth': depth}
+        return CommentSerializer(tree.replies(obj), many=True, context=context).data
+
 
+class PostListListSerializer(serializers.ListSerializer):
+    """List serializer that looks up buffered view counts for a whole page at once."""
 
-class PostListSerializer(serializers.ModelSerializer):
+    def to_representation(self, data):
+        posts = list(data.all() if hasattr(data, 'all') else data)
+        missing = [post for post in posts if not hasattr(post, '_pending_views')]
+        if missing:
+            pending = get_view_buffer().pending_many(post.pk for post in missing)
+            for post in missing:
+                post._pending_views = pending.get(post.pk, 0)
+        return super().to_representation(posts)
+
+
+class PostListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Post list view."""
     author_name = serializers.CharField(source='author.username', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
     tags = TagSerializer(many=True, read_only=True)
+    view_count = serializers.IntegerField(source='live_view_count', read_only=True)
     comment_count = serializers.SerializerMethodField()
+    featured_image_srcset = SrcsetField(source='featured_image_variants')
 
     class Meta:
+        list_serializer_class = PostListListSerializer
         model = Post
         fields = [
             'id', 'title', 'slug', 'author_name', 'category_name', 'tags',
-            'excerpt', 'featured_image', 'status', 'is_featured', 'reading_time',
+            'excerpt', 'featured_image', 'featured_image_srcset', 'status', 'is_featured', 'reading_time',
             'view_count', 'comment_count', 'created_at', 'updated_at', 'published_at'
         ]
+        expandable_fields = {
+            'category': (CategorySerializer, {}),
+        }
 
     def get_comment_count(self, obj):
+        if hasattr(obj, 'approved_comment_count'):
+            return obj.approved_comment_count
         return obj.comments.filter(is_approved=True).count()
 
 
-class PostDetailSerializer(serializers.ModelSerializer):
+def _post_tags(serializer, post_ids):
+    """Tags of a page of posts in one query, ordered like ``Tag.Meta.ordering``."""
+    rows = Post.tags.through.objects.filter(post_id__in=post_ids).values(
+        'post_id', 'tag__id', 'tag__name', 'tag__slug', 'tag__post_count', 'tag__created_at'
+    ).order_by('tag__name')
+    tags = {}
+    for row in rows:
+        tags.setdefault(row['post_id'], []).append({
+            'id': row['tag__id'],
+            'name': row['tag__name'],
+            'slug': row['tag__slug'],
+            'post_count': row['tag__post_count'],
+            'created_at': datetime_representation(row['tag__created_at']),
+        })
+    return tags
+
+
+class PostListValuesSerializer(ValuesSerializer):
+    """Fast path for PostListSerializer over ``values()`` rows."""
+    serializer_class = PostListSerializer
+    fields = {
+        'id': Value(),
+        'title': Value(),
+        'slug': Value(),
+        'author_name': Value('author__username'),
+        'category_name': Value('category__name', skip_null=True),
+        'tags': Related(_post_tags),
+        'excerpt': Value(),
+        'featured_image': file_value(),
+        'featured_image_srcset': srcset_value('featured_image_variants'),
+        'status': Value(),
+        'is_featured': Value(),
+        'reading_time': Value(),
+        'view_count': Value(convert=lambda value, row, serializer: value + serializer.pending_views.get(row['id'], 0)),
+        'comment_count': Value(annotation=approved_comment_count()),
+        'created_at': datetime_value(),
+        'updated_at': datetime_value(),
+        'published_at': datetime_value(),
+    }
+    extra_columns = ('created_at', 'updated_at', 'published_at', 'view_count')  # Cursor ordering keys
+
+    def prepare(self, rows):
+        if 'view_count' in self.selected:
+            self.pending_views = get_view_buffer().pending_many(row['id'] for row in rows)
+
+
+class PostSearchResultSerializer(PostListSerializer):
+    """Serializer for ranked search results in the Post list view."""
+    rank = serializers.FloatField(source='search_rank', read_only=True)
+    snippet = serializers.CharField(source='search_snippet', read_only=True)
+
+    class Meta(PostListSerializer.Meta):
+        fields = PostListSerializer.Meta.fields + ['rank', 'snippet']
+
+
+class PostDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Post detail view."""
     author_name = serializers.CharField(source='author.username', read_only=True)
     author_email = serializers.EmailField(source='author.email', read_only=True)
     category = CategorySerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
+    view_count = serializers.IntegerField(source='live_view_count', read_only=True)
+    comments = serializers.SerializerMethodField()
     comment_count = serializers.SerializerMethodField()
+    content_html = serializers.SerializerMethodField()
+    toc = serializers.SerializerMethodField()
+    word_count = serializers.SerializerMethodField()
+    featured_image_srcset = SrcsetField(source='featured_image_variants')
 
     class Meta:
         model = Post
         fields = [
             'id', 'title', 'slug', 'author_name', 'author_email', 'category',
-            'tags', 'excerpt', 'content', 'featured_image', 'status', 'is_featured',
+            'tags', 'excerpt', 'content', 'content_html', 'toc', 'word_count',
+            'featured_image', 'featured_image_srcset', 'status', 'is_featured',
             'reading_time', 'view_count', 'comment_count', 'comments',
             'created_at', 'updated_at', 'published_at'
         ]
         read_only_fields = ['slug', 'view_count', 'created_at', 'updated_at', 'published_at']
 
+    def _rendered(self, obj):
+        """Stored rendering, or an inline one while the render task is still pending."""
+        if not hasattr(obj, '_rendered_content'):
+            if obj.content_hash and obj.content_hash == content_hash(obj.content):
+                obj._rendered_content = RenderedContent(
+                    obj.content_html, obj.content_toc, obj.word_count, obj.content_hash
+                )
+            else:
+                obj._rendered_content = render_content(obj.content)
+        return obj._rendered_content
+
+    def get_content_html(self, obj):
+        return self._rendered(obj).html
+
+    def get_toc(self, obj):
+        return self._rendered(obj).toc
+
+    def get_word_count(self, obj):
+        return self._rendered(obj).word_count
+
+    def get_comments(self, obj):
+        """First page of approved threads, nested up to the configured depth."""
+        if hasattr(obj, '_comment_threads'):
+            roots, tree = obj._comment_threads  # Loaded ahead by the async detail view
+        else:
+            roots = list(obj.comments.filter(is_approved=True, parent=None)[:CommentThreadPagination.page_size])
+            tree = CommentTree(roots)
+        context = {**self.context, 'comment_tree': tree, 'comment_depth': 0}
+        return CommentSerializer(roots, many=True, context=context).data
+
     def get_comment_count(self, obj):
+        if hasattr(obj, 'approved_comment_count'):
+            return obj.approved_comment_count
         return obj.comments.filter(is_approved=True).count()
 
 
@@ -110,13 +246,9 @@ class PostCreateUpdateSerializer(serializers.ModelSerializer):
         tags_data = validated_data.pop('tags', [])
         post = Post.objects.create(**validated_data)
         
-        # Create or get tags and add to post
-        for tag_name in tags_data:
-            tag, created = Tag.objects.get_or_create(
-                name=tag_name,
-                defaults={'slug': tag_name.lower().replace(' ', '-')}
-            )
-            post.tags.add(tag)
+        # Resolve all tags in bulk and add them in one insert
+        if tags_data:
+            post.tags.add(*Tag.objects.resolve(tags_data))
         
         return post
 
@@ -128,14 +260,8 @@ class PostCreateUpdateSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         instance.save()
         
-        # Update tags if provided
+        # Update tags if provided; set() only touches rows that changed
         if tags_data is not None:
-            instance.tags.clear()
-            for tag_name in tags_data:
-                tag, created = Tag.objects.get_or_create(
-                    name=tag_name,
-                    defaults={'slug': tag_name.lower().replace(' ', '-')}
-                )
-                instance.tags.add(tag)
+            instance.tags.set(Tag.objects.resolve(tags_data))
         
         return instance
@@ -0,0 +1,209 @@
+"""
+Blog signal handlers for Neural Digital Garden.
+"""
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from core.enqueue import enqueue_on_commit
+from .models import Category, Tag, Post
+from .rendering import content_hash
+from .search import get_search_backend
+from .syndication import affected_sections, invalidate_all, invalidate_sections
+from .tasks import render_post_content, update_related_posts
+
+SEARCH_FIELDS = {'title', 'excerpt', 'content'}
+RELATED_FIELDS = {'title', 'excerpt', 'content', 'status', 'category'}
+
+
+def _adjust_post_count(model, pks, delta):
+    """Add delta to the stored post_count of the given rows, never going below zero."""
+    pks = [pk for pk in pks if pk is not None]
+    if not pks or not delta:
+        return
+    model.objects.filter(pk__in=pks).update(
+        post_count=Greatest(F('post_count') + Value(delta), Value(0))
+    )
+
+
+@receiver(pre_save, sender=Post)
+def remember_published_state(sender, instance, **kwargs):
+    """Remember the stored status and category so post_save can diff them."""
+    instance._counted_state = None
+    if instance.pk and not kwargs.get('raw'):
+        instance._counted_state = (
+            Post.objects.filter(pk=instance.pk).values_list('status', 'category_id').first()
+        )
+
+
+@receiver(post_save, sender=Post)
+def update_counts_on_save(sender, instance, created, raw=False, **kwargs):
+    """Keep Category and Tag post counts in step with the post's published state."""
+    if raw:
+        return
+
+    was_published, old_category_id = False, None
+    previous = getattr(instance, '_counted_state', None)
+    if previous is not None:
+        was_published, old_category_id = previous[0] == 'published', previous[1]
+    is_published = instance.status == 'published'
+
+    if was_published and (not is_published or old_category_id != instance.category_id):
+        _adjust_post_count(Category, [old_category_id], -1)
+    if is_published and (not was_published or old_category_id != instance.category_id):
+        _adjust_post_count(Category, [instance.category_id], 1)
+
+    # A new post has no tags yet; m2m_changed takes care of them.
+    if not created and was_published != is_published:
+        tag_ids = list(instance.tags.values_list('pk', flat=True))
+        _adjust_post_count(Tag, tag_ids, 1 if is_published else -1)
+
+
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Re-index a post whenever its searchable text may have changed."""
+    if raw or (update_fields is not None and not SEARCH_FIELDS & set(update_fields)):
+        return
+    get_search_backend().index_posts([instance.pk])
+
+
+@receiver(post_save, sender=Post)
+def queue_content_render(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Queue a re-render once the transaction commits, if the body's hash changed."""
+    if raw or (update_fields is not None and 'content' not in update_fields):
+        return
+    if instance.content_hash == content_hash(instance.content):
+        return
+    post_id = instance.pk
+    enqueue_on_commit(render_post_content, [post_id])
+
+
+def _queue_related_update(post_ids):
+    post_ids = list(post_ids)
+    if post_ids:
+        enqueue_on_commit(update_related_posts, post_ids)
+
+
+@receiver(post_save, sender=Post)
+def queue_related_update_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Refresh related posts once the transaction commits, if anything they're built from changed."""
+    if raw or (update_fields is not None and not RELATED_FIELDS & set(update_fields)):
+        return
+    _queue_related_update([instance.pk])
+
+
+@receiver(post_delete, sender=Post)
+def queue_related_update_on_delete(sender, instance, **kwargs):
+    """Drop a deleted post from the related-posts index and the lists it was in."""
+    _queue_related_update([instance.pk])
+
+
+@receiver(pre_delete, sender=Post)
+def update_counts_on_delete(sender, instance, **kwargs):
+    """Release the counts held by a published post before its tag rows cascade away."""
+    if instance.status != 'published':
+        return
+    _adjust_post_count(Category, [instance.category_id], -1)
+    _adjust_post_count(Tag, list(instance.tags.values_list('pk', flat=True)), -1)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def update_counts_on_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep Tag post counts in step with Post.tags additions and removals."""
+    if action == 'pre_clear':
+        # pk_set is not provided for clears, so capture the rows before they go.
+        if reverse:
+            instance._cleared_pks = set(
+                instance.posts.filter(status='published').values_list('pk', flat=True)
+            )
+        else:
+            instance._cleared_pks = set(instance.tags.values_list('pk', flat=True))
+        return
+
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_pks', set())
+        delta = -1
+    elif action == 'post_add':
+        delta = 1
+    elif action == 'post_remove':
+        delta = -1
+    else:
+        return
+
+    if not pk_set:
+        return
+
+    if reverse:
+        # tag.posts.add(...) / remove(...): instance is a Tag, pk_set holds posts.
+        if action != 'post_clear':
+            pk_set = Post.objects.filter(pk__in=pk_set, status='published').values_list('pk', flat=True)
+        _adjust_post_count(Tag, [instance.pk], delta * len(pk_set))
+    elif instance.status == 'published':
+        _adjust_post_count(Tag, pk_set, delta)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def queue_related_update_on_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Tags feed the related-posts vectors, so retagged posts are refreshed too."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        _queue_related_update([instance.pk])
+    else:
+        # Clears don't pass pk_set; update_counts_on_tags_changed captured the posts
+        _queue_related_update(pk_set or getattr(instance, '_cleared_pks', ()))
+
+
+@receiver(post_save, sender=Post)
+def invalidate_syndication_on_save(sender, instance, created, raw=False, **kwargs):
+    """Mark stale the sitemap chunks and feeds the post is, or was, listed in."""
+    if raw:
+        return
+    previous = getattr(instance, '_counted_state', None)
+    was_published = previous is not None and previous[0] == 'published'
+    if not was_published and instance.status != 'published':
+        return  # Drafts aren't listed anywhere
+    category_ids = {instance.category_id, previous[1] if previous else None}
+    # A new post has no tags yet; m2m_changed takes care of them.
+    tag_ids = () if created else instance.tags.values_list('pk', flat=True)
+    invalidate_sections(affected_sections([instance.pk], category_ids, tag_ids))
+
+
+@receiver(pre_delete, sender=Post)
+def invalidate_syndication_on_delete(sender, instance, **kwargs):
+    """Mark stale the sections of a published post before its tag rows cascade away."""
+    if instance.status != 'published':
+        return
+    tag_ids = instance.tags.values_list('pk', flat=True)
+    invalidate_sections(affected_sections([instance.pk], [instance.category_id], tag_ids))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_syndication_on_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Retagging changes the tag feeds and sitemaps, and the tags listed in feed items."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # Clears don't pass pk_set; update_counts_on_tags_changed captured the rows
+    pk_set = pk_set or getattr(instance, '_cleared_pks', set())
+    if not reverse:
+        if instance.status == 'published':
+            invalidate_sections(affected_sections([instance.pk], [instance.category_id], pk_set))
+        return
+    posts = Post.objects.filter(pk__in=pk_set, status='published').values_list('pk', 'category_id')
+    post_ids, category_ids = set(), set()
+    for post_id, category_id in posts:
+        post_ids.add(post_id)
+        category_ids.add(category_id)
+    if post_ids:
+        invalidate_sections(affected_sections(post_ids, category_ids, [instance.pk]))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_syndication_on_taxonomy_change(sender, **kwargs):
+    """Category and tag names appear in many feeds, and deletes reassign posts without signals."""
+    if not kwargs.get('raw'):
+        invalidate_all()
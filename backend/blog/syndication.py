@@ -0,0 +1,298 @@
+"""
+Sitemaps and RSS/Atom feeds for Neural Digital Garden.
+
+``/sitemap.xml`` is a sitemap index pointing at chunked sitemaps of the
+published posts, and of the categories and tags that have any. Each chunk
+covers a fixed primary-key range of ``SITEMAP_CHUNK_SIZE`` rows, so a post
+always lands in the same chunk and no chunk exceeds the protocol's 50,000
+URLs. Feeds of the latest ``FEED_ITEM_COUNT`` posts are served as RSS 2.0
+and Atom for the whole blog and for each category and tag.
+
+Every document belongs to a section (a sitemap chunk, or one feed) with its
+own dependency tag in the response cache. Documents are generated on the
+first request after their section changes, streamed to that client (sitemap
+chunks are written row by row from a server-side cursor) and stored, so
+later requests are served from the cache with an ETag. Changing a post
+invalidates only the sections it appears in: its sitemap chunk, the blog
+feed, the feeds and sitemap chunks of its category and tags, and the index.
+Links point at the public site (``SITE_URL``), not at the API.
+"""
+import hashlib
+import re
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+
+from core.cache import get_cache, get_tag_versions, invalidate_tags
+from .models import Category, Post, Tag
+
+DOCUMENT_KEY_PREFIX = 'syndication:doc:'
+TAG_PREFIX = 'syndication:'
+ALL_SECTIONS = 'all'  # Bumped when every document may be stale, e.g. a tag was renamed
+SITEMAP_INDEX = 'sitemap:index'
+SITEMAP_CONTENT_TYPE = 'application/xml; charset=utf-8'
+SITEMAP_SECTION_PATTERN = re.compile(r'^(posts|categories|tags)-([1-9][0-9]*)$')
+SITEMAP_PATHS = {'posts': 'SITE_POST_PATH', 'categories': 'SITE_CATEGORY_PATH', 'tags': 'SITE_TAG_PATH'}
+SITEMAP_ROWS_PER_WRITE = 500
+FEED_FORMATS = {'rss': Rss201rev2Feed, 'atom': Atom1Feed}
+
+
+def chunk_size():
+    return getattr(settings, 'SITEMAP_CHUNK_SIZE', 10000)
+
+
+def chunk_number(pk):
+    """1-based number of the sitemap chunk holding a primary key."""
+    return pk // chunk_size() + 1
+
+
+def site_url(path_setting, slug):
+    base = getattr(settings, 'SITE_URL', 'http://localhost:3000').rstrip('/')
+    return base + getattr(settings, path_setting).format(slug=quote(slug))
+
+
+def sitemap_querysets():
+    """``{kind: queryset}`` of what each kind of sitemap chunk lists, annotated with ``lastmod``.
+
+    A category or tag is listed while it has published posts, and was last
+    modified when the latest of them was.
+    """
+    published = Q(posts__status='published')
+    return {
+        'posts': Post.objects.filter(status='published').annotate(lastmod=F('updated_at')),
+        'categories': Category.objects.annotate(
+            lastmod=Max('posts__updated_at', filter=published)
+        ).filter(lastmod__isnull=False),
+        'tags': Tag.objects.annotate(lastmod=Max('posts__updated_at', filter=published)).filter(lastmod__isnull=False),
+    }
+
+
+def chunk_lastmods(kind):
+    """``(chunk number, lastmod)`` of every non-empty chunk of a kind, in one grouped query."""
+    size = chunk_size()
+    rows, key, updated = {
+        'posts': (Post.objects.filter(status='published'), 'pk', 'updated_at'),
+        'categories': (Post.objects.filter(status='published', category__isnull=False), 'category_id', 'updated_at'),
+        'tags': (Post.tags.through.objects.filter(post__status='published'), 'tag_id', 'post__updated_at'),
+    }[kind]
+    # Integer division of the key, as on PostgreSQL and SQLite
+    return [
+        (chunk + 1, lastmod) for chunk, lastmod in
+        rows.order_by().annotate(chunk=F(key) / size).values('chunk')
+        .annotate(lastmod=Max(updated)).order_by('chunk').values_list('chunk', 'lastmod')
+    ]
+
+
+def sitemap_section(kind, pk):
+    return f'sitemap:{kind}-{chunk_number(pk)}'
+
+
+def feed_section(kind, pk=None):
+    return 'feed:posts' if kind == 'posts' else f'feed:{kind}:{pk}'
+
+
+def affected_sections(post_ids, category_ids=(), tag_ids=()):
+    """Sections published posts appear in, given their current and former categories and tags."""
+    sections = {SITEMAP_INDEX, feed_section('posts')}
+    sections |= {sitemap_section('posts', post_id) for post_id in post_ids}
+    for category_id in filter(None, category_ids):
+        sections |= {sitemap_section('categories', category_id), feed_section('categories', category_id)}
+    for tag_id in tag_ids:
+        sections |= {sitemap_section('tags', tag_id), feed_section('tags', tag_id)}
+    return sections
+
+
+def invalidate_sections(sections):
+    """Mark sections stale once the current transaction commits."""
+    tags = [TAG_PREFIX + section for section in sections]
+    if tags:
+        transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+def invalidate_all():
+    invalidate_sections([ALL_SECTIONS])
+
+
+async def astream(parts):
+    """Step a sync generator from the ORM's thread, so ASGI servers stream it instead of buffering."""
+    step = sync_to_async(next)
+    while (part := await step(parts, None)) is not None:
+        yield part
+
+
+def serve_document(request, section, content_type, generate):
+    """Serve a section's document from the cache, or stream it from ``generate()`` and store it.
+
+    The cache key includes the scheme and host, because documents embed
+    absolute URLs of the API itself.
+    """
+    cache = get_cache()
+    versions = get_tag_versions([TAG_PREFIX + ALL_SECTIONS, TAG_PREFIX + section])
+    raw = '|'.join([request.build_absolute_uri(), *map(str, versions)])
+    key = DOCUMENT_KEY_PREFIX + hashlib.md5(raw.encode()).hexdigest()
+
+    hit = cache.get(key)
+    if hit is not None:
+        content, etag = hit
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type=content_type)
+            response['ETag'] = etag
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def stream():
+        parts = []
+        for part in generate():
+            part = part.encode('utf-8')
+            parts.append(part)
+            yield part
+        content = b''.join(parts)
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        cache.set(key, (content, etag), getattr(settings, 'SYNDICATION_CACHE_TIMEOUT', 24 * 60 * 60))
+
+    content = astream(stream()) if isinstance(request, ASGIRequest) else stream()
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+def _lastmod(value):
+    return f'<lastmod>{value.isoformat(timespec="seconds")}</lastmod>' if value else ''
+
+
+def generate_sitemap_index(request):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for kind in SITEMAP_PATHS:
+        for number, lastmod in chunk_lastmods(kind):
+            url = request.build_absolute_uri(reverse('sitemap-chunk', kwargs={'section': f'{kind}-{number}'}))
+            yield f'<sitemap><loc>{escape(url)}</loc>{_lastmod(lastmod)}</sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def chunk_queryset(kind, number):
+    size = chunk_size()
+    return (
+        sitemap_querysets()[kind]
+        .filter(pk__gte=(number - 1) * size, pk__lt=number * size)
+        .order_by('pk')
+        .values_list('slug', 'lastmod')
+    )
+
+
+def generate_sitemap_chunk(kind, number):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    path_setting = SITEMAP_PATHS[kind]
+    rows = []
+    for slug, lastmod in chunk_queryset(kind, number).iterator(chunk_size=2000):
+        rows.append(f'<url><loc>{escape(site_url(path_setting, slug))}</loc>{_lastmod(lastmod)}</url>\n')
+        if len(rows) == SITEMAP_ROWS_PER_WRITE:
+            yield ''.join(rows)
+            rows = []
+    rows.append('</urlset>\n')
+    yield ''.join(rows)
+
+
+def build_feed(request, feed_format, title, link, posts):
+    """Render a feed of ``posts`` (newest first) with Django's feed generator."""
+    feed = FEED_FORMATS[feed_format](
+        title=title,
+        link=link,
+        description=f'Latest posts from {title}',
+        feed_url=request.build_absolute_uri(),
+        language=getattr(settings, 'LANGUAGE_CODE', 'en-us'),
+    )
+    for post in posts:
+        url = site_url('SITE_POST_PATH', post.slug)
+        feed.add_item(
+            title=post.title,
+            link=url,
+            unique_id=url,
+            description=post.excerpt,
+            author_name=post.author.get_full_name() or post.author.get_username(),
+            pubdate=post.published_at,
+            updateddate=post.updated_at,
+            categories=[tag.name for tag in post.tags.all()],
+        )
+    return feed
+
+
+def feed_posts(**filters):
+    return (
+        Post.objects.filter(status='published', **filters)
+        .select_related('author').prefetch_related('tags')
+        .only('title', 'slug', 'excerpt', 'published_at', 'updated_at', 'author__username',
+              'author__first_name', 'author__last_name')
+        .order_by('-published_at', '-pk')[:getattr(settings, 'FEED_ITEM_COUNT', 20)]
+    )
+
+
+def sitemap_index(request):
+    """Sitemap index listing every non-empty sitemap chunk."""
+    return serve_document(request, SITEMAP_INDEX, SITEMAP_CONTENT_TYPE, lambda: generate_sitemap_index(request))
+
+
+def sitemap_chunk(request, section):
+    """One chunk of the post, category or tag sitemap, e.g. ``posts-1``."""
+    match = SITEMAP_SECTION_PATTERN.match(section)
+    if match is None:
+        raise Http404('No such sitemap.')
+    kind, number = match.group(1), int(match.group(2))
+    if not chunk_queryset(kind, number).exists():
+        raise Http404('No such sitemap.')
+    return serve_document(
+        request, f'sitemap:{section}', SITEMAP_CONTENT_TYPE, lambda: generate_sitemap_chunk(kind, number)
+    )
+
+
+def _feed_response(request, feed_format, section, title, link, posts):
+    if feed_format not in FEED_FORMATS:
+        raise Http404('Feeds are available as .rss and .atom.')
+    content_type = FEED_FORMATS[feed_format].content_type
+
+    def generate():
+        yield build_feed(request, feed_format, title, link, posts).writeString('utf-8')
+
+    return serve_document(request, section, content_type, generate)
+
+
+def posts_feed(request, feed_format):
+    """Latest published posts."""
+    site_name = getattr(settings, 'SITE_NAME', 'Neural Digital Garden')
+    link = getattr(settings, 'SITE_URL', 'http://localhost:3000').rstrip('/') + '/'
+    return _feed_response(request, feed_format, feed_section('posts'), site_name, link, feed_posts())
+
+
+def category_feed(request, slug, feed_format):
+    """Latest published posts in a category."""
+    category = Category.objects.filter(slug=slug).only('name', 'slug').first()
+    if category is None:
+        raise Http404('No such category.')
+    site_name = getattr(settings, 'SITE_NAME', 'Neural Digital Garden')
+    return _feed_response(
+        request, feed_format, feed_section('categories', category.pk), f'{site_name}: {category.name}',
+        site_url('SITE_CATEGORY_PATH', category.slug), feed_posts(category=category),
+    )
+
+
+def tag_feed(request, slug, feed_format):
+    """Latest published posts with a tag."""
+    tag = Tag.objects.filter(slug=slug).only('name', 'slug').first()
+    if tag is None:
+        raise Http404('No such tag.')
+    site_name = getattr(settings, 'SITE_NAME', 'Neural Digital Garden')
+    return _feed_response(
+        request, feed_format, feed_section('tags', tag.pk), f'{site_name}: {tag.name}',
+        site_url('SITE_TAG_PATH', tag.slug), feed_posts(tags=tag),
+    )
@@ -0,0 +1,76 @@
+"""
+Blog Celery tasks for Neural Digital Garden.
+"""
+from celery import shared_task
+
+from core.cache import invalidate_tags
+from . import analytics, leaderboard, related
+from .comment_queue import flush_comment_queue as flush_queued_comments
+from .counters import recount_post_counts
+from .rendering import render_posts, stale_post_ids
+from .view_counter import flush_view_counts as flush_buffered_view_counts
+
+
+@shared_task
+def reconcile_post_counts():
+    """Recompute stored published-post counters to repair any drift."""
+    fixed = recount_post_counts()
+    if any(fixed.values()):
+        invalidate_tags('blog.category', 'blog.tag')
+    return fixed
+
+
+@shared_task
+def flush_view_counts():
+    """Write buffered page views to Post.view_count in batches."""
+    return flush_buffered_view_counts()
+
+
+@shared_task
+def flush_comment_queue():
+    """Insert queued comment submissions in batches."""
+    return flush_queued_comments()
+
+
+@shared_task
+def refresh_leaderboards():
+    """Rebuild the cached popular-post leaderboards."""
+    boards = leaderboard.refresh_leaderboards()
+    return {name: len(board) for name, board in boards.items()}
+
+
+@shared_task
+def rollup_view_analytics():
+    """Roll hourly view buckets up into daily post, category and tag rows, then expire old ones."""
+    rolled = analytics.rollup_views()
+    return {**rolled, 'deleted': analytics.compact_views()}
+
+
+@shared_task
+def render_post_content(post_ids, force=False):
+    """Pre-render post bodies to HTML, TOC and word count, skipping unchanged ones."""
+    return render_posts(post_ids, force=force)
+
+
+@shared_task
+def render_stale_posts():
+    """Render posts whose stored HTML is older than their content, e.g. after a missed queue."""
+    return render_posts(stale_post_ids())
+
+
+@shared_task
+def rebuild_related_posts():
+    """Refit the related-posts index and recompute every post's related list."""
+    with related.index_lock() as acquired:
+        if not acquired:
+            return None  # An update or rebuild is already running
+        return related.rebuild_related_posts()
+
+
+@shared_task(bind=True, max_retries=None)
+def update_related_posts(self, post_ids):
+    """Recompute the related lists affected by changes to the given posts."""
+    with related.index_lock() as acquired:
+        if not acquired:
+            raise self.retry(countdown=10)
+        return related.update_related_posts(post_ids)
@@ -0,0 +1,260 @@
+"""
+Tests for the blog app of Neural Digital Garden.
+"""
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.db import DatabaseError, connection
+from django.db.models import Value
+from django.test import TestCase, override_settings
+from django.utils.http import http_date
+
+from core.cache import CHANGED_AT_KEY_PREFIX, get_cache
+from .comment_queue import LocalCommentQueue, flush_comment_queue, submit_comment
+from .models import Comment, Post
+from .search import HEADLINE_START, HEADLINE_STOP, InvertedIndexSearchBackend, build_snippet, escaped_headline
+from .view_counter import LocalViewBuffer
+from .views import PostViewSet
+
+
+class BlogTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create(username='editor', is_staff=True)
+
+    def create_post(self, slug='garden', **fields):
+        fields.setdefault('title', slug.title())
+        fields.setdefault('content', 'Text')
+        fields.setdefault('status', 'published')
+        return Post.objects.create(slug=slug, author=self.user, **fields)
+
+
+class ViewCountTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.post = self.create_post()
+        self.client.force_login(self.user)
+        # Flushes on every view, as a quiet process does once VIEW_COUNT_FLUSH_INTERVAL has passed
+        self.buffer = LocalViewBuffer(flush_interval=0)
+        patcher = mock.patch('blog.view_counter._buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def view(self):
+        return self.client.post('/api/blog/posts/garden/increment_view/')
+
+    def test_count_includes_views_flushed_by_the_request(self):
+        self.assertEqual(self.view().json(), {'view_count': 1})
+        self.assertEqual(self.view().json(), {'view_count': 2})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.view_count, 2)
+
+    def test_failed_flush_keeps_the_view_buffered(self):
+        with mock.patch('blog.view_counter.PostViewBucket.objects.bulk_create', side_effect=DatabaseError):
+            with self.assertLogs('blog.view_counter', 'WARNING'):
+                response = self.view()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'view_count': 1})
+        self.assertEqual(self.buffer.pending(self.post.pk), 1)
+
+        self.assertEqual(self.view().json(), {'view_count': 2})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.view_count, 2)
+        self.assertEqual(self.buffer.pending(self.post.pk), 0)
+
+
+class CommentQueueTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.post = self.create_post()
+        self.client.force_login(self.user)
+        self.queue = LocalCommentQueue(flush_interval=0)
+        patcher = mock.patch('blog.comment_queue._queue', self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def submit(self, content='Lovely garden'):
+        return self.client.post('/api/blog/comments/', {
+            'post': self.post.pk, 'author_name': 'Ada', 'author_email': 'ada@example.com', 'content': content,
+        }, content_type='application/json')
+
+    def test_comment_is_accepted_and_inserted(self):
+        response = self.submit()
+
+        self.assertEqual(response.status_code, 202)
+        comment = Comment.objects.get()
+        self.assertEqual(str(comment.submission_id), response.json()['pending_id'])
+        self.assertFalse(comment.is_approved)
+
+    def test_repeated_comment_is_rejected(self):
+        self.assertEqual(self.submit().status_code, 202)
+
+        self.assertEqual(self.submit('  LOVELY   garden ').status_code, 409)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    @override_settings(COMMENT_QUEUE_BATCH_SIZE=2)
+    def test_queued_comments_are_inserted_in_batches(self):
+        self.queue.flush_interval = 3600
+        for number in range(3):
+            submit_comment(self.post, 'Ada', 'ada@example.com', f'Comment {number}')
+        self.assertEqual(Comment.objects.count(), 0)
+
+        with mock.patch.object(Comment.objects, 'bulk_create', wraps=Comment.objects.bulk_create) as bulk_create:
+            self.assertEqual(flush_comment_queue(self.queue), 3)
+
+        self.assertEqual(bulk_create.call_count, 2)
+        self.assertEqual(sorted(Comment.objects.values_list('content', flat=True)),
+                         ['Comment 0', 'Comment 1', 'Comment 2'])
+        self.assertEqual(len(self.queue), 0)
+
+    def test_failed_flush_keeps_the_comment_queued_once(self):
+        with mock.patch('blog.comment_queue.insert_comments', side_effect=DatabaseError):
+            with self.assertLogs('blog.comment_queue', 'WARNING'):
+                self.assertEqual(self.submit().status_code, 202)
+        self.assertEqual(len(self.queue), 1)
+
+        # A retry isn't queued a second time
+        self.assertEqual(self.submit().status_code, 409)
+        flush_comment_queue(self.queue)
+        self.assertEqual(Comment.objects.count(), 1)
+
+
+class SearchTests(BlogTestCase):
+    body = '<script>alert("garden")</script> <img src=x onerror=alert(1)> A garden & its paths'
+
+    def setUp(self):
+        super().setUp()
+        self.post = self.create_post(title='Notes', content=self.body)
+        self.create_post(slug='other', title='Other', content='More garden paths')
+
+    def assert_safe(self, snippet):
+        self.assertNotIn('<script', snippet)
+        self.assertNotIn('<img', snippet)
+        self.assertIn('&lt;script&gt;', snippet)
+        self.assertIn('<mark>garden</mark>', snippet)
+
+    def search(self):
+        results = self.client.get('/api/blog/posts/', {'q': 'garden'}).json()['results']
+        return {result['slug']: result['snippet'] for result in results}
+
+    @skipUnless(connection.vendor != 'postgresql', 'PostgreSQL uses ts_headline')
+    def test_fallback_snippets_are_escaped(self):
+        self.assert_safe(self.search()['garden'])
+        self.assertEqual(build_snippet(self.body, ['garden']), self.search()['garden'])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Needs PostgreSQL full-text search')
+    def test_postgres_headlines_are_escaped(self):
+        self.assert_safe(self.search()['garden'])
+
+    def test_headline_is_escaped_around_its_marks(self):
+        headline = f'<script>{HEADLINE_START}garden{HEADLINE_STOP}</script> & "its" \'paths\''
+        escaped = Post.objects.annotate(snippet=escaped_headline(Value(headline))).values_list('snippet', flat=True)
+
+        self.assertEqual(
+            escaped[0],
+            '&lt;script&gt;<mark>garden</mark>&lt;/script&gt; &amp; &quot;its&quot; &#x27;paths&#x27;',
+        )
+
+    def test_results_skip_posts_removed_after_scoring(self):
+        queryset = Post.objects.filter(status='published')
+        results = InvertedIndexSearchBackend().search(queryset, 'garden')
+        self.assertEqual(len(results), 2)
+        Post.objects.filter(slug='other').update(status='draft')
+
+        self.assertEqual([post.slug for post in results[0:2]], ['garden'])
+        self.assertEqual(results[-2].slug, 'garden')
+        with self.assertRaises(IndexError):
+            results[-1]
+        with self.assertRaises(IndexError):
+            results[2]
+
+
+class PaginationTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)  # Staff see the drafts, which have no published_at
+        published = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        newer = datetime(2024, 2, 1, tzinfo=dt_timezone.utc)
+        posts = [
+            self.create_post(slug=f'post-{number}', published_at=published if number < 5 else newer)
+            for number in range(7)
+        ]
+        drafts = [self.create_post(slug=f'draft-{number}', status='draft') for number in range(3)]
+        Post.objects.filter(status='draft').update(published_at=None)
+        # Newest first, ties and then the drafts by id, newest first
+        self.expected = [post.slug for post in posts[:4:-1] + posts[4::-1] + drafts[::-1]]
+
+    def walk(self, url, link):
+        slugs, pages = [], []
+        while url:
+            page = self.client.get(url).json()
+            pages.append([post['slug'] for post in page['results']])
+            slugs += pages[-1]
+            url = page[link]
+        return slugs, pages
+
+    def test_pages_cover_ties_and_nulls_in_both_directions(self):
+        slugs, pages = self.walk('/api/blog/posts/?page_size=3', 'next')
+        self.assertEqual(slugs, self.expected)
+        self.assertEqual(len(pages), 4)
+
+        last = self.client.get('/api/blog/posts/?page_size=3').json()
+        while last['next']:
+            last = self.client.get(last['next']).json()
+        _, back = self.walk(last['previous'], 'previous')
+        self.assertEqual(back, pages[-2::-1])
+        for page in back:
+            self.assertEqual(len(page), 3)
+
+    def test_ascending_pages_start_with_the_oldest(self):
+        slugs, _ = self.walk('/api/blog/posts/?page_size=2&ordering=published_at', 'next')
+        expected = [f'post-{number}' for number in range(7)] + [f'draft-{number}' for number in range(3)]
+        self.assertEqual(slugs, expected)
+
+
+class ConditionalGetTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_post(slug='older')
+        self.create_post(slug='newer')
+        # Everything last changed a while ago, so a change now moves Last-Modified on
+        earlier = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        Post.objects.update(updated_at=earlier)
+        get_cache().set_many(
+            {CHANGED_AT_KEY_PREFIX + tag: earlier.timestamp() for tag in PostViewSet.cache_tags}, timeout=None
+        )
+        self.earlier = http_date(earlier.timestamp())
+
+    def assert_not_modified_since(self, path):
+        self.assertEqual(self.client.get(path)['Last-Modified'], self.earlier)
+        self.assertEqual(self.client.get(path, HTTP_IF_MODIFIED_SINCE=self.earlier).status_code, 304)
+
+    def test_deleting_a_post_moves_the_list_last_modified(self):
+        self.assert_not_modified_since('/api/blog/posts/')
+
+        Post.objects.get(slug='older').delete()
+
+        response = self.client.get('/api/blog/posts/', HTTP_IF_MODIFIED_SINCE=self.earlier)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post['slug'] for post in response.json()['results']], ['newer'])
+
+    def test_new_comment_moves_the_detail_last_modified(self):
+        self.assert_not_modified_since('/api/blog/posts/older/')
+
+        Comment.objects.create(
+            post=Post.objects.get(slug='older'), author_name='Ada', author_email='ada@example.com',
+            content='Hi', is_approved=True,
+        )
+
+        response = self.client.get('/api/blog/posts/older/', HTTP_IF_MODIFIED_SINCE=self.earlier)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['comment_count'], 1)
+
+    def test_views_without_tags_only_send_an_etag(self):
+        response = self.client.get('/api/blog/comments/')
+
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(self.client.get('/api/blog/comments/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
@@ -0,0 +1,40 @@
+"""
+Blog throttles for Neural Digital Garden.
+"""
+import hashlib
+
+from core.throttling import TokenBucketThrottle
+
+
+class CommentSubmissionThrottle(TokenBucketThrottle):
+    """Throttles comment submissions (POSTs) only; reading comments is never limited."""
+
+    def get_cache_key(self, request, view):
+        if request.method != 'POST':
+            return None
+        ident = self.get_submitter(request)
+        if not ident:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def get_submitter(self, request):
+        raise NotImplementedError
+
+
+class CommentIPThrottle(CommentSubmissionThrottle):
+    """Comment submissions per client IP address."""
+    scope = 'comment_ip'
+
+    def get_submitter(self, request):
+        return self.get_ident(request)
+
+
+class CommentEmailThrottle(CommentSubmissionThrottle):
+    """Comment submissions per author email, however many addresses they come from."""
+    scope = 'comment_email'
+
+    def get_submitter(self, request):
+        email = request.data.get('author_email') if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return hashlib.sha256(email.strip().lower().encode()).hexdigest()
@@ -0,0 +1,166 @@
+"""
+Write-behind view counters for Neural Digital Garden.
+
+Page views are accumulated in a buffer and applied to ``Post.view_count`` in
+batches with atomic ``F()`` updates, instead of one read-modify-write save
+per request. With ``REDIS_URL`` configured the buffer is a Redis hash shared
+by every web process and drained by the ``blog.tasks.flush_view_counts``
+Celery task; otherwise each process keeps its own in-memory buffer and
+flushes it itself every ``VIEW_COUNT_FLUSH_INTERVAL`` seconds.
+"""
+import atexit
+import logging
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.replicas import background_writes
+from .models import Post, PostViewBucket
+
+logger = logging.getLogger(__name__)
+
+
+class LocalViewBuffer:
+    """In-process view buffer, flushed inline once the interval has elapsed."""
+
+    def __init__(self, flush_interval):
+        self.flush_interval = flush_interval
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def increment(self, post_id, amount=1):
+        with self._lock:
+            self._pending[post_id] += amount
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            # Other visitors' views: flushing them mustn't pin this client to the primary
+            with background_writes():
+                try:
+                    flush_view_counts(self)
+                except DatabaseError as exc:
+                    # The views went back into the buffer, so this one is still recorded
+                    logger.warning('Could not flush view counts (%s); retrying on the next flush', exc)
+
+    def pending(self, post_id):
+        return self._pending.get(post_id, 0)
+
+    def pending_many(self, post_ids):
+        return {post_id: self._pending.get(post_id, 0) for post_id in post_ids}
+
+    def drain(self):
+        with self._lock:
+            snapshot = dict(self._pending)
+            self._pending.clear()
+            self._last_flush = time.monotonic()
+        return snapshot
+
+    def restore(self, snapshot):
+        with self._lock:
+            self._pending.update(snapshot)
+
+
+class RedisViewBuffer:
+    """View buffer kept in a Redis hash, shared by all processes."""
+    key = 'blog:view_counts'
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def increment(self, post_id, amount=1):
+        self.client.hincrby(self.key, post_id, amount)
+
+    def pending(self, post_id):
+        return int(self.client.hget(self.key, post_id) or 0)
+
+    def pending_many(self, post_ids):
+        post_ids = list(post_ids)
+        if not post_ids:
+            return {}
+        values = self.client.hmget(self.key, post_ids)
+        return {post_id: int(value or 0) for post_id, value in zip(post_ids, values)}
+
+    def drain(self):
+        # Renaming the hash is atomic, so increments that arrive while the
+        # snapshot is being applied land in a fresh hash and are not lost.
+        import redis
+
+        flushing_key = f'{self.key}:flushing:{uuid.uuid4().hex}'
+        try:
+            self.client.rename(self.key, flushing_key)
+        except redis.ResponseError:
+            return {}  # Nothing buffered
+        pipe = self.client.pipeline()
+        pipe.hgetall(flushing_key)
+        pipe.delete(flushing_key)
+        values, _ = pipe.execute()
+        return {int(post_id): int(count) for post_id, count in values.items()}
+
+    def restore(self, snapshot):
+        pipe = self.client.pipeline()
+        for post_id, count in snapshot.items():
+            pipe.hincrby(self.key, post_id, count)
+        pipe.execute()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_view_buffer():
+    """Return the process-wide view buffer, creating it on first use."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                redis_url = getattr(settings, 'REDIS_URL', None)
+                if redis_url:
+                    _buffer = RedisViewBuffer(redis_url)
+                else:
+                    _buffer = LocalViewBuffer(getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 10))
+                    atexit.register(flush_view_counts, _buffer)
+    return _buffer
+
+
+def flush_view_counts(buffer=None):
+    """Apply buffered views to the database and return how many were written.
+
+    Posts are grouped by their pending delta so each distinct delta costs a
+    single ``UPDATE ... SET view_count = view_count + n WHERE id IN (...)``.
+    The same deltas are added to the current hour's ``PostViewBucket`` rows,
+    which feed the leaderboards. If the write fails the snapshot is put back
+    for the next flush.
+    """
+    buffer = buffer or get_view_buffer()
+    snapshot = buffer.drain()
+    if not snapshot:
+        return 0
+
+    by_delta = defaultdict(list)
+    for post_id, delta in snapshot.items():
+        if delta:
+            by_delta[delta].append(post_id)
+
+    hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+    try:
+        with transaction.atomic():
+            existing = set(Post.objects.filter(pk__in=snapshot.keys()).values_list('pk', flat=True))
+            PostViewBucket.objects.bulk_create(
+                [PostViewBucket(post_id=post_id, hour=hour) for post_id in existing],
+                ignore_conflicts=True,
+            )
+            for delta, post_ids in by_delta.items():
+                Post.objects.filter(pk__in=post_ids).update(view_count=F('view_count') + delta)
+                PostViewBucket.objects.filter(post_id__in=post_ids, hour=hour).update(views=F('views') + delta)
+    except Exception:
+        buffer.restore(snapshot)
+        raise
+    return sum(snapshot.values())
@@ -3,49 +3,118 @@ Blog API views for Neural Digital Garden.
 """
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
 
-from .models import Category, Tag, Post, Comment
+from core.cache import CachedResponseMixin
+from core.conditional import ConditionalGetMixin
+from core.fieldsets import SparseFieldsetMixin, ValuesListMixin
+from .analytics import parse_series_params, view_series
+from .comment_queue import DuplicateComment, submit_comment
+from .comment_tree import CommentTree, max_comment_depth
+from .filters import RankedSearchFilter
+from .importer import PostImporter, iter_jsonl
+from .leaderboard import LEADERBOARDS, popular_post_ids
+from .models import Category, Tag, Post, Comment, CategoryViewDay, PostViewBucket, PostViewDay, TagViewDay
+from .pagination import CommentCursorPagination, CommentThreadPagination, PostCursorPagination
+from .parsers import JSONLinesParser
 from .serializers import (
     CategorySerializer,
     TagSerializer,
     PostListSerializer,
+    PostListValuesSerializer,
+    PostSearchResultSerializer,
     PostDetailSerializer,
     PostCreateUpdateSerializer,
     CommentSerializer
 )
+from .throttling import CommentEmailThrottle, CommentIPThrottle
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+def queue_comment(data):
+    """Queue a validated comment; 202 with its pending ID, or 409 for a repeat."""
+    try:
+        pending_id = submit_comment(
+            data['post'], data['author_name'], data['author_email'], data['content'],
+            parent=data.get('parent'), is_approved=data.get('is_approved', False),
+        )
+    except DuplicateComment as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_409_CONFLICT)
+    return Response({'pending_id': pending_id, 'status': 'pending'}, status=status.HTTP_202_ACCEPTED)
+
+
+def view_series_response(request, daily, hourly=None):
+    """Views over time from the analytics rollups (?interval=hour|day, ?since=, ?until=)."""
+    try:
+        interval, since, until = parse_series_params(
+            request.query_params, intervals=('hour', 'day') if hourly is not None else ('day',)
+        )
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(view_series(hourly if interval == 'hour' else daily, interval, since, until))
+
+
+class CategoryViewSet(CachedResponseMixin, SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for Category model."""
+    cache_tags = ('blog.category', 'blog.post', 'blog.categoryviewday')
+    cache_actions = ('list', 'retrieve', 'views')
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     lookup_field = 'slug'
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'description']
 
+    @action(detail=True, methods=['get'])
+    def views(self, request, slug=None):
+        """Get daily views of the category's posts (?since=, ?until=)."""
+        category = self.get_object()
+        return view_series_response(request, CategoryViewDay.objects.filter(category=category))
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+
+class TagViewSet(CachedResponseMixin, SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for Tag model."""
+    cache_tags = ('blog.tag', 'blog.post', 'blog.tagviewday')
+    cache_actions = ('list', 'retrieve', 'views')
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     lookup_field = 'slug'
     filter_backends = [filters.SearchFilter]
     search_fields = ['name']
 
+    @action(detail=True, methods=['get'])
+    def views(self, request, slug=None):
+        """Get daily views of the posts with this tag (?since=, ?until=)."""
+        tag = self.get_object()
+        return view_series_response(request, TagViewDay.objects.filter(tag=tag))
+
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(
+    ConditionalGetMixin, CachedResponseMixin, SparseFieldsetMixin, ValuesListMixin, viewsets.ModelViewSet
+):
     """ViewSet for Post model."""
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    values_serializer_class = PostListValuesSerializer
+    lookup_field = 'slug'
+    cache_tags = ('blog.post', 'blog.category', 'blog.tag', 'blog.comment', 'blog.relatedpost', 'blog.postviewday')
+    cache_actions = ('list', 'retrieve', 'featured', 'popular', 'related', 'views')
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, RankedSearchFilter]
     filterset_fields = ['status', 'category', 'tags', 'is_featured']
     search_fields = ['title', 'excerpt', 'content']
-    ordering_fields = ['created_at', 'updated_at', 'published_at', 'view_count']
+    # Only keys with a keyset index; the most viewed posts come from popular/
+    ordering_fields = ['published_at', 'created_at']
     ordering = ['-published_at', '-created_at']
 
+    @property
+    def pagination_class(self):
+        """Relevance-ranked search results can't be keyset paginated."""
+        if self.action == 'list' and self.request.query_params.get(RankedSearchFilter.search_param, '').strip():
+            return PageNumberPagination
+        return PostCursorPagination
+
     def get_queryset(self):
         """Get filtered queryset based on user permissions."""
         queryset = Post.objects.select_related('author', 'category').prefetch_related('tags')
@@ -58,12 +127,16 @@ class PostViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(
                 Q(status='published') | Q(author=self.request.user)
             )
-        
+
+        if self.action in ('list', 'featured', 'popular', 'related'):
+            queryset = queryset.with_comment_counts()
         return queryset
 
     def get_serializer_class(self):
         """Get appropriate serializer based on action."""
         if self.action == 'list':
+            if self.request.query_params.get(RankedSearchFilter.search_param, '').strip():
+                return PostSearchResultSerializer
             return PostListSerializer
         elif self.action in ['create', 'update', 'partial_update']:
             return PostCreateUpdateSerializer
@@ -82,41 +155,120 @@ class PostViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def popular(self, request):
-        """Get popular posts by view count."""
-        popular_posts = self.get_queryset().filter(status='published').order_by('-view_count')[:10]
-        serializer = PostListSerializer(popular_posts, many=True)
+        """Get popular posts from a precomputed leaderboard (?window=trending|24h|7d|all)."""
+        window = request.query_params.get('window', 'trending')
+        if window not in LEADERBOARDS:
+            return Response(
+                {'detail': f'window must be one of: {", ".join(LEADERBOARDS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        post_ids = popular_post_ids(window)
+        posts = self.get_queryset().filter(status='published').in_bulk(post_ids)
+        popular_posts = [posts[post_id] for post_id in post_ids if post_id in posts]
+        serializer = PostListSerializer(popular_posts, many=True, context=self.get_serializer_context())
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def related(self, request, slug=None):
+        """Get the most similar published posts, precomputed by blog.related."""
+        post = self.get_object()
+        related_posts = (
+            self.get_queryset()
+            .filter(status='published', related_to_entries__post=post)
+            .order_by('related_to_entries__rank')
+        )
+        serializer = PostListSerializer(related_posts, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def views(self, request, slug=None):
+        """Get hourly or daily views of a post (?interval=hour|day, ?since=, ?until=)."""
+        post = self.get_object()
+        return view_series_response(
+            request, PostViewDay.objects.filter(post=post), hourly=PostViewBucket.objects.filter(post=post)
+        )
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='import',
+        permission_classes=[IsAdminUser],
+        parser_classes=[JSONLinesParser, JSONParser],
+    )
+    def bulk_import(self, request):
+        """Bulk-import posts from a JSON array or a JSON Lines (application/x-ndjson) body."""
+        try:
+            batch_size = int(request.query_params.get('batch_size', 500))
+        except ValueError:
+            return Response({'detail': 'batch_size must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = request.data
+        if isinstance(data, list):
+            records = enumerate(data, start=1)
+        elif isinstance(data, dict):
+            return Response(
+                {'detail': 'Expected a JSON array or JSON Lines body.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        else:
+            records = iter_jsonl(data)
+
+        result = PostImporter(request.user, batch_size=batch_size).run(records)
+        response_status = status.HTTP_201_CREATED if result.created else status.HTTP_200_OK
+        return Response(result.as_dict(), status=response_status)
+
     @action(detail=True, methods=['post'])
     def increment_view(self, request, slug=None):
         """Increment view count for a post."""
         post = self.get_object()
         post.increment_view_count()
-        return Response({'view_count': post.view_count})
+        return Response({'view_count': post.live_view_count})
 
-    @action(detail=True, methods=['get', 'post'])
+    @action(detail=True, methods=['get', 'post'], throttle_classes=[CommentIPThrottle, CommentEmailThrottle])
     def comments(self, request, slug=None):
         """Get or create comments for a post."""
         post = self.get_object()
         
         if request.method == 'GET':
-            comments = post.comments.filter(is_approved=True, parent=None)
-            serializer = CommentSerializer(comments, many=True)
-            return Response(serializer.data)
+            # Top-level threads (or replies to ?parent=) are paginated; nested
+            # replies are loaded in one query and cut off at ?depth= levels.
+            try:
+                parent = int(request.query_params['parent']) if 'parent' in request.query_params else None
+                depth = int(request.query_params.get('depth', max_comment_depth()))
+            except ValueError:
+                return Response(
+                    {'detail': 'parent and depth must be integers.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            comments = post.comments.filter(is_approved=True, parent=parent)
+            paginator = CommentThreadPagination()
+            # No view: ?ordering= on this viewset refers to posts, not comments
+            page = paginator.paginate_queryset(comments, request)
+            context = {
+                **self.get_serializer_context(),
+                'comment_tree': CommentTree(page, max_depth=depth),
+                'comment_depth': 0,
+            }
+            serializer = CommentSerializer(page, many=True, context=context)
+            return paginator.get_paginated_response(serializer.data)
         
         elif request.method == 'POST':
             serializer = CommentSerializer(data=request.data)
             if serializer.is_valid():
-                serializer.save(post=post, is_approved=False)  # Comments need approval
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
+                # Comments need approval
+                return queue_comment({**serializer.validated_data, 'post': post, 'is_approved': False})
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for Comment model."""
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = CommentCursorPagination
+    throttle_classes = [CommentIPThrottle, CommentEmailThrottle]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['post', 'parent', 'is_approved']
 
@@ -135,11 +287,8 @@ class CommentViewSet(viewsets.ModelViewSet):
         
         return queryset
 
-    def perform_create(self, serializer):
-        """Set post when creating a comment."""
-        post_id = self.request.data.get('post')
-        if post_id:
-            post = Post.objects.get(id=post_id)
-            serializer.save(post=post)
-        else:
-            serializer.save()
+    def create(self, request, *args, **kwargs):
+        """Validate a comment and queue it for insertion."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return queue_comment(serializer.validated_data)
@@ -1 +1,346 @@
-["s.strip() for s in v.split(',')])\n\n\n# Application definition\n\nINSTALLED_APPS = [\n    'django.contrib.admin',\n    'django.contrib.auth',\n    'django.contrib.contenttypes',\n    'django.contrib.sessions',\n    'django.contrib.messages',\n    'django.contrib.staticfiles',\n    'rest_framework',\n    'corsheaders',\n    'blog',\n    'interests',\n]\n\nMIDDLEWARE = [\n    'django.middleware.security.SecurityMiddleware',\n    'corsheaders.middleware.CorsMiddleware',\n    'django.contrib.sessions.middleware.SessionMiddleware',\n    'django.middleware.common.CommonMiddleware',\n    'django.middleware.csrf.CsrfViewMiddleware',\n    'django.contrib.auth.middleware.AuthenticationMiddleware',\n    'django.contrib.messages.middleware.MessageMiddleware',\n    'django.middleware.clickjacking.XFrameOptionsMiddleware',\n]\n\nROOT_URLCONF = 'config.urls'\n\nTEMPLATES = [\n    {\n        'BACKEND': 'django.template.backends.django.DjangoTemplates',\n        'DIRS': [],\n        'APP_DIRS': True,\n        'OPTIONS': {\n            'context_processors': [\n                'django.template.context_processors.debug',\n                'django.template.context_processors.request',\n                'django.contrib.auth.context_processors.auth',\n                'django.contrib.messages.context_processors.messages',\n            ],\n        },\n    },\n]\n\nWSGI_APPLICATION = 'config.wsgi.application'\n\n\n# Database\n# https://docs.djangoproject.com/en/5.2/ref/settings/#databases\n\nDATABASES = {\n    'default': {\n        'ENGINE': 'django.db.backends.sqlite3',\n        'NAME': BASE_DIR / 'db.sqlite3',\n    }\n}\n\n\n# Password validation\n# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators\n\nAUTH_PASSWORD_VALIDATORS = [\n    {\n        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',\n    },\n    {\n        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',\n    },\n    {\n        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',\n    },\n    {\n        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',\n    },\n]\n\n\n# Internationalization\n# https://docs.djangoproject.com/en/5.2/topics/i18n/\n\nLANGUAGE_CODE = 'en-us'\n\nTIME_ZONE = 'UTC'\n\nUSE_I18N = True\n\nUSE_TZ = True\n\n\n# Static files (CSS, JavaScript, Images)\n# https://docs.djangoproject.com/en/5.2/howto/static-files/\n\nSTATIC_URL = '/static/'\nSTATIC_ROOT = BASE_DIR / 'staticfiles'\n\n# Media files\nMEDIA_URL = '/media/'\nMEDIA_ROOT = BASE_DIR / 'media'\n\n\n# Default primary key field type\n# https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field\n\nDEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'\n\n\n# REST Framework settings\nREST_FRAMEWORK = {\n    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',\n    'PAGE_SIZE': 10,\n    'DEFAULT_RENDERER_CLASSES': [\n        'rest_framework.renderers.JSONRenderer',\n    ],\n    'DEFAULT_PARSER_CLASSES': [\n        'rest_framework.parsers.JSONParser',\n    ],\n}\n\n\n# CORS settings\nCORS_ALLOWED_ORIGINS = [\n    \"http://localhost:3000", "http://127.0.0.1:3000"]
\ No newline at end of file
+"""
+Django settings for Neural Digital Garden project.
+"""
+import sys
+from pathlib import Path
+
+import environ
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+env = environ.Env(
+    DEBUG=(bool, False),
+)
+environ.Env.read_env(BASE_DIR / '.env')
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
+
+SECRET_KEY = env('SECRET_KEY', default='django-insecure-change-me')
+
+DEBUG = env('DEBUG')
+
+# Running under `manage.py test`
+TESTING = sys.argv[1:2] == ['test']
+
+ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', default=['localhost', '127.0.0.1'])
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'rest_framework',
+    'corsheaders',
+    'core',
+    'blog',
+    'interests',
+    'github',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'core.instrumentation.RequestMetricsMiddleware',
+    'core.replicas.ReplicaRoutingMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'config.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'config.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    }
+}
+
+# Read replicas (see core/replicas.py); public API reads are spread across them
+DATABASE_REPLICAS = []
+for index, url in enumerate(env.list('DATABASE_REPLICA_URLS', default=[]), start=1):
+    alias = f'replica{index}'
+    DATABASES[alias] = {**env.db_url_config(url), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(alias)
+
+if TESTING:
+    # core/tests.py turns routing on against a separate replica with rows of its own
+    DATABASES = {
+        'default': DATABASES['default'],
+        'replica1': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'replica1.sqlite3'},
+    }
+    DATABASE_REPLICAS = []
+
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+REPLICA_READ_APPS = ('blog', 'interests')
+# Clients that write read from the primary for this long, covering replica lag
+REPLICA_PIN_SECONDS = env.int('REPLICA_PIN_SECONDS', default=5)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Redis backs the cache and shared buffers; leave unset to keep them in-process
+REDIS_URL = env('REDIS_URL', default=None)
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds a cached API response may live; edits invalidate it immediately
+RESPONSE_CACHE_TIMEOUT = 300
+
+
+# Password validation
+# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.2/howto/static-files/
+
+STATIC_URL = '/static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Media files
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Responsive image variants (see core/images.py)
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 960, 1280)
+IMAGE_DERIVATIVE_QUALITY = 80
+
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# REST Framework settings
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'PAGE_SIZE': 10,
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+    ],
+    # Token buckets for comment submissions (see blog/throttling.py): burst/refill period
+    'DEFAULT_THROTTLE_RATES': {
+        'comment_ip': env('COMMENT_RATE_PER_IP', default='5/min'),
+        'comment_email': env('COMMENT_RATE_PER_EMAIL', default='3/min'),
+    },
+}
+
+
+# Blog settings
+COMMENT_TREE_MAX_DEPTH = 5
+COMMENT_THREADS_PAGE_SIZE = 20
+COMMENT_THREADS_MAX_PAGE_SIZE = 100
+
+# Seconds between flushes of the in-process view counter buffer
+VIEW_COUNT_FLUSH_INTERVAL = 10
+
+# Queued comment submissions (see blog/comment_queue.py)
+COMMENT_QUEUE_BATCH_SIZE = 500
+# Seconds between flushes of the in-process queue; 0 inserts each comment right away
+COMMENT_QUEUE_FLUSH_INTERVAL = 0
+# Identical text on the same post within this many seconds is rejected
+COMMENT_DUPLICATE_WINDOW = 10 * 60
+
+# Admin changelists (see core/admin.py) count results exactly up to this many rows, then estimate
+ADMIN_EXACT_COUNT_LIMIT = 10000
+
+# Popular-post leaderboards
+LEADERBOARD_SIZE = 10
+TRENDING_HALF_LIFE_HOURS = 24
+
+# View analytics rollups (see blog/analytics.py)
+# Hourly buckets are kept at least as long as the leaderboards look back
+ANALYTICS_HOURLY_RETENTION_DAYS = 14
+ANALYTICS_DAILY_RETENTION_DAYS = 2 * 365
+
+# Related posts (see blog/related.py)
+RELATED_POSTS_COUNT = 5
+# Terms in more than this share of posts are too common to relate posts
+RELATED_MAX_DF = 0.5
+# Fitted TF-IDF index, reused by incremental updates (Celery workers need write access)
+RELATED_INDEX_PATH = env('RELATED_INDEX_PATH', default=str(BASE_DIR / 'var' / 'related_index.npz'))
+
+# Sitemaps and feeds (see blog/syndication.py) link to the public site, not the API
+SITE_URL = env('SITE_URL', default='http://localhost:3000')
+SITE_NAME = 'Neural Digital Garden'
+SITE_POST_PATH = '/blog/{slug}'
+SITE_CATEGORY_PATH = '/blog?category={slug}'
+SITE_TAG_PATH = '/blog?tag={slug}'
+# Primary-key range per sitemap file; the sitemap protocol allows at most 50,000 URLs
+SITEMAP_CHUNK_SIZE = 10000
+FEED_ITEM_COUNT = 20
+SYNDICATION_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Serve hot public reads with async views (see core/async_views.py); on by default under ASGI
+ASYNC_READ_VIEWS = env.bool('ASYNC_READ_VIEWS', default=False)
+
+# Homepage (/api/home/) settings
+HOME_FEATURED_POSTS = 5
+HOME_SECTION_SIZE = 20
+
+# GitHub mirror (see github/sync.py)
+GITHUB_USERNAME = env('GITHUB_USERNAME', default='')
+GITHUB_TOKEN = env('GITHUB_TOKEN', default='')
+GITHUB_GRAPHQL_URL = env('GITHUB_GRAPHQL_URL', default='https://api.github.com/graphql')
+GITHUB_FETCH_INTERVAL = 60 * 60
+GITHUB_MAX_FETCH_INTERVAL = 24 * 60 * 60
+
+# Static JSON snapshots (see core/snapshots.py); exports are disabled while unset
+SNAPSHOT_ROOT = env('SNAPSHOT_ROOT', default=None)
+SNAPSHOT_BASE_URL = env('SNAPSHOT_BASE_URL', default='http://localhost:8000')
+SNAPSHOT_EXPORT_DELAY = 30
+
+
+# Per-request SQL and timing metrics (see core/instrumentation.py)
+SERVER_TIMING_HEADER = env.bool('SERVER_TIMING_HEADER', default=True)
+REQUEST_METRICS_SAMPLE_RATE = env.float('REQUEST_METRICS_SAMPLE_RATE', default=0.01)
+N_PLUS_ONE_THRESHOLD = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.instrumentation': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+
+# CORS settings
+CORS_ALLOWED_ORIGINS = env.list('CORS_ALLOWED_ORIGINS', default=[
+    'http://localhost:3000',
+    'http://127.0.0.1:3000',
+])
+
+
+# Celery settings
+CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = env('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
+CELERY_TIMEZONE = TIME_ZONE
+# Run tasks inline instead of on a worker; on by default in development and tests, where there may be no Redis
+CELERY_TASK_ALWAYS_EAGER = env.bool('CELERY_TASK_ALWAYS_EAGER', default=DEBUG or TESTING)
+# Give up quickly when the broker is down; core.enqueue logs it and the beat tasks catch up
+CELERY_BROKER_TRANSPORT_OPTIONS = {'max_retries': 1}
+
+CELERY_BEAT_SCHEDULE = {
+    'reconcile-post-counts': {
+        'task': 'blog.tasks.reconcile_post_counts',
+        'schedule': 60 * 60,
+    },
+    'flush-view-counts': {
+        'task': 'blog.tasks.flush_view_counts',
+        'schedule': 10,
+    },
+    'flush-comment-queue': {
+        'task': 'blog.tasks.flush_comment_queue',
+        'schedule': 5,
+    },
+    'refresh-leaderboards': {
+        'task': 'blog.tasks.refresh_leaderboards',
+        'schedule': 5 * 60,
+    },
+    'rollup-view-analytics': {
+        'task': 'blog.tasks.rollup_view_analytics',
+        'schedule': 15 * 60,
+    },
+    'sync-github-profile': {
+        'task': 'github.tasks.sync_github_profile',
+        'schedule': 15 * 60,
+    },
+    'render-stale-posts': {
+        'task': 'blog.tasks.render_stale_posts',
+        'schedule': 60 * 60,
+    },
+    'rebuild-related-posts': {
+        'task': 'blog.tasks.rebuild_related_posts',
+        'schedule': 24 * 60 * 60,
+    },
+    'refresh-image-derivatives': {
+        'task': 'core.tasks.refresh_image_derivatives',
+        'schedule': 60 * 60,
+    },
+    'export-static-snapshots': {
+        'task': 'core.tasks.export_static_snapshots',
+        'schedule': 60 * 60,
+    },
+}
@@ -6,10 +6,20 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from blog import syndication
+from core.views import HomeViewSet
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/home/', HomeViewSet.as_view({'get': 'list'}), name='home'),
     path('api/blog/', include('blog.urls')),
     path('api/interests/', include('interests.urls')),
+    path('api/github/', include('github.urls')),
+    path('sitemap.xml', syndication.sitemap_index, name='sitemap-index'),
+    path('sitemaps/<str:section>.xml', syndication.sitemap_chunk, name='sitemap-chunk'),
+    path('feeds/posts.<str:feed_format>', syndication.posts_feed, name='feed-posts'),
+    path('feeds/categories/<slug:slug>.<str:feed_format>', syndication.category_feed, name='feed-category'),
+    path('feeds/tags/<slug:slug>.<str:feed_format>', syndication.tag_feed, name='feed-tag'),
 ]
 
 # Serve media files in development
@@ -0,0 +1,4 @@
+"""
+Core application for Neural Digital Garden.
+"""
+default_app_config = 'core.apps.CoreConfig'
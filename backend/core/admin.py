@@ -0,0 +1,90 @@
+"""
+Admin changelist helpers for Neural Digital Garden.
+
+Django's changelist counts the filtered rows with ``COUNT(*)`` to paginate,
+counts the whole table again for the "N total" link, and loads every column
+of every listed row. On tables with millions of rows the counts alone take
+seconds. ``ScalableAdminMixin`` pages with ``EstimatedCountPaginator``, skips
+the second count, and defers the heavy columns a changelist never shows.
+"""
+import json
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def exact_count_limit():
+    return getattr(settings, 'ADMIN_EXACT_COUNT_LIMIT', 10000)
+
+
+def estimate_count(queryset):
+    """The query planner's estimate of a queryset's row count, or None where there is none.
+
+    Only PostgreSQL exposes one: ``pg_class.reltuples`` for a whole table,
+    the top plan node's row estimate (from ``EXPLAIN``) for a filtered
+    queryset. Both are only as fresh as the table's last ``ANALYZE``.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    queryset = queryset.order_by()
+    with connection.cursor() as cursor:
+        if not queryset.query.where and not queryset.query.distinct:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            return row[0] if row and row[0] >= 0 else None  # -1 until the table is analyzed
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that trusts the planner's row estimate for large results.
+
+    Results the planner puts at or under ``ADMIN_EXACT_COUNT_LIMIT`` rows are
+    counted exactly, so small filtered lists stay accurate; above it the page
+    count is approximate, and the last page may come up short or empty.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list) if hasattr(self.object_list, 'query') else None
+        if estimate is None or estimate <= exact_count_limit():
+            return Paginator.count.func(self)
+        return estimate
+
+
+class ScalableChangeList(ChangeList):
+    """ChangeList that leaves out the admin's ``changelist_defer`` columns."""
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.defer(*self.model_admin.changelist_defer)
+
+
+class ScalableAdminMixin:
+    """Changelist settings for tables too large to count or load in full.
+
+    Set ``changelist_defer`` to the columns the list doesn't display (long
+    text, JSON). Pair with ``list_select_related`` or annotations in
+    ``get_queryset`` so no column costs a query per row, and with indexes
+    behind every ``list_filter`` and the default ``ordering``.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Facet counts aggregate over every matching row, whatever the indexes
+    show_facets = admin.ShowFacets.NEVER
+    changelist_defer = ()
+
+    def get_changelist(self, request, **kwargs):
+        return ScalableChangeList
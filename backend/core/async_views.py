@@ -0,0 +1,195 @@
+"""
+Async read views for Neural Digital Garden.
+
+Under ASGI the hot public GET endpoints are served by async views that use
+Django's async ORM, so a slow client or a slow query doesn't tie up a worker
+thread. Each async view wraps one action of an existing viewset: it reuses
+the viewset's queryset, filters, serializers, pagination, response cache and
+conditional GET handling, and produces the same responses.
+
+Requests the async path doesn't cover are handed to the viewset's own sync
+view, so behaviour never differs. That includes writes, authenticated
+requests, query parameters outside ``query_params``, and anything that would
+end in an error response.
+
+Async views are mounted over the router's URLs by ``async_read_patterns``
+when ``ASYNC_READ_VIEWS`` is on, which ``config/asgi.py`` does by default.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.urls import re_path
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .cache import amay_store_response, get_cache
+from .pagination import apaginate_queryset
+from .replicas import is_pinned
+
+
+class AsyncReadView:
+    """Serves anonymous GETs of one viewset action asynchronously."""
+    action = None
+    query_params = frozenset()  # Parameters the async path understands
+
+    def __init__(self, request, fallback, kwargs):
+        self.request = request
+        self.fallback = fallback
+        self.kwargs = kwargs
+        self.view = fallback.cls(
+            request=Request(request), action=self.action, args=(), kwargs=kwargs, format_kwarg=None,
+            **fallback.initkwargs,
+        )
+
+    @classmethod
+    def as_view(cls, fallback):
+        """Wrap ``fallback``, the viewset view the router built for the same URL."""
+        async def view(request, *args, **kwargs):
+            return await cls(request, fallback, kwargs).dispatch()
+
+        view.csrf_exempt = True  # As for any DRF view; the fallback enforces CSRF itself
+        view.cls = fallback.cls
+        view.actions = fallback.actions
+        return view
+
+    async def supports(self):
+        """Whether the async path can answer this request exactly as the viewset would."""
+        request = self.request
+        if request.method != 'GET' or set(request.GET) - set(self.query_params):
+            return False
+        if 'HTTP_AUTHORIZATION' in request.META:
+            return False  # DRF may authenticate it even though Django doesn't
+        if not hasattr(request, 'auser'):
+            return True  # No AuthenticationMiddleware (e.g. snapshot rendering): anonymous
+        user = await request.auser()
+        return not user.is_authenticated
+
+    async def dispatch(self):
+        if not await self.supports():
+            return await self.run_fallback()
+        try:
+            return await self.respond()
+        except (APIException, Http404):
+            # e.g. a malformed cursor: the viewset turns it into the right error response
+            return await self.run_fallback()
+
+    async def respond(self):
+        view = self.view
+        validator = None
+        if self.action in getattr(view, 'conditional_actions', ()):
+            validator = await view.aget_validator(**self.kwargs)
+        if validator is not None:
+            etag, timestamp = await view.aget_validators(view.request, *validator)
+            not_modified = get_conditional_response(self.request, etag=etag, last_modified=timestamp)
+            if not_modified is not None:
+                return not_modified
+
+        response = await self.cached_response()
+        if response is None:
+            return await self.run_fallback()
+        if validator is not None and response.status_code == 200:
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    async def cached_response(self):
+        view = self.view
+        if self.action not in getattr(view, 'cache_actions', ()) or is_pinned(self.request):
+            return await self.render()
+
+        cache = get_cache()
+        key = await view.aget_response_cache_key(view.request)
+        hit = await cache.aget(key)
+        if hit is not None:
+            content, content_type = hit
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = await self.render()
+        if response is not None:
+            if await amay_store_response(view.cache_tags):
+                timeout = view.cache_timeout or getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+                await cache.aset(key, (response.content, response['Content-Type']), timeout)
+            response['X-Cache'] = 'MISS'
+        return response
+
+    async def render(self):
+        data = await self.get_data()
+        if data is None:
+            return None
+        response = HttpResponse(JSONRenderer().render(data), content_type='application/json')
+        response['Allow'] = ', '.join(self.allowed_methods())
+        return response
+
+    def allowed_methods(self):
+        actions = self.fallback.actions
+        return [
+            method.upper() for method in self.view.http_method_names
+            if method in actions or method == 'options' or (method == 'head' and 'get' in actions)
+        ]
+
+    async def run_fallback(self):
+        return await sync_to_async(self.fallback)(self.request, **self.kwargs)
+
+    async def get_data(self):
+        """The response data, or None to let the sync view answer instead."""
+        raise NotImplementedError
+
+
+class AsyncListView(AsyncReadView):
+    """List action served through the viewset's ``values_serializer_class`` fast path."""
+    action = 'list'
+
+    async def get_data(self):
+        view = self.view
+        values_serializer = view.get_values_serializer()
+        if values_serializer is None:
+            return None
+        rows = values_serializer.values(view.filter_queryset(view.get_queryset()))
+        paginator = view.paginator
+        if paginator is None:
+            return await values_serializer.aserialize([row async for row in rows])
+        page = await apaginate_queryset(paginator, rows, view.request, view=view)
+        if page is None:
+            return None
+        return paginator.get_paginated_response(await values_serializer.aserialize(page)).data
+
+
+class AsyncDetailView(AsyncReadView):
+    """Retrieve action for viewsets whose serializer needs nothing beyond the row."""
+    action = 'retrieve'
+
+    def get_object_queryset(self):
+        view = self.view
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        queryset = view.filter_queryset(view.get_queryset())
+        return queryset.filter(**{view.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+    async def get_data(self):
+        instance = await self.get_object_queryset().afirst()
+        if instance is None:
+            return None  # The viewset answers with its usual 404
+        return self.view.get_serializer(instance).data
+
+
+def async_read_patterns(router, views):
+    """URL patterns serving ``views`` (``{route name: AsyncReadView subclass}``) over ``router``'s URLs.
+
+    Patterns keep the router's regexes and order and are unnamed, so
+    ``reverse()`` is unaffected; format-suffixed URLs stay with the viewsets.
+    Routes without an async view keep their place too, so a list action such
+    as ``posts/import/`` isn't taken for a detail lookup.
+    """
+    patterns = []
+    for pattern in router.urls:
+        regex = pattern.pattern.regex.pattern
+        if pattern.name in views and 'format' not in pattern.pattern.regex.groupindex:
+            patterns.append(re_path(regex, views[pattern.name].as_view(pattern.callback)))
+        else:
+            patterns.append(re_path(regex, pattern.callback))
+    return patterns
@@ -0,0 +1,396 @@
+"""
+Endpoint benchmarks and query budgets for Neural Digital Garden.
+
+``python manage.py benchmark`` seeds a throwaway test database with a
+synthetic dataset (posts with tags and threaded comments, interests and
+projects) at one or more scales, then requests every route registered by the
+blog and interests apps, plus the homepage, through the full middleware
+stack. For each request it records latency percentiles and the number of SQL
+queries.
+
+Each endpoint declares a query budget in ``ENDPOINTS``. Budgets do not depend
+on the scale, so an N+1 shows up as a budget overrun as soon as the dataset
+grows. A route that no endpoint covers is reported too. Responses are measured
+cold: the response cache is cleared before every request. Write requests run
+inside a transaction that is rolled back, so every iteration sees the same
+data.
+"""
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from itertools import islice
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+
+from blog.counters import recount_post_counts
+from blog.models import Category, Comment, Post, Tag
+from blog.related import rebuild_related_posts
+from blog.rendering import render_posts
+from blog.search import get_search_backend
+from interests.models import Interest, Project, index_technologies
+from .cache import get_cache
+
+SCALES = {'small': 100, 'medium': 10_000, 'large': 100_000}
+BENCHMARK_NAMESPACES = ('blog', 'interests')
+BENCHMARK_ROUTES = ('home', 'sitemap-index', 'sitemap-chunk', 'feed-posts', 'feed-category', 'feed-tag')  # Un-namespaced routes to cover as well
+LATENCY_NOISE_FLOOR_MS = 2.0  # Smaller p95 differences never count as regressions
+
+WORDS = (
+    'neural garden graph memory signal synapse pattern network thought idea seed '
+    'root branch leaf growth light data model vector field signal layer drift '
+    'echo orbit pulse lattice bloom spore canopy river stone archive index'
+).split()
+TECHNOLOGIES = ['Python', 'Django', 'React', 'TypeScript', 'Three.js', 'PostgreSQL', 'Redis', 'Rust']
+
+
+@dataclass
+class Endpoint:
+    """One request exercised by the benchmark.
+
+    ``kwargs`` maps URL keyword arguments to keys of the sample objects picked
+    after seeding; ``params`` and ``body`` values may contain ``{key}``
+    placeholders for the same samples.
+    """
+    route: str
+    method: str
+    query_budget: int
+    kwargs: dict = field(default_factory=dict)
+    params: dict = field(default_factory=dict)
+    body: object = None
+    staff: bool = False
+
+    @property
+    def name(self):
+        query = '?' + '&'.join(f'{name}={value}' for name, value in self.params.items()) if self.params else ''
+        return f'{self.method.upper()} {self.route}{query}'
+
+    def url(self, sample):
+        path = reverse(self.route, kwargs={name: sample[key] for name, key in self.kwargs.items()})
+        params = {name: str(value).format(**sample) for name, value in self.params.items()}
+        return f'{path}?{urlencode(params)}' if params else path
+
+    def data(self, sample):
+        return _fill(self.body, sample)
+
+
+def _fill(value, sample):
+    if isinstance(value, str):
+        return value.format(**sample)
+    if isinstance(value, dict):
+        return {key: _fill(item, sample) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fill(item, sample) for item in value]
+    return value
+
+
+POST = {'slug': 'post_slug'}
+COMMENT = {'pk': 'comment_pk'}
+NEW_POST = {
+    'title': 'Benchmark draft', 'slug': 'benchmark-draft', 'content': '## Draft\n\nSome *text*.',
+    'status': 'published', 'category': '{category_id}', 'tags': ['{tag_name}', 'benchmark-new-tag'],
+}
+NEW_COMMENT = {'post': '{post_id}', 'author_name': 'Bench', 'author_email': 'bench@example.com', 'content': 'Hi'}
+NEW_INTEREST = {'title': 'Benchmark interest', 'description': 'Benchmark'}
+NEW_PROJECT = {'title': 'Benchmark project', 'description': 'Benchmark', 'short_description': 'Benchmark'}
+
+ENDPOINTS = [
+    Endpoint('home', 'get', 5),
+    Endpoint('sitemap-index', 'get', 3),
+    Endpoint('sitemap-chunk', 'get', 2, kwargs={'section': 'sitemap_section'}),
+    Endpoint('feed-posts', 'get', 2, kwargs={'feed_format': 'feed_format'}),
+    Endpoint('feed-category', 'get', 3, kwargs={'slug': 'category_slug', 'feed_format': 'feed_format'}),
+    Endpoint('feed-tag', 'get', 3, kwargs={'slug': 'tag_slug', 'feed_format': 'feed_format'}),
+    Endpoint('blog:api-root', 'get', 0),
+    Endpoint('blog:category-list', 'get', 2),
+    Endpoint('blog:category-detail', 'get', 1, kwargs={'slug': 'category_slug'}),
+    Endpoint('blog:category-views', 'get', 2, kwargs={'slug': 'category_slug'}),
+    Endpoint('blog:tag-list', 'get', 2),
+    Endpoint('blog:tag-detail', 'get', 1, kwargs={'slug': 'tag_slug'}),
+    Endpoint('blog:tag-views', 'get', 2, kwargs={'slug': 'tag_slug'}),
+    Endpoint('blog:post-list', 'get', 3),
+    Endpoint('blog:post-list', 'get', 3, params={'ordering': '-view_count'}),
+    Endpoint('blog:post-list', 'get', 5, params={'category': '{category_id}'}),
+    Endpoint('blog:post-list', 'get', 5, params={'tags': '{tag_id}'}),
+    Endpoint('blog:post-list', 'get', 2, params={'fields': 'id,title,slug,comment_count'}),
+    Endpoint('blog:post-list', 'get', 3, params={'expand': 'category'}),
+    Endpoint('blog:post-list', 'get', 8, params={'q': '{search_term}'}),
+    Endpoint('blog:post-list', 'post', 15, body=NEW_POST, staff=True),
+    Endpoint('blog:post-bulk-import', 'post', 20, body=[NEW_POST], staff=True),
+    Endpoint('blog:post-featured', 'get', 2),
+    Endpoint('blog:post-popular', 'get', 4),
+    Endpoint('blog:post-detail', 'get', 6, kwargs=POST),
+    Endpoint('blog:post-detail', 'put', 21, kwargs=POST, body=NEW_POST, staff=True),
+    Endpoint('blog:post-detail', 'patch', 10, kwargs=POST, body={'title': 'Renamed'}, staff=True),
+    Endpoint('blog:post-detail', 'delete', 18, kwargs=POST, staff=True),
+    Endpoint('blog:post-related', 'get', 4, kwargs=POST),
+    Endpoint('blog:post-views', 'get', 3, kwargs=POST),
+    Endpoint('blog:post-views', 'get', 3, kwargs=POST, params={'interval': 'hour'}),
+    Endpoint('blog:post-comments', 'get', 4, kwargs=POST),
+    Endpoint('blog:post-comments', 'post', 8, kwargs=POST, body=NEW_COMMENT, staff=True),
+    Endpoint('blog:post-increment-view', 'post', 4, kwargs=POST, staff=True),
+    Endpoint('blog:comment-list', 'get', 3),
+    Endpoint('blog:comment-list', 'post', 6, body=NEW_COMMENT, staff=True),
+    Endpoint('blog:comment-detail', 'get', 3, kwargs=COMMENT),
+    Endpoint('blog:comment-detail', 'put', 6, kwargs=COMMENT, body=NEW_COMMENT, staff=True),
+    Endpoint('blog:comment-detail', 'patch', 5, kwargs=COMMENT, body={'content': 'Edited'}, staff=True),
+    Endpoint('blog:comment-detail', 'delete', 12, kwargs=COMMENT, staff=True),
+    Endpoint('interests:api-root', 'get', 0),
+    Endpoint('interests:interest-list', 'get', 3),
+    Endpoint('interests:interest-list', 'post', 1, body=NEW_INTEREST),
+    Endpoint('interests:interest-detail', 'get', 2, kwargs={'slug': 'interest_slug'}),
+    Endpoint('interests:interest-detail', 'put', 2, kwargs={'slug': 'interest_slug'}, body=NEW_INTEREST),
+    Endpoint('interests:interest-detail', 'patch', 2, kwargs={'slug': 'interest_slug'}, body={'order': 1}),
+    Endpoint('interests:interest-detail', 'delete', 2, kwargs={'slug': 'interest_slug'}),
+    Endpoint('interests:project-list', 'get', 3),
+    Endpoint('interests:project-list', 'get', 3, params={'technology': '{technology}'}),
+    Endpoint('interests:project-list', 'post', 1, body=NEW_PROJECT),
+    Endpoint('interests:project-technologies', 'get', 1),
+    Endpoint('interests:project-technologies', 'get', 1, params={'status': 'active'}),
+    Endpoint('interests:project-detail', 'get', 2, kwargs={'slug': 'project_slug'}),
+    Endpoint('interests:project-detail', 'put', 2, kwargs={'slug': 'project_slug'}, body=NEW_PROJECT),
+    Endpoint('interests:project-detail', 'patch', 2, kwargs={'slug': 'project_slug'}, body={'progress': 50}),
+    Endpoint('interests:project-detail', 'delete', 3, kwargs={'slug': 'project_slug'}),
+]
+
+
+def registered_routes():
+    """``(route, method)`` pairs served by the benchmarked apps."""
+    routes = set()
+
+    def walk(patterns, namespace=None):
+        for pattern in patterns:
+            if hasattr(pattern, 'url_patterns'):
+                walk(pattern.url_patterns, pattern.namespace or namespace)
+                continue
+            if pattern.name is None:
+                continue  # e.g. async overlays of routes that are listed under their names
+            if namespace in BENCHMARK_NAMESPACES:
+                route = f'{namespace}:{pattern.name}'
+            elif namespace is None and pattern.name in BENCHMARK_ROUTES:
+                route = pattern.name
+            else:
+                continue
+            actions = getattr(pattern.callback, 'actions', None) or {'get': None}
+            routes.update((route, method) for method in actions)
+
+    walk(get_resolver().url_patterns)
+    return routes
+
+
+def uncovered_routes(endpoints=ENDPOINTS):
+    covered = {(endpoint.route, endpoint.method) for endpoint in endpoints}
+    return sorted(registered_routes() - covered)
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def _content(rng):
+    sections = []
+    for _ in range(rng.randint(2, 4)):
+        sections.append(f'## {_text(rng, 3).title()}\n\n{_text(rng, rng.randint(60, 160))}.')
+    return '\n\n'.join(sections)
+
+
+def _create_comments(rng, post_ids):
+    """Up to four threads per post, each with replies up to three levels deep."""
+    level = [
+        Comment(
+            post_id=post_id, author_name=_text(rng, 1).title(), author_email='reader@example.com',
+            content=_text(rng, rng.randint(5, 30)), is_approved=rng.random() < 0.9,
+        )
+        for post_id in post_ids for _ in range(rng.randint(0, 4))
+    ]
+    depth = 0
+    while level:
+        created = Comment.objects.bulk_create(level)
+        depth += 1
+        if depth > 3:
+            break
+        level = [
+            Comment(
+                post_id=parent.post_id, parent_id=parent.pk, thread_id=parent.thread_id or parent.pk,
+                depth=depth, author_name=_text(rng, 1).title(), author_email='reader@example.com',
+                content=_text(rng, rng.randint(5, 30)), is_approved=rng.random() < 0.9,
+            )
+            for parent in created for _ in range(rng.choice((0, 0, 1, 2)))
+        ]
+
+
+def seed_dataset(posts, seed=0, batch_size=1000):
+    """Fill an empty database with ``posts`` synthetic posts and related rows."""
+    rng = random.Random(seed)
+    now = timezone.now()
+    author = User.objects.create_user('benchmark', 'benchmark@example.com', 'benchmark', is_staff=True)
+
+    categories = Category.objects.bulk_create(
+        Category(name=f'Category {i}', slug=f'category-{i}', description=_text(rng, 12))
+        for i in range(max(5, posts // 1000))
+    )
+    tags = Tag.objects.bulk_create(
+        Tag(name=f'{rng.choice(WORDS)}-{i}', slug=f'tag-{i}') for i in range(min(500, max(20, posts // 100)))
+    )
+
+    search = get_search_backend()
+    Through = Post.tags.through
+    for start in range(0, posts, batch_size):
+        batch = []
+        for i in range(start, min(start + batch_size, posts)):
+            status = 'published' if rng.random() < 0.9 else rng.choice(('draft', 'archived'))
+            batch.append(Post(
+                title=f'{_text(rng, 4).title()} {i}', slug=f'benchmark-post-{i}', author=author,
+                category=rng.choice(categories) if rng.random() < 0.95 else None,
+                excerpt=_text(rng, 20), content=_content(rng), status=status,
+                is_featured=rng.random() < 0.02, reading_time=rng.randint(1, 12),
+                view_count=int(rng.paretovariate(1.2) * 10),
+                published_at=now - timedelta(minutes=posts - i) if status == 'published' else None,
+            ))
+        created = Post.objects.bulk_create(batch)
+        post_ids = [post.pk for post in created]
+        Through.objects.bulk_create(
+            Through(post_id=post_id, tag_id=tag.pk)
+            for post_id in post_ids for tag in rng.sample(tags, rng.randint(0, 4))
+        )
+        _create_comments(rng, post_ids)
+        search.index_posts(post_ids)
+    recount_post_counts()
+    rebuild_related_posts()
+
+    Interest.objects.bulk_create(
+        Interest(title=f'Interest {i}', slug=f'interest-{i}', description=_text(rng, 30), order=i)
+        for i in range(50)
+    )
+    Project.objects.bulk_create(
+        Project(
+            title=f'Project {i}', slug=f'project-{i}', description=_text(rng, 40),
+            short_description=_text(rng, 10), progress=rng.randint(0, 100), order=i,
+            technologies=rng.sample(TECHNOLOGIES, rng.randint(1, 4)), is_featured=rng.random() < 0.2,
+        )
+        for i in range(30)
+    )
+    index_technologies(Project.objects.only('technologies'))
+    return author
+
+
+def pick_sample(seed=0):
+    """The objects detail endpoints are benchmarked against.
+
+    The published post with the most comments stands in for a popular post.
+    """
+    post = (
+        Post.objects.filter(status='published', category__isnull=False)
+        .annotate(comment_total=Count('comments')).order_by('-comment_total', 'pk').first()
+    )
+    render_posts([post.pk], force=True)
+    tag = Tag.objects.order_by('-post_count', 'pk').first()
+    return {
+        'post_slug': post.slug,
+        'post_id': post.pk,
+        'comment_pk': post.comments.filter(parent=None).order_by('pk').values_list('pk', flat=True).first(),
+        'category_id': post.category_id,
+        'category_slug': post.category.slug,
+        'tag_id': tag.pk,
+        'tag_name': tag.name,
+        'tag_slug': tag.slug,
+        'search_term': random.Random(seed).choice(WORDS),
+        'sitemap_section': 'posts-1',
+        'feed_format': 'rss',
+        'interest_slug': Interest.objects.order_by('pk').values_list('slug', flat=True).first(),
+        'project_slug': Project.objects.order_by('pk').values_list('slug', flat=True).first(),
+        'technology': TECHNOLOGIES[0],
+    }
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def measure(endpoint, sample, clients, iterations):
+    """Time ``iterations`` cold requests to one endpoint.
+
+    Returns ``{'status', 'queries', 'p50', 'p95', 'p99'}`` with latencies in
+    milliseconds and the largest query count seen.
+    """
+    client = clients['staff' if endpoint.staff else 'anonymous']
+    url = endpoint.url(sample)
+    data = endpoint.data(sample)
+    body = json.dumps(data) if data is not None else None
+    cache = get_cache()
+
+    timings, queries, status = [], 0, None
+    for iteration in range(iterations + 1):  # The first run warms up imports and connections
+        cache.clear()
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.generic(endpoint.method.upper(), url, body or '', content_type='application/json')
+                if response.streaming:
+                    b''.join(response.streaming_content)  # Streamed bodies are generated as they're read
+                elapsed = (time.perf_counter() - started) * 1000
+            transaction.set_rollback(True)
+        status = response.status_code
+        if iteration:
+            timings.append(elapsed)
+            queries = max(queries, len(captured.captured_queries))
+    return {
+        'status': status,
+        'queries': queries,
+        'p50': round(percentile(timings, 0.50), 3),
+        'p95': round(percentile(timings, 0.95), 3),
+        'p99': round(percentile(timings, 0.99), 3),
+    }
+
+
+def run_benchmark(scale, iterations=20, endpoints=ENDPOINTS, seed=0):
+    """Seed the current (empty) database at ``scale`` and measure every endpoint."""
+    author = seed_dataset(SCALES[scale], seed=seed)
+    sample = pick_sample(seed)
+    staff = Client()
+    staff.force_login(author)
+    clients = {'anonymous': Client(), 'staff': staff}
+    return {endpoint.name: measure(endpoint, sample, clients, iterations) for endpoint in endpoints}
+
+
+def check_results(results, endpoints=ENDPOINTS, baseline=None, latency_threshold=0.25):
+    """Return a list of failure messages for one scale's results.
+
+    An endpoint fails when it answers with an error, goes over its query
+    budget, or, given a ``baseline`` from an earlier run, its p95 latency grew
+    by more than ``latency_threshold`` (and by more than the noise floor).
+    """
+    failures = []
+    for endpoint in endpoints:
+        result = results.get(endpoint.name)
+        if result is None:
+            continue
+        if result['status'] >= 400:
+            failures.append(f'{endpoint.name}: HTTP {result["status"]}')
+        if result['queries'] > endpoint.query_budget:
+            failures.append(f'{endpoint.name}: {result["queries"]} queries (budget {endpoint.query_budget})')
+        previous = (baseline or {}).get(endpoint.name)
+        if previous:
+            limit = max(previous['p95'] * (1 + latency_threshold), previous['p95'] + LATENCY_NOISE_FLOOR_MS)
+            if result['p95'] > limit:
+                failures.append(
+                    f'{endpoint.name}: p95 {result["p95"]:.1f} ms (baseline {previous["p95"]:.1f} ms)'
+                )
+    return failures
@@ -0,0 +1,222 @@
+"""
+Tag-invalidated response cache for Neural Digital Garden.
+
+Rendered GET responses are stored under a key built from the request path,
+query string, the kind of user asking, and the current version of every
+dependency tag the view declares. Saving or deleting a model bumps the
+version of its tag (``'<app_label>.<model_name>'``), so every cached
+response that depends on it stops matching at once; the stale entries
+simply expire. Works with any Django cache backend that supports ``incr``
+(locmem in development and tests, Redis in production).
+
+With read replicas (``core.replicas``), a response read from a replica just
+after a change may predate it, so none is stored for ``REPLICA_PIN_SECONDS``
+after one of its tags was invalidated. Clients pinned to the primary bypass
+the cache entirely and always see their own writes.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.http import HttpResponse
+
+from .replicas import get_replicas, is_pinned, pin_seconds, read_from_replica
+
+TAG_KEY_PREFIX = 'respcache:tag:'
+CHANGED_KEY_PREFIX = 'respcache:changed:'
+CHANGED_AT_KEY_PREFIX = 'respcache:changed_at:'
+RESPONSE_KEY_PREFIX = 'respcache:resp:'
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def model_tag(model):
+    """Return the dependency tag for a model class or instance."""
+    return model._meta.label_lower
+
+
+def get_tag_versions(tags):
+    """Return the current version of each tag, initialising unknown tags."""
+    cache = get_cache()
+    keys = [TAG_KEY_PREFIX + tag for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # A fresh, never-before-used version so an evicted tag can't
+            # resurrect responses cached under an older one.
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+async def aget_tag_versions(tags):
+    """Async counterpart of ``get_tag_versions``."""
+    cache = get_cache()
+    keys = [TAG_KEY_PREFIX + tag for tag in tags]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            versions[key] = await cache.aget(key)
+    return [versions[key] for key in keys]
+
+
+def get_tags_changed_at(tags):
+    """Return the Unix time any of the tags last changed.
+
+    Tags with no recorded change (new, or evicted) count as changed now, so a
+    lost record can only make a client refetch.
+    """
+    cache = get_cache()
+    keys = [CHANGED_AT_KEY_PREFIX + tag for tag in tags]
+    changed = cache.get_many(keys)
+    for key in keys:
+        if key not in changed:
+            cache.add(key, time.time(), timeout=None)
+            changed[key] = cache.get(key)
+    return max(changed.values())
+
+
+async def aget_tags_changed_at(tags):
+    """Async counterpart of ``get_tags_changed_at``."""
+    cache = get_cache()
+    keys = [CHANGED_AT_KEY_PREFIX + tag for tag in tags]
+    changed = await cache.aget_many(keys)
+    for key in keys:
+        if key not in changed:
+            await cache.aadd(key, time.time(), timeout=None)
+            changed[key] = await cache.aget(key)
+    return max(changed.values())
+
+
+def invalidate_tags(*tags):
+    """Bump the version of each tag, orphaning every response cached under it."""
+    cache = get_cache()
+    for tag in tags:
+        key = TAG_KEY_PREFIX + tag
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+    cache.set_many({CHANGED_AT_KEY_PREFIX + tag: time.time() for tag in tags}, timeout=None)
+    if get_replicas():
+        # Marks the window in which replicas may still serve the old rows
+        cache.set_many({CHANGED_KEY_PREFIX + tag: True for tag in tags}, timeout=pin_seconds())
+
+
+def may_store_response(tags):
+    """Whether a response the current request built from ``tags`` may be cached."""
+    if not read_from_replica():
+        return True
+    return not get_cache().get_many([CHANGED_KEY_PREFIX + tag for tag in tags])
+
+
+async def amay_store_response(tags):
+    """Async counterpart of ``may_store_response``."""
+    if not read_from_replica():
+        return True
+    return not await get_cache().aget_many([CHANGED_KEY_PREFIX + tag for tag in tags])
+
+
+def _invalidate_sender(sender, **kwargs):
+    invalidate_tags(model_tag(sender))
+
+
+def _m2m_invalidator(tag):
+    def handler(sender, action, **kwargs):
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_tags(tag)
+    return handler
+
+
+def invalidate_on_change(*models, m2m=()):
+    """Invalidate each model's tag whenever one of its rows is saved or deleted.
+
+    ``m2m`` maps auto-created through models to the model whose tag their
+    changes should invalidate.
+    """
+    for model in models:
+        uid = f'respcache:{model_tag(model)}'
+        post_save.connect(_invalidate_sender, sender=model, dispatch_uid=uid)
+        post_delete.connect(_invalidate_sender, sender=model, dispatch_uid=uid)
+    for through, owner in dict(m2m).items():
+        m2m_changed.connect(
+            _m2m_invalidator(model_tag(owner)),
+            sender=through, weak=False, dispatch_uid=f'respcache:{model_tag(through)}',
+        )
+
+
+def user_class(user):
+    """Coarse cache partition for the requesting user."""
+    if not user or not user.is_authenticated:
+        return 'anon'
+    if user.is_staff:
+        return 'staff'
+    return f'user:{user.pk}'
+
+
+class CachedResponseMixin:
+    """Serve GET actions of a viewset from the response cache.
+
+    Set ``cache_tags`` to the model tags the responses depend on and
+    ``cache_actions`` to the actions that may be cached. Only 200 responses
+    are stored; cache state is reported in an ``X-Cache`` header. Views whose
+    output is the same for everyone can set ``cache_per_user = False`` to
+    share one entry between all users. Clients pinned to the primary
+    database are answered by the view itself.
+    """
+    cache_tags = ()
+    cache_actions = ('list', 'retrieve')
+    cache_timeout = None
+    cache_per_user = True
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method == 'GET' and self.action in self.cache_actions and not is_pinned(request):
+            # dispatch() looks the handler up after initial(), so wrapping it
+            # here runs the cache lookup with authentication already done.
+            self.get = self._cached_handler(self.get)
+
+    def get_response_cache_key(self, request, versions=None):
+        if versions is None:
+            versions = get_tag_versions(self.cache_tags)
+        raw = '|'.join([
+            request.path,
+            request.META.get('QUERY_STRING', ''),
+            user_class(request.user) if self.cache_per_user else 'all',
+            ','.join(str(version) for version in versions),
+        ])
+        return RESPONSE_KEY_PREFIX + hashlib.md5(raw.encode()).hexdigest()
+
+    async def aget_response_cache_key(self, request):
+        return self.get_response_cache_key(request, versions=await aget_tag_versions(self.cache_tags))
+
+    def _cached_handler(self, handler):
+        def cached(request, *args, **kwargs):
+            cache = get_cache()
+            key = self.get_response_cache_key(request)
+            hit = cache.get(key)
+            if hit is not None:
+                content, content_type = hit
+                response = HttpResponse(content, content_type=content_type)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            response = handler(request, *args, **kwargs)
+            if (
+                response.status_code == 200 and hasattr(response, 'add_post_render_callback')
+                and may_store_response(self.cache_tags)
+            ):
+                timeout = self.cache_timeout or getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+                def store(rendered):
+                    cache.set(key, (rendered.content, rendered['Content-Type']), timeout)
+
+                response.add_post_render_callback(store)
+            response['X-Cache'] = 'MISS'
+            return response
+        return cached
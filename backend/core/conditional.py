@@ -0,0 +1,140 @@
+"""
+Conditional GET support for Neural Digital Garden.
+
+Validators are computed with a single aggregate query against the model's
+``updated_at`` column, without serializing anything: the newest timestamp
+plus the row count for lists, the row's own timestamp for details. Repeat
+requests carrying a matching ``If-None-Match`` or ``If-Modified-Since``
+header get an empty 304.
+
+``updated_at`` alone misses deletions and changes to related rows, so
+``Last-Modified`` is the later of it and the last change to any of the
+view's ``cache_tags``. Views without tags send only an ETag.
+"""
+import hashlib
+
+from django.db.models import Count, Max, QuerySet
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import aget_tag_versions, aget_tags_changed_at, get_tag_versions, get_tags_changed_at, user_class
+
+
+class ConditionalGetMixin:
+    """Answer conditional GETs on list and detail actions with 304 Not Modified.
+
+    The ETag also folds in the path and query string, the user class, and the
+    versions of the view's ``cache_tags`` (if any), so changes to related
+    models embedded in the payload invalidate it too.
+    """
+    conditional_actions = ('list', 'retrieve')
+    last_modified_field = 'updated_at'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method == 'GET' and self.action in self.conditional_actions:
+            self.get = self._conditional_handler(self.get)
+
+    def filter_queryset(self, queryset):
+        """Reuse the queryset the validator filtered for this request, so filters (and searches) run once."""
+        filtered = getattr(self, '_validated_queryset', None)
+        if filtered is not None:
+            return filtered
+        return super().filter_queryset(queryset)
+
+    def get_validator(self, **kwargs):
+        """Return ``(last_modified, row_count)`` for the request, or None to skip."""
+        queryset = self._validated_queryset = self.filter_queryset(self.get_queryset())
+        if not isinstance(queryset, QuerySet):
+            return None  # e.g. ranked search results
+
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            last_modified = (
+                queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+                .values_list(self.last_modified_field, flat=True)
+                .first()
+            )
+            return None if last_modified is None else (last_modified, 1)
+
+        stats = queryset.order_by().aggregate(
+            last_modified=Max(self.last_modified_field), count=Count('pk')
+        )
+        return stats['last_modified'], stats['count']
+
+    async def aget_validator(self, **kwargs):
+        """Async counterpart of ``get_validator``."""
+        queryset = self._validated_queryset = self.filter_queryset(self.get_queryset())
+        if not isinstance(queryset, QuerySet):
+            return None
+
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            last_modified = await (
+                queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+                .values_list(self.last_modified_field, flat=True)
+                .afirst()
+            )
+            return None if last_modified is None else (last_modified, 1)
+
+        stats = await queryset.order_by().aaggregate(
+            last_modified=Max(self.last_modified_field), count=Count('pk')
+        )
+        return stats['last_modified'], stats['count']
+
+    def get_etag(self, request, last_modified, count, versions=None):
+        if versions is None:
+            versions = get_tag_versions(getattr(self, 'cache_tags', ()))
+        raw = '|'.join([
+            last_modified.isoformat() if last_modified else '',
+            str(count),
+            request.path,
+            request.META.get('QUERY_STRING', ''),
+            user_class(request.user),
+            ','.join(str(version) for version in versions),
+        ])
+        return f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+    async def aget_etag(self, request, last_modified, count):
+        versions = await aget_tag_versions(getattr(self, 'cache_tags', ()))
+        return self.get_etag(request, last_modified, count, versions=versions)
+
+    def get_last_modified(self, last_modified, tags_changed_at):
+        """Unix time for ``Last-Modified``, or None when the view has no tags to cover other changes."""
+        if tags_changed_at is None:
+            return None
+        if last_modified is not None:
+            tags_changed_at = max(tags_changed_at, last_modified.timestamp())
+        return int(tags_changed_at)
+
+    def get_validators(self, request, last_modified, count):
+        """Return the ETag and ``Last-Modified`` time (or None) for a validator."""
+        tags = getattr(self, 'cache_tags', ())
+        tags_changed_at = get_tags_changed_at(tags) if tags else None
+        return self.get_etag(request, last_modified, count), self.get_last_modified(last_modified, tags_changed_at)
+
+    async def aget_validators(self, request, last_modified, count):
+        """Async counterpart of ``get_validators``."""
+        tags = getattr(self, 'cache_tags', ())
+        tags_changed_at = await aget_tags_changed_at(tags) if tags else None
+        etag = await self.aget_etag(request, last_modified, count)
+        return etag, self.get_last_modified(last_modified, tags_changed_at)
+
+    def _conditional_handler(self, handler):
+        def conditional(request, *args, **kwargs):
+            validator = self.get_validator(**kwargs)
+            if validator is None:
+                return handler(request, *args, **kwargs)
+
+            etag, timestamp = self.get_validators(request, *validator)
+            not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if not_modified is not None:
+                return not_modified
+
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200:
+                response['ETag'] = etag
+                if timestamp is not None:
+                    response['Last-Modified'] = http_date(timestamp)
+            return response
+        return conditional
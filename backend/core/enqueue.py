@@ -0,0 +1,34 @@
+"""
+Task queueing for Neural Digital Garden.
+
+Work queued while handling a request (rendering a post, resizing an image,
+refreshing related posts, exporting snapshots) only derives data from rows
+that are already saved, and a periodic task catches up on any of it that
+was missed. So a broker outage must not fail the request: ``enqueue`` logs
+the error and returns, and the backstop does the work later.
+"""
+import logging
+
+from django.db import transaction
+from kombu.exceptions import OperationalError
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(task, *args, **options):
+    """Send ``task`` with ``args``; return whether it was sent.
+
+    Results are ignored, so sending never waits on the result backend.
+    """
+    options.setdefault('ignore_result', True)
+    try:
+        task.apply_async(args, **options)
+    except (OperationalError, OSError) as exc:
+        logger.warning('Could not queue %s (%s); a periodic task will catch up', task.name, exc)
+        return False
+    return True
+
+
+def enqueue_on_commit(task, *args, **options):
+    """``enqueue`` once the current transaction commits (immediately outside one)."""
+    transaction.on_commit(lambda: enqueue(task, *args, **options))
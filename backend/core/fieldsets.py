@@ -0,0 +1,232 @@
+"""
+Sparse fieldsets and values()-based list serialization for Neural Digital Garden.
+
+``?fields=title,slug`` limits a response to the named fields and
+``?expand=category`` swaps in nested objects a serializer declares in
+``Meta.expandable_fields``. Serializers opt in with ``DynamicFieldsMixin``
+and viewsets with ``SparseFieldsetMixin``.
+
+``ValuesListMixin`` gives list actions a fast path: a ``ValuesSerializer``
+describes how each output field is read from a ``QuerySet.values()`` row
+(a column, an annotation, or a batch lookup keyed by primary key), so large
+listings are produced without instantiating models or running DRF fields.
+It must produce exactly what its ``serializer_class`` would; requests it
+cannot answer (``?expand=``, a different serializer) take the regular path.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.files.storage import default_storage
+from django.db.models import QuerySet
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .images import srcset_representation
+
+
+def parse_field_list(value):
+    """Split a comma-separated query parameter into names, or None if absent."""
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class DynamicFieldsMixin:
+    """Serializer mixin accepting ``fields`` and ``expand`` keyword arguments.
+
+    ``Meta.expandable_fields`` maps names to ``(serializer_class, kwargs)``
+    pairs that are added as read-only nested fields when expanded.
+    """
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in expand:
+            if name in expandable:
+                serializer_class, options = expandable[name]
+                self.fields[name] = serializer_class(read_only=True, **options)
+        if fields is not None:
+            for name in set(self.fields) - set(fields) - set(expand):
+                self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """Viewset mixin passing ``?fields=`` and ``?expand=`` to DynamicFieldsMixin serializers on reads."""
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def get_requested_fields(self):
+        return parse_field_list(self.request.query_params.get(self.fields_query_param))
+
+    def get_requested_expansions(self):
+        return parse_field_list(self.request.query_params.get(self.expand_query_param)) or []
+
+    def get_serializer(self, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        if self.request.method == 'GET' and issubclass(serializer_class, DynamicFieldsMixin):
+            kwargs.setdefault('fields', self.get_requested_fields())
+            kwargs.setdefault('expand', self.get_requested_expansions())
+        return super().get_serializer(*args, **kwargs)
+
+
+def datetime_representation(value):
+    """Same output as DRF's DateTimeField with the default ISO 8601 format."""
+    if value is None:
+        return None
+    if timezone.is_aware(value):
+        value = value.astimezone(timezone.get_current_timezone())
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def file_url(name, request=None):
+    """Same output as DRF's FileField/ImageField for a stored file name."""
+    if not name:
+        return None
+    url = default_storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+class Value:
+    """An output field read from one ``values()`` column.
+
+    ``path`` is the ORM lookup (defaults to the field name), ``annotation``
+    an expression annotated under the field name instead, and ``convert``
+    an optional ``convert(value, row, serializer)`` callable. With
+    ``skip_null`` a NULL leaves the field out, the way DRF treats a dotted
+    ``source`` that crosses an empty relation.
+    """
+
+    def __init__(self, path=None, annotation=None, convert=None, skip_null=False):
+        self.path = path
+        self.annotation = annotation
+        self.convert = convert
+        self.skip_null = skip_null
+
+
+class Related:
+    """An output field filled in by one batch lookup for the whole page.
+
+    ``load(serializer, pks)`` returns ``{pk: value}``; rows it does not
+    mention get ``default()``.
+    """
+
+    def __init__(self, load, default=list):
+        self.load = load
+        self.default = default
+
+
+class ValuesSerializer:
+    """Serializes ``values()`` rows straight to dicts."""
+    serializer_class = None  # The DRF serializer whose output this reproduces
+    fields = {}
+    extra_columns = ()  # Columns needed for cursors and lookups but not output
+
+    def __init__(self, fields=None, context=None):
+        self.context = context or {}
+        self.selected = {
+            name: field for name, field in self.fields.items() if fields is None or name in fields
+        }
+
+    @property
+    def request(self):
+        return self.context.get('request')
+
+    def values(self, queryset):
+        """Turn a filtered model queryset into a ``values()`` queryset for the selected fields."""
+        annotations = {
+            name: field.annotation for name, field in self.selected.items()
+            if isinstance(field, Value) and field.annotation is not None
+        }
+        columns = {'id', *self.extra_columns}
+        for name, field in self.selected.items():
+            if isinstance(field, Value):
+                columns.add(name if field.annotation is not None else field.path or name)
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset.values(*columns)
+
+    def prepare(self, rows):
+        """Hook for batch work over the page before rows are converted."""
+
+    def serialize(self, rows):
+        rows = list(rows)
+        self.prepare(rows)
+        pks = [row['id'] for row in rows]
+        related = {
+            name: field.load(self, pks) for name, field in self.selected.items() if isinstance(field, Related)
+        }
+        return self._build(rows, related)
+
+    async def aserialize(self, rows):
+        """Async counterpart of ``serialize``; the batch lookups run concurrently."""
+        rows = list(rows)
+        pks = [row['id'] for row in rows]
+        names = [name for name, field in self.selected.items() if isinstance(field, Related)]
+        _, *loaded = await asyncio.gather(
+            sync_to_async(self.prepare)(rows),
+            *(sync_to_async(self.selected[name].load)(self, pks) for name in names),
+        )
+        return self._build(rows, dict(zip(names, loaded)))
+
+    def _build(self, rows, related):
+        items = []
+        for row in rows:
+            item = {}
+            for name, field in self.selected.items():
+                if isinstance(field, Related):
+                    value = related[name].get(row['id'])
+                    item[name] = field.default() if value is None else value
+                    continue
+                value = row[name if field.annotation is not None else field.path or name]
+                if value is None and field.skip_null:
+                    continue
+                item[name] = field.convert(value, row, self) if field.convert else value
+            items.append(item)
+        return items
+
+
+def datetime_value(path=None):
+    return Value(path, convert=lambda value, row, serializer: datetime_representation(value))
+
+
+def file_value(path=None):
+    return Value(path, convert=lambda value, row, serializer: file_url(value, serializer.request))
+
+
+def srcset_value(path):
+    return Value(path, convert=lambda value, row, serializer: srcset_representation(value, serializer.request))
+
+
+class ValuesListMixin:
+    """Viewset mixin serving list actions through ``values_serializer_class`` when it can."""
+    values_serializer_class = None
+
+    def get_values_serializer(self):
+        values_serializer_class = self.values_serializer_class
+        if values_serializer_class is None or self.action != 'list':
+            return None
+        if self.get_serializer_class() is not values_serializer_class.serializer_class:
+            return None  # e.g. ranked search results
+        expand = self.get_requested_expansions() if hasattr(self, 'get_requested_expansions') else []
+        if expand:
+            return None
+        fields = self.get_requested_fields() if hasattr(self, 'get_requested_fields') else None
+        return values_serializer_class(fields=fields, context=self.get_serializer_context())
+
+    def list(self, request, *args, **kwargs):
+        values_serializer = self.get_values_serializer()
+        if values_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if not isinstance(queryset, QuerySet):
+            return super().list(request, *args, **kwargs)
+        rows = values_serializer.values(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(values_serializer.serialize(page))
+        return Response(values_serializer.serialize(rows))
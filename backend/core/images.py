@@ -0,0 +1,177 @@
+"""
+Responsive image derivatives for Neural Digital Garden.
+
+Uploaded images are resized by a Celery task into WebP and JPEG variants at
+the widths in ``IMAGE_DERIVATIVE_WIDTHS`` (never upscaling). Variants are
+written to storage under ``derivatives/<source sha256>/<width>.<ext>``, so an
+identical upload is never processed twice, and the resulting map is stored in
+a JSON field next to the image, e.g.::
+
+    {"source": "blog/images/a.png", "hash": "9f86…",
+     "webp": {"320": "derivatives/9f86…/320.webp", ...},
+     "jpeg": {"320": "derivatives/9f86…/320.jpg", ...}}
+
+The map records which upload it was built from, so the task only runs when
+the image field points at a different file.
+"""
+import hashlib
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_save
+from rest_framework import serializers
+
+from .cache import invalidate_tags, model_tag
+from .enqueue import enqueue_on_commit
+
+FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+
+# (model, field_name, derivatives_field) registered by derive_images_on_change()
+DERIVED_IMAGE_FIELDS = []
+
+
+def derivative_widths():
+    return sorted(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', (320, 640, 960, 1280)))
+
+
+def derivative_quality():
+    return getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', 80)
+
+
+def source_hash(field_file):
+    """SHA-256 of an uploaded file, read in chunks."""
+    digest = hashlib.sha256()
+    with field_file.open('rb') as source:
+        for chunk in source.chunks():
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _derivative_name(digest, width, extension):
+    return f'derivatives/{digest}/{width}.{extension}'
+
+
+def _target_widths(source_width):
+    widths = [width for width in derivative_widths() if width <= source_width]
+    return widths or [source_width]  # Small originals get one variant at their own size
+
+
+def build_derivatives(field_file):
+    """Create any missing variants for an image and return its derivative map."""
+    from PIL import Image, ImageOps
+
+    digest = source_hash(field_file)
+    with field_file.open('rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+
+    widths = _target_widths(image.width)
+    derivatives = {'source': field_file.name, 'hash': digest}
+    for key, (pil_format, extension) in FORMATS.items():
+        derivatives[key] = {}
+        for width in widths:
+            name = _derivative_name(digest, width, extension)
+            if not default_storage.exists(name):
+                height = max(1, round(image.height * width / image.width))
+                resized = image.resize((width, height), Image.LANCZOS)
+                if pil_format == 'JPEG' and resized.mode != 'RGB':
+                    resized = resized.convert('RGB')  # JPEG has no alpha channel
+                elif resized.mode not in ('RGB', 'RGBA'):
+                    resized = resized.convert('RGBA')
+                buffer = BytesIO()
+                resized.save(buffer, pil_format, quality=derivative_quality(), optimize=True)
+                name = default_storage.save(name, ContentFile(buffer.getvalue()))
+            derivatives[key][str(width)] = name
+    return derivatives
+
+
+def update_derivatives(model_label, pk, field_name, derivatives_field):
+    """Refresh one row's derivative map; return True if it changed.
+
+    The map is written with ``QuerySet.update()``, so ``updated_at`` and the
+    model's signals are left alone, and only if the row still points at the
+    same upload.
+    """
+    model = apps.get_model(model_label)
+    row = model.objects.filter(pk=pk).values(field_name, derivatives_field).first()
+    if row is None:
+        return False
+
+    name, current = row[field_name], row[derivatives_field] or {}
+    if not name:
+        derivatives = {}
+    elif current.get('source') == name:
+        return False
+    else:
+        field_file = getattr(model(**{field_name: name}), field_name)
+        derivatives = build_derivatives(field_file)
+    if derivatives == current:
+        return False
+
+    model.objects.filter(pk=pk, **{field_name: name or ''}).update(**{derivatives_field: derivatives})
+    invalidate_tags(model_tag(model))
+    return True
+
+
+def _queue_derivatives(field_name, derivatives_field):
+    def handler(sender, instance, raw=False, update_fields=None, **kwargs):
+        if raw or (update_fields is not None and field_name not in update_fields):
+            return
+        name = getattr(instance, field_name).name or ''
+        if (getattr(instance, derivatives_field) or {}).get('source', '') == name:
+            return
+        from .tasks import generate_image_derivatives
+
+        enqueue_on_commit(generate_image_derivatives, sender._meta.label, instance.pk, field_name, derivatives_field)
+    return handler
+
+
+def update_stale_derivatives():
+    """Refresh every registered image whose variants are missing or built from another upload."""
+    updated = 0
+    for model, field_name, derivatives_field in DERIVED_IMAGE_FIELDS:
+        rows = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+        for pk, name, current in rows.values_list('pk', field_name, derivatives_field).iterator():
+            if (current or {}).get('source') != name:
+                updated += update_derivatives(model._meta.label, pk, field_name, derivatives_field)
+    return updated
+
+
+def derive_images_on_change(model, field_name, derivatives_field):
+    """Queue derivative generation whenever ``model.field_name`` gets a new file."""
+    DERIVED_IMAGE_FIELDS.append((model, field_name, derivatives_field))
+    post_save.connect(
+        _queue_derivatives(field_name, derivatives_field),
+        sender=model, weak=False, dispatch_uid=f'derivatives:{model_tag(model)}.{field_name}',
+    )
+
+
+def srcset_representation(value, request=None):
+    """A derivative map as ``{format: "url 320w, url 640w, ..."}``."""
+    if not value:
+        return {}
+    srcset = {}
+    for key in FORMATS:
+        variants = value.get(key) or {}
+        entries = []
+        for width, name in sorted(variants.items(), key=lambda item: int(item[0])):
+            url = default_storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            entries.append(f'{url} {width}w')
+        if entries:
+            srcset[key] = ', '.join(entries)
+    return srcset
+
+
+class SrcsetField(serializers.ReadOnlyField):
+    """Serializes a derivative map with ``srcset_representation``."""
+
+    def to_representation(self, value):
+        return srcset_representation(value, self.context.get('request'))
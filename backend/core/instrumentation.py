@@ -0,0 +1,195 @@
+"""
+Per-request SQL and timing instrumentation for Neural Digital Garden.
+
+``RequestMetricsMiddleware`` wraps every database query made while handling
+a request and reports, in a ``Server-Timing`` header:
+
+* ``db``: total SQL time, with the query count as its description
+* ``serialize``: time in the view and its serializers, excluding SQL
+* ``render``: time spent rendering the response body
+* ``cache``: the response cache outcome (``HIT``/``MISS``) when there is one
+* ``total``: wall time from the middleware down and back
+
+Queries are grouped by shape (their SQL with parameters left out and ``IN``
+lists collapsed). A shape that repeats ``N_PLUS_ONE_THRESHOLD`` times or more
+in one request is almost always a per-row lookup: it is logged as a warning
+tagged with the viewset and action, and reported as ``nplusone`` in the
+header. A sample of requests (``REQUEST_METRICS_SAMPLE_RATE``) is also logged
+as one JSON line each.
+"""
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)')
+WHITESPACE = re.compile(r'\s+')
+
+
+def query_shape(sql):
+    """SQL text with ``IN (%s, %s, ...)`` lists collapsed, so per-row lookups compare equal."""
+    return IN_LIST.sub('IN (...)', WHITESPACE.sub(' ', sql).strip())
+
+
+class RequestMetrics:
+    """Everything measured while handling one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+        self.view = None
+        self.action = None
+        self.view_started = None
+        self.view_db_time = 0.0
+        self.serialize_time = None
+        self.render_started = None
+        self.render_time = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper (see ``connection.execute_wrapper``)."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.shapes[query_shape(sql)] += 1
+
+    def repeated_queries(self, threshold):
+        """``(shape, count)`` pairs seen at least ``threshold`` times, most frequent first."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def as_dict(self, request, response, total):
+        return {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'view': self.view,
+            'action': self.action,
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'serialize_ms': None if self.serialize_time is None else round(self.serialize_time * 1000, 2),
+            'render_ms': None if self.render_time is None else round(self.render_time * 1000, 2),
+            'cache': response.get('X-Cache'),
+            'total_ms': round(total * 1000, 2),
+        }
+
+
+def _timing(name, duration=None, description=None):
+    entry = name
+    if duration is not None:
+        entry += f';dur={duration * 1000:.1f}'
+    if description is not None:
+        entry += f';desc="{description}"'
+    return entry
+
+
+def _instrument(stack, metrics):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(metrics))
+
+
+class RequestMetricsMiddleware:
+    """Adds ``Server-Timing`` headers, sampled metric logs and N+1 warnings to every request."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        with ExitStack() as stack:
+            _instrument(stack, metrics)
+            response = self.get_response(request)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        # Connections are per thread: the async ORM and sync views run queries
+        # on the request's sync thread, so the wrappers are installed there.
+        stack = ExitStack()
+        await sync_to_async(_instrument)(stack, metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        total = time.perf_counter() - metrics.started
+
+        repeated = metrics.repeated_queries(getattr(settings, 'N_PLUS_ONE_THRESHOLD', 5))
+        if repeated:
+            shape, count = repeated[0]
+            logger.warning(
+                'Likely N+1 in %s.%s: %d identical queries: %s',
+                metrics.view or request.path, metrics.action or request.method.lower(), count, shape,
+            )
+        if repeated or random.random() < getattr(settings, 'REQUEST_METRICS_SAMPLE_RATE', 0.01):
+            record = metrics.as_dict(request, response, total)
+            record['repeated_queries'] = [{'sql': shape, 'count': count} for shape, count in repeated]
+            logger.info(json.dumps(record))
+
+        if getattr(settings, 'SERVER_TIMING_HEADER', True):
+            response['Server-Timing'] = ', '.join(self.server_timing(metrics, response, total, repeated))
+        return response
+
+    def server_timing(self, metrics, response, total, repeated):
+        noun = 'query' if metrics.queries == 1 else 'queries'
+        entries = [_timing('db', metrics.db_time, f'{metrics.queries} {noun}')]
+        if metrics.serialize_time is not None:
+            entries.append(_timing('serialize', metrics.serialize_time))
+        if metrics.render_time is not None:
+            entries.append(_timing('render', metrics.render_time))
+        if response.has_header('X-Cache'):
+            entries.append(_timing('cache', description=response['X-Cache']))
+        if repeated:
+            entries.append(_timing('nplusone', description=f'{repeated[0][1]} identical queries'))
+        entries.append(_timing('total', total))
+        return entries
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(request, 'metrics', None)
+        if metrics is None:
+            return None
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        metrics.view = view_class.__name__ if view_class else view_func.__name__
+        actions = getattr(view_func, 'actions', None) or {}
+        metrics.action = actions.get(request.method.lower())
+        metrics.view_started = time.perf_counter()
+        metrics.view_db_time = metrics.db_time
+        return None
+
+    def process_template_response(self, request, response):
+        # Called after the view returns and just before the response is rendered
+        metrics = getattr(request, 'metrics', None)
+        if metrics is None or metrics.view_started is None:
+            return response
+        now = time.perf_counter()
+        metrics.serialize_time = max(0.0, now - metrics.view_started - (metrics.db_time - metrics.view_db_time))
+        metrics.render_started = now
+
+        def rendered(response):
+            metrics.render_time = time.perf_counter() - metrics.render_started
+
+        response.add_post_render_callback(rendered)
+        return response
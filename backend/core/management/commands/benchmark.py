@@ -0,0 +1,80 @@
+"""
+Benchmark every blog and interests endpoint against synthetic datasets.
+"""
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from core.benchmark import ENDPOINTS, SCALES, check_results, run_benchmark, uncovered_routes
+
+
+class Command(BaseCommand):
+    help = 'Measure latency percentiles and SQL query counts per endpoint and enforce query budgets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', action='append', choices=list(SCALES),
+            help='Dataset size to benchmark (repeatable; default: small)'
+        )
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per endpoint')
+        parser.add_argument('--output', help='Write results as JSON to this file')
+        parser.add_argument('--baseline', help='Results JSON of an earlier run to check latency against')
+        parser.add_argument(
+            '--latency-threshold', type=float, default=0.25,
+            help='Allowed p95 growth over the baseline, as a fraction (default: 0.25)'
+        )
+        parser.add_argument('--keepdb', action='store_true', help='Keep the benchmark database afterwards')
+
+    def handle(self, *args, **options):
+        scales = options['scale'] or ['small']
+        baseline = json.loads(Path(options['baseline']).read_text()) if options['baseline'] else {}
+
+        failures = [f'{route} {method.upper()}: no benchmark endpoint' for route, method in uncovered_routes()]
+        results = {}
+
+        # Everything runs against a throwaway database and a private cache
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            with tempfile.TemporaryDirectory() as index_dir, override_settings(
+                CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                REDIS_URL=None,
+                SNAPSHOT_ROOT=None,
+                DATABASE_REPLICAS=[],  # Replicas aren't part of the throwaway database
+                RELATED_INDEX_PATH=Path(index_dir) / 'related_index.npz',
+            ):
+                for scale in scales:
+                    call_command('flush', interactive=False, verbosity=0)
+                    self.stdout.write(f'Seeding {SCALES[scale]} posts ({scale})...')
+                    results[scale] = run_benchmark(scale, iterations=options['iterations'])
+                    self._report(scale, results[scale])
+                    failures += [
+                        f'[{scale}] {failure}' for failure in check_results(
+                            results[scale], baseline=baseline.get(scale),
+                            latency_threshold=options['latency_threshold'],
+                        )
+                    ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2, sort_keys=True))
+        if failures:
+            raise CommandError('Benchmark failed:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS(f'All {len(ENDPOINTS)} endpoints within budget.'))
+
+    def _report(self, scale, results):
+        budgets = {endpoint.name: endpoint.query_budget for endpoint in ENDPOINTS}
+        width = max(len(name) for name in results)
+        self.stdout.write(f'{"endpoint":<{width}}  status  queries  p50 ms  p95 ms  p99 ms')
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<{width}}  {result["status"]:>6}  {result["queries"]:>3}/{budgets[name]:<3}  '
+                f'{result["p50"]:>6.1f}  {result["p95"]:>6.1f}  {result["p99"]:>6.1f}'
+            )
@@ -0,0 +1,14 @@
+"""
+Build responsive variants for every uploaded image that lacks current ones.
+"""
+from django.core.management.base import BaseCommand
+
+from core.images import update_stale_derivatives
+
+
+class Command(BaseCommand):
+    help = 'Generate WebP/JPEG image variants for uploads whose variants are missing or outdated'
+
+    def handle(self, *args, **options):
+        updated = update_stale_derivatives()
+        self.stdout.write(self.style.SUCCESS(f'Updated variants for {updated} image(s).'))
@@ -0,0 +1,22 @@
+"""
+Export static JSON snapshots of the public read endpoints.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.snapshots import export_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Write pre-serialized JSON (plus .gz/.br) snapshots of public endpoints for CDN serving'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Directory to write to (defaults to SNAPSHOT_ROOT)')
+        parser.add_argument('--force', action='store_true', help='Rewrite every file, even unchanged ones')
+
+    def handle(self, *args, **options):
+        summary = export_snapshots(root=options['output'], force=options['force'])
+        if summary is None:
+            raise CommandError('No output directory: pass --output or set SNAPSHOT_ROOT.')
+        self.stdout.write(self.style.SUCCESS(
+            'Wrote {written}, left {unchanged} unchanged, removed {removed} snapshot(s).'.format(**summary)
+        ))
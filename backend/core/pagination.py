@@ -0,0 +1,215 @@
+"""
+Keyset pagination for Neural Digital Garden.
+"""
+import json
+from base64 import b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on a ``(field, id)`` key.
+
+    Pages are selected with ``WHERE (field, id) < (last_field, last_id)``
+    style predicates instead of OFFSET, so fetching page 1,000 costs the same
+    as fetching page 1. The sort field comes from the view's OrderingFilter
+    when it has one (only the first ordering term is used), otherwise from
+    ``ordering``; the primary key breaks ties. NULLs sort last.
+
+    Each page is read with index range scans, given an index on
+    ``(field, id)`` in the same order as the query's ORDER BY. For a nullable
+    field sorted descending that is ``(field DESC NULLS LAST, id DESC)``.
+    The NULLs form a range of their own, which is only queried once a page
+    reaches them.
+    """
+    ordering = '-created_at'
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 10)
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ranges, cursor = self._page_query(queryset, request, view)
+        results = []
+        for rows in ranges:
+            results.extend(rows[:self.page_size + 1 - len(results)])
+            if len(results) > self.page_size:
+                break
+        return self._set_page(results, cursor)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async counterpart of ``paginate_queryset``."""
+        ranges, cursor = self._page_query(queryset, request, view)
+        results = []
+        for rows in ranges:
+            results.extend([item async for item in rows[:self.page_size + 1 - len(results)]])
+            if len(results) > self.page_size:
+                break
+        return self._set_page(results, cursor)
+
+    def _page_query(self, queryset, request, view):
+        """The queries for the rows from the cursor on, in walking order, and the cursor.
+
+        The page takes one row more than it shows (to detect a next page) from
+        the first query, then the next if the first runs out.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(request, queryset, view)
+        self.model_field = queryset.model._meta.get_field(self.field)
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['reverse'])
+        queryset = queryset.order_by(*self._order_by(reverse))
+        if cursor is None:
+            return [queryset], cursor
+        return [queryset.filter(after) for after in self._after(cursor['value'], cursor['pk'], reverse)], cursor
+
+    def _set_page(self, results, cursor):
+        reverse = bool(cursor and cursor['reverse'])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, request, queryset, view):
+        """Return ``(field_name, descending)`` for the requested ordering."""
+        ordering = self.ordering
+        if view is not None and any(
+            issubclass(backend, OrderingFilter) for backend in getattr(view, 'filter_backends', ())
+        ):
+            requested = OrderingFilter().get_ordering(request, queryset, view)
+            if requested:
+                ordering = requested[0]
+        if isinstance(ordering, (list, tuple)):
+            ordering = ordering[0]
+        return ordering.lstrip('-'), ordering.startswith('-')
+
+    def _order_by(self, reverse):
+        nulls = {}
+        if self.model_field.null:
+            # NULLs go last in the forward direction, so first when walking back.
+            nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+        if self.descending != reverse:
+            return [F(self.field).desc(**nulls), '-pk']
+        return [F(self.field).asc(**nulls), 'pk']
+
+    def _after(self, value, pk, reverse):
+        """Filters for the rows strictly after ``(value, pk)``, one per index range, in walking order."""
+        op = 'lt' if self.descending != reverse else 'gt'
+        pk_after = Q(**{f'pk__{op}': pk})
+        is_null = Q(**{f'{self.field}__isnull': True})
+        if value is None:
+            # The rest of the NULLs, then (walking back) every other row
+            return [is_null & pk_after, ~is_null] if reverse else [is_null & pk_after]
+        # The redundant bound is what lets the index scan start at the cursor
+        after = Q(**{f'{self.field}__{op}e': value}) & (
+            Q(**{f'{self.field}__{op}': value}) | (Q(**{self.field: value}) & pk_after)
+        )
+        if self.model_field.null and not reverse:
+            return [after, is_null]
+        return [after]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            data = json.loads(b64decode(encoded.encode('ascii'), altchars=b'-_', validate=True).decode('utf-8'))
+            value = data['v']
+            return {
+                'value': None if value is None else self.model_field.to_python(value),
+                'pk': int(data['id']),
+                'reverse': bool(data.get('r')),
+            }
+        except (TypeError, ValueError, KeyError, ValidationError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+
+    def encode_cursor(self, item, reverse):
+        value = item[self.field] if isinstance(item, dict) else getattr(item, self.field)
+        pk = item['id'] if isinstance(item, dict) else item.pk
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()  # Full precision; DjangoJSONEncoder drops microseconds
+        data = json.dumps({'v': value, 'id': pk, 'r': int(reverse)}, cls=DjangoJSONEncoder)
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+        )
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+async def apaginate_queryset(paginator, queryset, request, view=None):
+    """Async ``paginator.paginate_queryset()`` for KeysetPagination and DRF's PageNumberPagination.
+
+    Returns None when the page can't be served this way (no pagination, or
+    an invalid page number, which the sync path reports as a 404).
+    """
+    if hasattr(paginator, 'apaginate_queryset'):
+        return await paginator.apaginate_queryset(queryset, request, view=view)
+    if not isinstance(paginator, PageNumberPagination):
+        return None
+
+    page_size = paginator.get_page_size(request)
+    if not page_size:
+        return None
+    django_paginator = paginator.django_paginator_class(queryset, page_size)
+    django_paginator.count = await queryset.acount()
+    try:
+        page = django_paginator.page(paginator.get_page_number(request, django_paginator))
+    except InvalidPage:
+        return None
+    page.object_list = [item async for item in page.object_list]
+    paginator.page = page
+    paginator.request = request
+    return list(page)
@@ -0,0 +1,159 @@
+"""
+Read-replica routing for Neural Digital Garden.
+
+``ReplicaRoutingMiddleware`` decides, once per request, where that request's
+reads go, and ``ReplicaRouter`` applies the decision:
+
+* Safe-method requests (GET, HEAD, OPTIONS) to the viewsets of the apps in
+  ``REPLICA_READ_APPS`` read those apps' models from one of
+  ``DATABASE_REPLICAS``, picked at random and kept for the whole request.
+  Sessions and users still come from the primary, so a fresh login is seen
+  at once.
+* Everything else reads from the primary: writes, other views, and code
+  running outside a request (Celery tasks, management commands).
+* Writes always go to the primary. Once a request has written, its later
+  reads go to the primary too, as do reads inside a transaction.
+
+A client whose request wrote to the primary and succeeded is pinned to the
+primary for ``REPLICA_PIN_SECONDS`` with a cookie, so it reads its own
+writes even while the replicas lag behind. Requests that only touch a
+buffer (e.g. recording a post view) don't pin, and neither do writes made
+on the side with ``background_writes``. The response cache doesn't serve or
+store responses for pinned clients (see ``core.cache``).
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_routing = ContextVar('replica_routing', default=None)
+
+
+class RequestRouting:
+    """Where the current request reads from."""
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+        self.read_replica = False  # Whether any read actually went to the replica
+
+
+def get_replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+def get_replica_apps():
+    return getattr(settings, 'REPLICA_READ_APPS', ('blog', 'interests'))
+
+
+def pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+
+def is_pinned(request):
+    return PIN_COOKIE in request.COOKIES
+
+
+def read_from_replica():
+    """Whether the current request has read anything from a replica."""
+    routing = _routing.get()
+    return routing is not None and routing.read_replica
+
+
+@contextmanager
+def background_writes():
+    """Run work that isn't the client's own (e.g. an inline buffer flush) outside its routing.
+
+    Its queries use the primary and its writes don't pin the client.
+    """
+    token = _routing.set(None)
+    try:
+        yield
+    finally:
+        _routing.reset(token)
+
+
+class ReplicaRouter:
+    """Database router sending the reads of opted-in requests to a replica."""
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None or routing.replica is None or routing.wrote:
+            return None
+        if model._meta.app_label not in get_replica_apps():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None  # Reads in a transaction must see its writes
+        routing.read_replica = True
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Route safe requests to replicas and pin clients that write to the primary."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        routing = RequestRouting()
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.pin(routing, response)
+
+    async def __acall__(self, request):
+        routing = RequestRouting()
+        token = _routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.pin(routing, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        routing = _routing.get()
+        replicas = get_replicas()
+        if routing is None or not replicas:
+            return None
+        if request.method not in SAFE_METHODS or is_pinned(request):
+            return None
+        view_class = getattr(view_func, 'cls', None)
+        if view_class is None:
+            return None
+        app_label = view_class.__module__.split('.')[0]
+        if app_label in get_replica_apps():
+            routing.replica = random.choice(replicas)
+        return None
+
+    def pin(self, routing, response):
+        if routing.wrote and response.status_code < 400 and get_replicas():
+            response.set_cookie(PIN_COOKIE, '1', max_age=pin_seconds(), httponly=True, samesite='Lax')
+        return response
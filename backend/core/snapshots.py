@@ -0,0 +1,162 @@
+"""
+Static JSON snapshots for Neural Digital Garden.
+
+The public read endpoints (homepage, published posts, categories, tags,
+interests and projects) are rendered through their real views with an
+anonymous request and written under ``SNAPSHOT_ROOT`` in a layout that
+mirrors the URLs, e.g. ``/api/blog/posts/<slug>/`` becomes
+``api/blog/posts/<slug>/index.json``, next to precompressed ``.gz`` and
+``.br`` siblings, so a static file server or CDN can serve them directly.
+
+A ``manifest.json`` records the SHA-256 of every file. Exports are
+incremental: unchanged files are left alone, changed ones are replaced
+atomically, and snapshots of pages that no longer exist are removed.
+"""
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from blog.models import Post
+from interests.models import Interest, Project
+from .cache import get_cache, model_tag
+from .enqueue import enqueue
+
+try:
+    import brotli
+except ImportError:  # Optional: only gzip siblings are written without it
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+QUEUED_KEY = 'snapshots:queued'
+
+
+def snapshot_root():
+    root = getattr(settings, 'SNAPSHOT_ROOT', None)
+    return Path(root) if root else None
+
+
+def snapshot_paths():
+    """URL paths of every endpoint that is exported."""
+    yield reverse('home')
+    yield reverse('blog:category-list')
+    yield reverse('blog:tag-list')
+    yield reverse('blog:post-list')
+    yield reverse('blog:post-featured')
+    for slug in Post.objects.filter(status='published').values_list('slug', flat=True).iterator():
+        yield reverse('blog:post-detail', kwargs={'slug': slug})
+    yield reverse('interests:interest-list')
+    for slug in Interest.objects.filter(is_active=True).values_list('slug', flat=True).iterator():
+        yield reverse('interests:interest-detail', kwargs={'slug': slug})
+    yield reverse('interests:project-list')
+    for slug in Project.objects.values_list('slug', flat=True).iterator():
+        yield reverse('interests:project-detail', kwargs={'slug': slug})
+
+
+def render_path(path):
+    """Render a GET of ``path`` as an anonymous client; return the body or None."""
+    base = urlsplit(getattr(settings, 'SNAPSHOT_BASE_URL', 'http://localhost:8000'))
+    request = RequestFactory().get(
+        path, HTTP_HOST=base.netloc, HTTP_ACCEPT='application/json', secure=base.scheme == 'https'
+    )
+    match = resolve(path)
+    view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+    response = view(request, *match.args, **match.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response.content if response.status_code == 200 else None
+
+
+def snapshot_file(path):
+    """Relative file name for a URL path."""
+    return f'{path.strip("/")}/index.json'
+
+
+def _write_atomic(target, content):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temporary = target.with_name(f'.{target.name}.tmp')
+    temporary.write_bytes(content)
+    os.replace(temporary, target)
+
+
+def _siblings(target):
+    return [target.with_name(target.name + '.gz'), target.with_name(target.name + '.br')]
+
+
+def export_snapshots(root=None, force=False):
+    """Write snapshots whose content changed and return a summary of the run."""
+    root = Path(root) if root else snapshot_root()
+    if root is None:
+        return None
+
+    manifest_file = root / MANIFEST_NAME
+    try:
+        previous = json.loads(manifest_file.read_text())
+    except (OSError, ValueError):
+        previous = {}
+
+    manifest, written, unchanged = {}, 0, 0
+    for path in snapshot_paths():
+        content = render_path(path)
+        if content is None:
+            continue
+        name = snapshot_file(path)
+        digest = hashlib.sha256(content).hexdigest()
+        manifest[name] = digest
+        target = root / name
+        if not force and previous.get(name) == digest and target.exists():
+            unchanged += 1
+            continue
+
+        _write_atomic(target, content)
+        gz, br = _siblings(target)
+        _write_atomic(gz, gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write_atomic(br, brotli.compress(content))
+        written += 1
+
+    removed = 0
+    for name in previous.keys() - manifest.keys():
+        target = root / name
+        for stale in (target, *_siblings(target)):
+            stale.unlink(missing_ok=True)
+        removed += 1
+
+    if manifest != previous:
+        _write_atomic(manifest_file, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return {'written': written, 'unchanged': unchanged, 'removed': removed}
+
+
+def queue_snapshot_export(**kwargs):
+    """Schedule one export shortly after a burst of content changes."""
+    if snapshot_root() is None:
+        return
+    delay = getattr(settings, 'SNAPSHOT_EXPORT_DELAY', 30)
+
+    def queue():
+        # Changes made before the queued export runs are picked up by it
+        if get_cache().add(QUEUED_KEY, True, timeout=delay):
+            from .tasks import export_static_snapshots
+
+            enqueue(export_static_snapshots, countdown=delay)
+
+    transaction.on_commit(queue)
+
+
+def export_snapshots_on_change(*models, m2m=()):
+    """Queue a snapshot export whenever one of the models (or m2m relations) changes."""
+    for model in models:
+        uid = f'snapshots:{model_tag(model)}'
+        post_save.connect(queue_snapshot_export, sender=model, dispatch_uid=uid)
+        post_delete.connect(queue_snapshot_export, sender=model, dispatch_uid=uid)
+    for through in m2m:
+        m2m_changed.connect(queue_snapshot_export, sender=through, dispatch_uid=f'snapshots:{model_tag(through)}')
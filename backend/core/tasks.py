@@ -0,0 +1,25 @@
+"""
+Core Celery tasks for Neural Digital Garden.
+"""
+from celery import shared_task
+
+from .images import update_derivatives, update_stale_derivatives
+from .snapshots import export_snapshots
+
+
+@shared_task
+def generate_image_derivatives(model_label, pk, field_name, derivatives_field):
+    """Build resized WebP/JPEG variants of an uploaded image."""
+    return update_derivatives(model_label, pk, field_name, derivatives_field)
+
+
+@shared_task
+def refresh_image_derivatives():
+    """Build variants for any image whose queued task was missed."""
+    return update_stale_derivatives()
+
+
+@shared_task
+def export_static_snapshots(force=False):
+    """Rewrite static JSON snapshots whose content changed (no-op without SNAPSHOT_ROOT)."""
+    return export_snapshots(force=force)
@@ -0,0 +1,180 @@
+"""
+Tests for the read-replica routing of Neural Digital Garden.
+
+The test settings define a ``replica1`` database that is not a mirror of
+``default``, and each test gives the same post a different title in each,
+so a response shows which database it was read from.
+"""
+import json
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import AsyncClient, Client, RequestFactory, TransactionTestCase, override_settings
+from django.test.client import AsyncRequestFactory
+from django.urls import include, path, resolve
+
+from blog.async_views import ASYNC_VIEWS
+from blog.models import Post, Tag
+from blog.urls import router as blog_router
+from blog.view_counter import LocalViewBuffer
+from blog.views import PostViewSet
+from .async_views import async_read_patterns
+from .cache import CHANGED_KEY_PREFIX, get_cache, invalidate_tags
+from .replicas import PIN_COOKIE, ReplicaRoutingMiddleware
+
+# Serves the blog API through the async read views, as under ASGI
+urlpatterns = [
+    path('api/blog/', include((async_read_patterns(blog_router, ASYNC_VIEWS), 'blog'))),
+]
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(TransactionTestCase):
+    # Not TestCase: the router keeps reads inside a transaction on the primary
+    databases = {'default', 'replica1'}
+
+    def setUp(self):
+        self.user = User.objects.create(username='editor', is_staff=True)
+        self.post = Post.objects.create(
+            title='On the primary', slug='garden', author=self.user, content='Text', status='published'
+        )
+        replica_user = User.objects.using('replica1').create(pk=self.user.pk, username='editor')
+        Post.objects.using('replica1').create(
+            pk=self.post.pk, title='On the replica', slug='garden', author=replica_user, content='Text',
+            status='published',
+        )
+        get_cache().clear()
+
+    def edit(self, client):
+        return client.patch('/api/blog/posts/garden/', {'title': 'Edited'}, content_type='application/json')
+
+    def test_safe_reads_use_the_replica(self):
+        client = Client()
+
+        self.assertEqual(client.get('/api/blog/posts/garden/').json()['title'], 'On the replica')
+        self.assertEqual([post['title'] for post in client.get('/api/blog/posts/').json()['results']],
+                         ['On the replica'])
+        # Outside a request everything stays on the primary
+        self.assertEqual(Post.objects.get().title, 'On the primary')
+
+    def test_writes_go_to_the_primary_and_pin_the_client(self):
+        client = Client()
+        self.assertEqual(client.get('/api/blog/posts/garden/').json()['title'], 'On the replica')
+        client.force_login(self.user)
+
+        response = self.edit(client)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Post.objects.using('default').get().title, 'Edited')
+        self.assertEqual(Post.objects.using('replica1').get().title, 'On the replica')
+        self.assertIn(PIN_COOKIE, response.cookies)
+        response = client.get('/api/blog/posts/garden/')
+        self.assertEqual(response.json()['title'], 'Edited')
+        self.assertNotIn('X-Cache', response)
+
+    def test_pinned_clients_bypass_the_response_cache(self):
+        self.assertEqual(Client().get('/api/blog/posts/garden/')['X-Cache'], 'MISS')
+        client = Client()
+        client.cookies[PIN_COOKIE] = '1'
+
+        response = client.get('/api/blog/posts/garden/')
+
+        self.assertEqual(response.json()['title'], 'On the primary')
+        self.assertEqual(Client().get('/api/blog/posts/garden/').json()['title'], 'On the replica')
+
+    def test_replica_reads_are_not_cached_just_after_a_change(self):
+        invalidate_tags('blog.post')
+
+        self.assertEqual(Client().get('/api/blog/posts/garden/')['X-Cache'], 'MISS')
+        self.assertEqual(Client().get('/api/blog/posts/garden/')['X-Cache'], 'MISS')
+
+        get_cache().delete(CHANGED_KEY_PREFIX + 'blog.post')  # The replicas have caught up
+        self.assertEqual(Client().get('/api/blog/posts/garden/')['X-Cache'], 'MISS')
+        self.assertEqual(Client().get('/api/blog/posts/garden/')['X-Cache'], 'HIT')
+
+    def test_recording_a_view_does_not_pin(self):
+        client = Client()
+        client.force_login(self.user)
+
+        # A buffer that flushes on every view: the flush writes other views, not this client's
+        with mock.patch('blog.view_counter._buffer', LocalViewBuffer(flush_interval=0)):
+            response = client.post('/api/blog/posts/garden/increment_view/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(Post.objects.get().view_count, 1)
+
+    def test_reads_after_a_write_in_the_same_request_use_the_primary(self):
+        titles = []
+
+        def view(request):
+            titles.append(Post.objects.get().title)
+            Tag.objects.create(name='New', slug='new')
+            titles.append(Post.objects.get().title)
+            return HttpResponse()
+
+        view.cls = PostViewSet
+
+        def get_response(request):
+            return middleware.process_view(request, view, (), {}) or view(request)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+
+        response = middleware(RequestFactory().get('/api/blog/posts/'))
+
+        self.assertEqual(titles, ['On the replica', 'On the primary'])
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    async def test_async_reads_after_a_write_in_the_same_request_use_the_primary(self):
+        titles = []
+
+        async def view(request):
+            titles.append((await Post.objects.aget()).title)
+            await Tag.objects.acreate(name='New', slug='new')
+            titles.append((await Post.objects.aget()).title)
+            return HttpResponse()
+
+        view.cls = PostViewSet
+
+        async def get_response(request):
+            return middleware.process_view(request, view, (), {}) or await view(request)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+
+        response = await middleware(AsyncRequestFactory().get('/api/blog/posts/'))
+
+        self.assertEqual(titles, ['On the replica', 'On the primary'])
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_PIN_SECONDS=5, ROOT_URLCONF='core.tests')
+class AsyncReplicaRoutingTests(ReplicaRoutingTests):
+    """The same routing through the async middleware and the async read views."""
+
+    async def test_async_views_read_from_the_replica_and_honour_the_pin(self):
+        self.assertTrue(iscoroutinefunction(resolve('/api/blog/posts/garden/').func))
+        client = AsyncClient()
+
+        response = await client.get('/api/blog/posts/garden/')
+        self.assertEqual(json.loads(response.content)['title'], 'On the replica')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+        client.cookies[PIN_COOKIE] = '1'
+        response = await client.get('/api/blog/posts/garden/')
+        self.assertEqual(json.loads(response.content)['title'], 'On the primary')
+        self.assertNotIn('X-Cache', response)
+
+    async def test_async_writes_go_to_the_primary_and_pin_the_client(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+
+        response = await self.edit(client)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((await Post.objects.using('default').aget()).title, 'Edited')
+        self.assertEqual((await Post.objects.using('replica1').aget()).title, 'On the replica')
+        self.assertIn(PIN_COOKIE, response.cookies)
+        response = await client.get('/api/blog/posts/garden/')
+        self.assertEqual(json.loads(response.content)['title'], 'Edited')
@@ -0,0 +1,65 @@
+"""
+Token-bucket throttling for Neural Digital Garden.
+"""
+import time
+
+from django.core.cache import cache as default_cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle requests with a token bucket per client key.
+
+    The rate comes from ``DEFAULT_THROTTLE_RATES[scope]`` in DRF's usual
+    ``'<requests>/<period>'`` form: the bucket holds up to ``<requests>``
+    tokens, so that many requests may arrive at once, and refills at
+    ``<requests>`` per ``<period>``. Unlike DRF's fixed-window throttles a
+    client that has used its burst gets one request back every
+    ``period / requests`` seconds rather than having to wait out the window.
+
+    Subclasses set ``scope`` and implement ``get_cache_key``, returning None
+    for requests that shouldn't be throttled. Bucket updates aren't atomic,
+    so concurrent requests from one key can slip a token or two past it.
+    """
+    cache = default_cache
+    cache_format = 'throttle_%(scope)s_%(ident)s'
+    scope = None
+    timer = time.time
+
+    def __init__(self):
+        self.capacity, self.period = self.parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(self.scope))
+        self.wait_time = None
+
+    @staticmethod
+    def parse_rate(rate):
+        if rate is None:
+            return None, None
+        requests, period = rate.split('/')
+        return int(requests), PERIODS[period[0]]
+
+    def get_cache_key(self, request, view):
+        raise NotImplementedError('.get_cache_key() must be overridden')
+
+    def allow_request(self, request, view):
+        if self.capacity is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        now = self.timer()
+        refill_rate = self.capacity / self.period
+        tokens, updated = self.cache.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * refill_rate)
+        if tokens < 1:
+            self.wait_time = (1 - tokens) / refill_rate
+            return False
+        # The bucket is full again after ``period`` seconds, so the key can expire then
+        self.cache.set(key, (tokens - 1, now), self.period)
+        return True
+
+    def wait(self):
+        return self.wait_time
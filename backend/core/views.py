@@ -0,0 +1,50 @@
+"""
+Composite API views for Neural Digital Garden.
+"""
+from django.conf import settings
+from rest_framework import viewsets
+from rest_framework.response import Response
+
+from blog.models import Category, Post
+from blog.serializers import CategorySerializer, PostListSerializer
+from interests.models import Interest, Project
+from interests.serializers import InterestListSerializer, ProjectListSerializer
+from .cache import CachedResponseMixin
+
+
+class HomeViewSet(CachedResponseMixin, viewsets.ViewSet):
+    """Everything the homepage needs for first paint, in one response.
+
+    Replaces separate calls to the featured posts, interests, projects and
+    categories endpoints with a fixed number of queries (one per section
+    plus one for post tags). The output is public, so a single cached copy
+    is shared by every user until one of the underlying models changes.
+    """
+    permission_classes = []  # Allow public access
+    cache_tags = (
+        'blog.post', 'blog.category', 'blog.tag', 'blog.comment',
+        'interests.interest', 'interests.project',
+    )
+    cache_actions = ('list',)
+    cache_per_user = False
+
+    def list(self, request):
+        section_size = getattr(settings, 'HOME_SECTION_SIZE', 20)
+        featured_posts = (
+            Post.objects.filter(status='published', is_featured=True)
+            .select_related('author', 'category')
+            .prefetch_related('tags')
+            .with_comment_counts()[:getattr(settings, 'HOME_FEATURED_POSTS', 5)]
+        )
+        context = self.get_serializer_context()
+        return Response({
+            'featured_posts': PostListSerializer(featured_posts, many=True, context=context).data,
+            'interests': InterestListSerializer(
+                Interest.objects.filter(is_active=True)[:section_size], many=True, context=context
+            ).data,
+            'projects': ProjectListSerializer(Project.objects.all()[:section_size], many=True, context=context).data,
+            'categories': CategorySerializer(Category.objects.all()[:section_size], many=True, context=context).data,
+        })
+
+    def get_serializer_context(self):
+        return {'request': self.request, 'format': self.format_kwarg, 'view': self}
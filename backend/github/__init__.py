@@ -0,0 +1,4 @@
+"""
+GitHub application for Neural Digital Garden.
+"""
+default_app_config = 'github.apps.GithubConfig'
@@ -0,0 +1,30 @@
+"""
+GitHub admin configuration for Neural Digital Garden.
+"""
+from django.contrib import admin
+from .models import GitHubProfile, GitHubRepository
+
+
+class GitHubRepositoryInline(admin.TabularInline):
+    """Inline admin for mirrored repositories."""
+    model = GitHubRepository
+    extra = 0
+    fields = ['name', 'stargazer_count', 'fork_count', 'language_name', 'pushed_at']
+    readonly_fields = fields
+    can_delete = False
+
+
+@admin.register(GitHubProfile)
+class GitHubProfileAdmin(admin.ModelAdmin):
+    """Admin configuration for GitHubProfile model."""
+    list_display = ['login', 'total_contributions', 'last_fetched_at', 'last_changed_at', 'next_fetch_at', 'failure_count']
+    search_fields = ['login', 'name']
+    readonly_fields = [
+        'name', 'avatar_url', 'bio', 'url', 'total_contributions', 'total_commit_contributions',
+        'total_issue_contributions', 'total_pull_request_contributions',
+        'total_pull_request_review_contributions', 'grid_start', 'grid_palette', 'payload_hash', 'etag',
+        'fetch_interval', 'failure_count', 'last_fetched_at', 'last_changed_at', 'next_fetch_at',
+        'created_at', 'updated_at',
+    ]
+    exclude = ['grid_counts', 'grid_levels']
+    inlines = [GitHubRepositoryInline]
@@ -0,0 +1,15 @@
+"""
+GitHub application configuration.
+"""
+from django.apps import AppConfig
+
+
+class GithubConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'github'
+    verbose_name = 'GitHub'
+
+    def ready(self):
+        from core.cache import invalidate_on_change
+
+        invalidate_on_change(self.get_model('GitHubProfile'), self.get_model('GitHubRepository'))
@@ -0,0 +1,110 @@
+"""
+GitHub GraphQL client for Neural Digital Garden.
+"""
+import json
+import urllib.error
+import urllib.request
+from email.utils import parsedate_to_datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+CONTRIBUTIONS_QUERY = """
+query GetUserContributions($username: String!, $from: DateTime!, $to: DateTime!) {
+  user(login: $username) {
+    login
+    name
+    avatarUrl
+    bio
+    url
+    repositories(first: 100, ownerAffiliations: [OWNER], orderBy: {direction: DESC, field: STARGAZERS}) {
+      nodes {
+        name
+        description
+        url
+        stargazerCount
+        forkCount
+        primaryLanguage { name color }
+        updatedAt
+      }
+    }
+    contributionsCollection(from: $from, to: $to) {
+      contributionCalendar {
+        totalContributions
+        weeks { contributionDays { date contributionCount color } }
+      }
+      totalCommitContributions
+      totalIssueContributions
+      totalPullRequestContributions
+      totalPullRequestReviewContributions
+    }
+  }
+}
+"""
+
+
+class GitHubError(Exception):
+    """A failed GitHub request; ``retry_after`` is seconds to wait, if GitHub said."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class GitHubResponse:
+    """A GraphQL response; ``data`` is None when GitHub answered 304 Not Modified."""
+
+    def __init__(self, data, etag=''):
+        self.data = data
+        self.etag = etag
+
+    @property
+    def not_modified(self):
+        return self.data is None
+
+
+def _retry_after(headers):
+    """Seconds to wait according to Retry-After or the rate-limit reset header."""
+    value = headers.get('Retry-After')
+    if value:
+        if value.isdigit():
+            return int(value)
+        try:
+            return max(0, int((parsedate_to_datetime(value) - timezone.now()).total_seconds()))
+        except (TypeError, ValueError):
+            pass
+    if headers.get('X-RateLimit-Remaining') == '0' and (reset := headers.get('X-RateLimit-Reset', '')).isdigit():
+        return max(0, int(reset) - int(timezone.now().timestamp()))
+    return None
+
+
+def fetch_contributions(login, start, end, etag=''):
+    """Fetch a user's profile, repositories and contribution calendar."""
+    body = json.dumps({
+        'query': CONTRIBUTIONS_QUERY,
+        'variables': {'username': login, 'from': start.isoformat(), 'to': end.isoformat()},
+    }).encode('utf-8')
+    headers = {'Content-Type': 'application/json', 'User-Agent': 'neural-digital-garden'}
+    token = getattr(settings, 'GITHUB_TOKEN', '')
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    if etag:
+        headers['If-None-Match'] = etag
+
+    url = getattr(settings, 'GITHUB_GRAPHQL_URL', 'https://api.github.com/graphql')
+    request = urllib.request.Request(url, data=body, headers=headers, method='POST')
+    try:
+        with urllib.request.urlopen(request, timeout=getattr(settings, 'GITHUB_TIMEOUT', 10)) as response:
+            payload = json.loads(response.read().decode('utf-8'))
+            new_etag = response.headers.get('ETag', '')
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304:
+            return GitHubResponse(None, etag)
+        raise GitHubError(f'GitHub returned HTTP {exc.code}', retry_after=_retry_after(exc.headers)) from exc
+    except (urllib.error.URLError, TimeoutError, ValueError) as exc:
+        raise GitHubError(f'GitHub request failed: {exc}') from exc
+
+    if payload.get('errors') or not (payload.get('data') or {}).get('user'):
+        messages = '; '.join(error.get('message', '') for error in payload.get('errors') or [])
+        raise GitHubError(f'GitHub GraphQL error: {messages or "user not found"}')
+    return GitHubResponse(payload['data'], new_etag)
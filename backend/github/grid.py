@@ -0,0 +1,71 @@
+"""
+Packed contribution calendars for Neural Digital Garden.
+
+A contribution calendar covers the 366 days from a year ago to today, which
+can touch 54 weeks of 7 days (when the first day is a Saturday). Instead of
+GitHub's nested ``weeks[].contributionDays[]`` JSON, it is stored as two flat
+arrays indexed by ``week * 7 + weekday`` (Sunday = 0) from the Sunday
+starting the first week: little-endian uint16 counts (756 bytes) and one
+byte per day indexing into a small palette of colors. ``EMPTY_LEVEL`` marks
+days outside the calendar.
+"""
+from array import array
+from datetime import timedelta
+import sys
+
+WEEKS = 54
+DAYS = 7
+CELLS = WEEKS * DAYS
+EMPTY_LEVEL = 255
+
+
+def _weekday(day):
+    return (day.weekday() + 1) % 7  # Sunday first, like GitHub's calendar
+
+
+def pack_grid(days):
+    """Pack ``[(date, count, color), ...]`` into ``(start, counts, levels, palette)``."""
+    days = sorted(days)
+    if not days:
+        return None, b'', b'', []
+    start = days[0][0] - timedelta(days=_weekday(days[0][0]))
+    counts = array('H', [0] * CELLS)
+    levels = bytearray([EMPTY_LEVEL] * CELLS)
+    palette = []
+    for day, count, color in days:
+        index = (day - start).days
+        if not 0 <= index < CELLS:
+            continue
+        if color not in palette:
+            palette.append(color)
+        counts[index] = min(count, 0xFFFF)
+        levels[index] = palette.index(color)
+    if sys.byteorder == 'big':
+        counts.byteswap()
+    return start, counts.tobytes(), bytes(levels), palette
+
+
+def unpack_grid(start, counts, levels, palette):
+    """Inverse of pack_grid: ``[(date, week, weekday, count, color), ...]`` for calendar days."""
+    if start is None or not counts:
+        return []
+    values = array('H')
+    values.frombytes(counts)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    cells = []
+    for index, (count, level) in enumerate(zip(values, levels)):
+        if level == EMPTY_LEVEL:
+            continue
+        week, weekday = divmod(index, DAYS)
+        cells.append((start + timedelta(days=index), week, weekday, count, palette[level]))
+    return cells
+
+
+def voxels(cells):
+    """Terrain voxels for days with contributions: x = week, y = weekday, z = count."""
+    return [
+        {'date': day.isoformat(), 'x': week, 'y': weekday, 'z': count, 'color': color}
+        for day, week, weekday, count, color in cells
+        if count > 0
+    ]
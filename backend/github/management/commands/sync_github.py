@@ -0,0 +1,23 @@
+"""
+Fetch the configured user's GitHub data now, ignoring the backoff schedule.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from github.sync import sync_profile
+
+
+class Command(BaseCommand):
+    help = 'Fetch GitHub profile, repositories and contribution calendar'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--login', help='GitHub username (defaults to GITHUB_USERNAME)')
+
+    def handle(self, *args, **options):
+        login = options['login'] or getattr(settings, 'GITHUB_USERNAME', '')
+        if not login:
+            raise CommandError('No GitHub username: pass --login or set GITHUB_USERNAME.')
+        result = sync_profile(login, force=True)
+        if result == 'failed':
+            raise CommandError('GitHub sync failed; see the log for details.')
+        self.stdout.write(self.style.SUCCESS(f'GitHub data for {login}: {result}.'))
@@ -0,0 +1,74 @@
+"""
+GitHub models for Neural Digital Garden.
+"""
+from django.db import models
+
+from .grid import unpack_grid
+
+
+class GitHubProfile(models.Model):
+    """A GitHub account whose activity is mirrored for the site."""
+    login = models.CharField(max_length=100, unique=True)
+    name = models.CharField(max_length=200, blank=True)
+    avatar_url = models.URLField(blank=True)
+    bio = models.TextField(blank=True)
+    url = models.URLField(blank=True)
+    total_contributions = models.PositiveIntegerField(default=0)
+    total_commit_contributions = models.PositiveIntegerField(default=0)
+    total_issue_contributions = models.PositiveIntegerField(default=0)
+    total_pull_request_contributions = models.PositiveIntegerField(default=0)
+    total_pull_request_review_contributions = models.PositiveIntegerField(default=0)
+
+    # Contribution calendar packed by github.grid: up to 54 weeks x 7 days
+    grid_start = models.DateField(null=True, blank=True, help_text='Sunday of the first calendar week')
+    grid_counts = models.BinaryField(default=bytes, help_text='uint16 contribution count per day')
+    grid_levels = models.BinaryField(default=bytes, help_text='Palette index per day')
+    grid_palette = models.JSONField(default=list, blank=True, help_text='Calendar colors')
+
+    # Fetch bookkeeping
+    payload_hash = models.CharField(max_length=64, blank=True)
+    etag = models.CharField(max_length=200, blank=True)
+    fetch_interval = models.PositiveIntegerField(default=0, help_text='Seconds until the next fetch')
+    failure_count = models.PositiveIntegerField(default=0)
+    last_fetched_at = models.DateTimeField(null=True, blank=True)
+    last_changed_at = models.DateTimeField(null=True, blank=True)
+    next_fetch_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['login']
+        verbose_name = 'GitHub profile'
+
+    def __str__(self):
+        return self.login
+
+    def unpack_grid(self):
+        """Return the contribution calendar as ``[(date, week, weekday, count, color), ...]``."""
+        return unpack_grid(
+            self.grid_start, bytes(self.grid_counts), bytes(self.grid_levels), self.grid_palette
+        )
+
+
+class GitHubRepository(models.Model):
+    """A repository owned by a mirrored GitHub account."""
+    profile = models.ForeignKey(GitHubProfile, on_delete=models.CASCADE, related_name='repositories')
+    name = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    url = models.URLField()
+    stargazer_count = models.PositiveIntegerField(default=0)
+    fork_count = models.PositiveIntegerField(default=0)
+    language_name = models.CharField(max_length=100, blank=True)
+    language_color = models.CharField(max_length=7, blank=True)
+    pushed_at = models.DateTimeField(null=True, blank=True, help_text="GitHub's updatedAt")
+
+    class Meta:
+        ordering = ['-stargazer_count', 'name']
+        verbose_name = 'GitHub repository'
+        verbose_name_plural = 'GitHub repositories'
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'name'], name='github_repository_unique_name'),
+        ]
+
+    def __str__(self):
+        return self.name
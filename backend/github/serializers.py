@@ -0,0 +1,38 @@
+"""
+GitHub serializers for Neural Digital Garden.
+"""
+from rest_framework import serializers
+from .models import GitHubProfile, GitHubRepository
+
+
+class GitHubRepositorySerializer(serializers.ModelSerializer):
+    """Serializer for GitHubRepository model."""
+
+    class Meta:
+        model = GitHubRepository
+        fields = [
+            'name', 'description', 'url', 'stargazer_count', 'fork_count',
+            'language_name', 'language_color', 'pushed_at'
+        ]
+
+
+class GitHubProfileSerializer(serializers.ModelSerializer):
+    """Serializer for GitHubProfile model with its repositories."""
+    repositories = GitHubRepositorySerializer(many=True, read_only=True)
+    total_stars = serializers.SerializerMethodField()
+    total_forks = serializers.SerializerMethodField()
+
+    class Meta:
+        model = GitHubProfile
+        fields = [
+            'login', 'name', 'avatar_url', 'bio', 'url', 'total_contributions',
+            'total_commit_contributions', 'total_issue_contributions',
+            'total_pull_request_contributions', 'total_pull_request_review_contributions',
+            'total_stars', 'total_forks', 'repositories', 'last_changed_at'
+        ]
+
+    def get_total_stars(self, obj):
+        return sum(repo.stargazer_count for repo in obj.repositories.all())
+
+    def get_total_forks(self, obj):
+        return sum(repo.fork_count for repo in obj.repositories.all())
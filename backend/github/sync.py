@@ -0,0 +1,165 @@
+"""
+GitHub contribution ingestion for Neural Digital Garden.
+
+``sync_profile`` is run on a schedule by ``github.tasks.sync_github_profile``.
+It only calls GitHub once ``next_fetch_at`` has passed, sends the previous
+``ETag`` with every request, and backs off while nothing changes: each
+unchanged (304 or identical) response doubles the interval up to
+``GITHUB_MAX_FETCH_INTERVAL``, and any change resets it to
+``GITHUB_FETCH_INTERVAL``. Failures back off exponentially, or for as long
+as GitHub's ``Retry-After`` / rate-limit reset asks.
+
+The terrain voxels are normalized once per change and kept in the cache, so
+serving them costs no database queries.
+"""
+import hashlib
+import json
+import logging
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.cache import invalidate_tags, model_tag
+from .client import GitHubError, fetch_contributions
+from .grid import pack_grid, voxels
+from .models import GitHubProfile, GitHubRepository
+
+logger = logging.getLogger(__name__)
+
+VOXEL_CACHE_KEY = 'github:voxels:{}'
+
+
+def fetch_interval():
+    return getattr(settings, 'GITHUB_FETCH_INTERVAL', 60 * 60)
+
+
+def max_fetch_interval():
+    return getattr(settings, 'GITHUB_MAX_FETCH_INTERVAL', 24 * 60 * 60)
+
+
+def sync_profile(login, force=False, now=None):
+    """Fetch a user's GitHub data if due; return 'skipped', 'unchanged', 'changed' or 'failed'."""
+    now = now or timezone.now()
+    profile, _ = GitHubProfile.objects.get_or_create(login=login)
+    if not force and profile.next_fetch_at and profile.next_fetch_at > now:
+        return 'skipped'
+
+    try:
+        response = fetch_contributions(login, now - timedelta(days=365), now, etag=profile.etag)
+    except GitHubError as exc:
+        failures = profile.failure_count + 1
+        delay = exc.retry_after or min(max_fetch_interval(), fetch_interval() * 2 ** failures)
+        GitHubProfile.objects.filter(pk=profile.pk).update(
+            failure_count=failures, next_fetch_at=now + timedelta(seconds=delay)
+        )
+        logger.warning('GitHub sync for %s failed (%s); retrying in %ss', login, exc, delay)
+        return 'failed'
+
+    digest = None
+    if not response.not_modified:
+        digest = hashlib.sha256(json.dumps(response.data, sort_keys=True).encode('utf-8')).hexdigest()
+    changed = digest is not None and digest != profile.payload_hash
+
+    if changed:
+        interval = fetch_interval()
+    else:
+        interval = min(max_fetch_interval(), max(fetch_interval(), profile.fetch_interval * 2))
+    bookkeeping = {
+        'etag': response.etag,
+        'fetch_interval': interval,
+        'failure_count': 0,
+        'last_fetched_at': now,
+        'next_fetch_at': now + timedelta(seconds=interval),
+    }
+    if not changed:
+        # Bookkeeping only: skip save() so cached API responses stay valid
+        GitHubProfile.objects.filter(pk=profile.pk).update(**bookkeeping)
+        return 'unchanged'
+
+    with transaction.atomic():
+        for field, value in bookkeeping.items():
+            setattr(profile, field, value)
+        profile.payload_hash = digest
+        profile.last_changed_at = now
+        _apply_user(profile, response.data['user'])
+        profile.save()
+        _sync_repositories(profile, response.data['user']['repositories']['nodes'])
+    invalidate_tags(model_tag(GitHubProfile), model_tag(GitHubRepository))
+    cache.set(VOXEL_CACHE_KEY.format(login), build_voxel_payload(profile), timeout=None)
+    return 'changed'
+
+
+def _apply_user(profile, user):
+    collection = user['contributionsCollection']
+    calendar = collection['contributionCalendar']
+    profile.name = user.get('name') or ''
+    profile.avatar_url = user.get('avatarUrl') or ''
+    profile.bio = user.get('bio') or ''
+    profile.url = user.get('url') or ''
+    profile.total_contributions = calendar['totalContributions']
+    profile.total_commit_contributions = collection['totalCommitContributions']
+    profile.total_issue_contributions = collection['totalIssueContributions']
+    profile.total_pull_request_contributions = collection['totalPullRequestContributions']
+    profile.total_pull_request_review_contributions = collection['totalPullRequestReviewContributions']
+    profile.grid_start, profile.grid_counts, profile.grid_levels, profile.grid_palette = pack_grid(
+        (date.fromisoformat(day['date']), day['contributionCount'], day['color'])
+        for week in calendar['weeks']
+        for day in week['contributionDays']
+    )
+
+
+def _sync_repositories(profile, nodes):
+    """Mirror the repository list with one delete, one bulk update and one bulk insert."""
+    existing = {repo.name: repo for repo in profile.repositories.all()}
+    seen, to_create, to_update = set(), [], []
+    for node in nodes:
+        language = node.get('primaryLanguage') or {}
+        values = {
+            'description': node.get('description') or '',
+            'url': node['url'],
+            'stargazer_count': node.get('stargazerCount', 0),
+            'fork_count': node.get('forkCount', 0),
+            'language_name': language.get('name') or '',
+            'language_color': language.get('color') or '',
+            'pushed_at': parse_datetime(node['updatedAt']) if node.get('updatedAt') else None,
+        }
+        seen.add(node['name'])
+        repo = existing.get(node['name'])
+        if repo is None:
+            to_create.append(GitHubRepository(profile=profile, name=node['name'], **values))
+        elif any(getattr(repo, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(repo, field, value)
+            to_update.append(repo)
+
+    profile.repositories.exclude(name__in=seen).delete()
+    GitHubRepository.objects.bulk_update(to_update, [
+        'description', 'url', 'stargazer_count', 'fork_count', 'language_name', 'language_color', 'pushed_at',
+    ])
+    GitHubRepository.objects.bulk_create(to_create)
+
+
+def build_voxel_payload(profile):
+    return {
+        'login': profile.login,
+        'total_contributions': profile.total_contributions,
+        'grid_start': profile.grid_start.isoformat() if profile.grid_start else None,
+        'contributions': voxels(profile.unpack_grid()),
+    }
+
+
+def get_voxel_payload(login):
+    """Cached terrain voxels for a user, or None if they were never synced."""
+    key = VOXEL_CACHE_KEY.format(login)
+    payload = cache.get(key)
+    if payload is None:
+        profile = GitHubProfile.objects.filter(login=login, last_changed_at__isnull=False).first()
+        if profile is None:
+            return None
+        payload = build_voxel_payload(profile)
+        cache.set(key, payload, timeout=None)
+    return payload
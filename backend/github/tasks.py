@@ -0,0 +1,16 @@
+"""
+GitHub Celery tasks for Neural Digital Garden.
+"""
+from celery import shared_task
+from django.conf import settings
+
+from .sync import sync_profile
+
+
+@shared_task
+def sync_github_profile(force=False):
+    """Refresh the configured user's GitHub data when the backoff schedule says it is due."""
+    login = getattr(settings, 'GITHUB_USERNAME', '')
+    if not login:
+        return None
+    return sync_profile(login, force=force)
@@ -0,0 +1,232 @@
+"""
+Tests for the GitHub mirror of Neural Digital Garden.
+
+Syncs run against a stub GraphQL server on localhost that answers with
+scripted responses and records the requests it received.
+"""
+import json
+import threading
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .grid import CELLS, EMPTY_LEVEL, pack_grid, unpack_grid
+from .models import GitHubProfile
+from .sync import VOXEL_CACHE_KEY, fetch_interval, get_voxel_payload, max_fetch_interval, sync_profile
+
+NOW = datetime(2024, 6, 12, 12, 0, tzinfo=dt_timezone.utc)
+
+
+def calendar_payload(start, counts, repositories=('garden',)):
+    """A GraphQL response body with one calendar day per count, from ``start``."""
+    weeks = {}
+    for offset, count in enumerate(counts):
+        day = start + timedelta(days=offset)
+        week = (day - start).days // 7
+        weeks.setdefault(week, []).append(
+            {'date': day.isoformat(), 'contributionCount': count, 'color': '#39d353' if count else '#ebedf0'}
+        )
+    return {'data': {'user': {
+        'login': 'octocat',
+        'name': 'The Octocat',
+        'avatarUrl': 'https://example.com/avatar.png',
+        'bio': '',
+        'url': 'https://github.com/octocat',
+        'repositories': {'nodes': [
+            {
+                'name': name, 'description': '', 'url': f'https://github.com/octocat/{name}',
+                'stargazerCount': 3, 'forkCount': 1, 'primaryLanguage': {'name': 'Python', 'color': '#3572A5'},
+                'updatedAt': '2024-06-01T00:00:00Z',
+            }
+            for name in repositories
+        ]},
+        'contributionsCollection': {
+            'contributionCalendar': {
+                'totalContributions': sum(counts),
+                'weeks': [{'contributionDays': days} for _, days in sorted(weeks.items())],
+            },
+            'totalCommitContributions': sum(counts),
+            'totalIssueContributions': 0,
+            'totalPullRequestContributions': 0,
+            'totalPullRequestReviewContributions': 0,
+        },
+    }}}
+
+
+class StubGraphQLServer:
+    """A local HTTP server answering each POST with the next scripted ``(status, headers, body)``."""
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                stub.requests.append({'headers': dict(self.headers), 'body': json.loads(body)})
+                status, headers, payload = stub.responses.pop(0)
+                content = json.dumps(payload).encode('utf-8') if payload is not None else b''
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/graphql'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class SyncProfileTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.stub = StubGraphQLServer().__enter__()
+        self.addCleanup(self.stub.__exit__, None, None, None)
+        settings = override_settings(GITHUB_GRAPHQL_URL=self.stub.url, GITHUB_TOKEN='secret', GITHUB_TIMEOUT=5)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.start = date(2023, 6, 11)  # A Sunday, as GitHub's calendar starts
+        self.payload = calendar_payload(self.start, [0, 2, 0, 5] * 90)
+
+    def test_fresh_sync_stores_profile_repositories_and_voxels(self):
+        self.stub.responses.append((200, {'ETag': '"v1"'}, self.payload))
+
+        self.assertEqual(sync_profile('octocat', now=NOW), 'changed')
+
+        request = self.stub.requests[0]
+        self.assertEqual(request['headers']['Authorization'], 'Bearer secret')
+        self.assertNotIn('If-None-Match', request['headers'])
+        self.assertEqual(request['body']['variables']['username'], 'octocat')
+        profile = GitHubProfile.objects.get(login='octocat')
+        self.assertEqual(profile.etag, '"v1"')
+        self.assertEqual(profile.name, 'The Octocat')
+        self.assertEqual(profile.total_contributions, 7 * 90)
+        self.assertEqual(profile.grid_start, self.start)
+        self.assertEqual(profile.fetch_interval, fetch_interval())
+        self.assertEqual(profile.next_fetch_at, NOW + timedelta(seconds=fetch_interval()))
+        self.assertEqual(list(profile.repositories.values_list('name', flat=True)), ['garden'])
+        voxels = get_voxel_payload('octocat')['contributions']
+        self.assertEqual(len(voxels), 180)
+        self.assertEqual(voxels[0], {'date': '2023-06-12', 'x': 0, 'y': 1, 'z': 2, 'color': '#39d353'})
+        self.assertIsNotNone(cache.get(VOXEL_CACHE_KEY.format('octocat')))
+
+    def test_not_due_skips_the_request(self):
+        GitHubProfile.objects.create(login='octocat', next_fetch_at=NOW + timedelta(minutes=5))
+
+        self.assertEqual(sync_profile('octocat', now=NOW), 'skipped')
+        self.assertEqual(self.stub.requests, [])
+
+    def test_not_modified_sends_etag_and_backs_off(self):
+        self.stub.responses.append((200, {'ETag': '"v1"'}, self.payload))
+        sync_profile('octocat', now=NOW)
+        self.stub.responses.append((304, {'ETag': '"v1"'}, None))
+        later = NOW + timedelta(hours=2)
+
+        self.assertEqual(sync_profile('octocat', now=later), 'unchanged')
+
+        self.assertEqual(self.stub.requests[1]['headers']['If-None-Match'], '"v1"')
+        profile = GitHubProfile.objects.get(login='octocat')
+        self.assertEqual(profile.etag, '"v1"')
+        self.assertEqual(profile.fetch_interval, fetch_interval() * 2)
+        self.assertEqual(profile.next_fetch_at, later + timedelta(seconds=fetch_interval() * 2))
+        self.assertEqual(profile.last_changed_at, NOW)
+        self.assertEqual(profile.total_contributions, 7 * 90)
+
+    def test_identical_payload_counts_as_unchanged(self):
+        self.stub.responses.append((200, {'ETag': '"v1"'}, self.payload))
+        sync_profile('octocat', now=NOW)
+        self.stub.responses.append((200, {'ETag': '"v2"'}, self.payload))
+
+        self.assertEqual(sync_profile('octocat', force=True, now=NOW), 'unchanged')
+        self.assertEqual(GitHubProfile.objects.get(login='octocat').etag, '"v2"')
+
+    def test_server_errors_back_off_exponentially(self):
+        self.stub.responses += [(502, {}, {'message': 'Bad gateway'}), (503, {}, {'message': 'Unavailable'})]
+
+        self.assertEqual(sync_profile('octocat', now=NOW), 'failed')
+        profile = GitHubProfile.objects.get(login='octocat')
+        self.assertEqual(profile.failure_count, 1)
+        self.assertEqual(profile.next_fetch_at, NOW + timedelta(seconds=fetch_interval() * 2))
+
+        self.assertEqual(sync_profile('octocat', force=True, now=NOW), 'failed')
+        profile.refresh_from_db()
+        self.assertEqual(profile.failure_count, 2)
+        self.assertEqual(profile.next_fetch_at, NOW + timedelta(seconds=fetch_interval() * 4))
+
+    def test_server_error_backoff_is_capped(self):
+        GitHubProfile.objects.create(login='octocat', failure_count=20)
+        self.stub.responses.append((500, {}, None))
+
+        sync_profile('octocat', now=NOW)
+        profile = GitHubProfile.objects.get(login='octocat')
+        self.assertEqual(profile.next_fetch_at, NOW + timedelta(seconds=max_fetch_interval()))
+
+    def test_rate_limit_waits_until_reset(self):
+        reset = int(datetime.now(dt_timezone.utc).timestamp()) + 600
+        self.stub.responses.append((403, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(reset)}, None))
+
+        self.assertEqual(sync_profile('octocat', now=NOW), 'failed')
+        delay = (GitHubProfile.objects.get(login='octocat').next_fetch_at - NOW).total_seconds()
+        self.assertAlmostEqual(delay, 600, delta=5)
+
+    def test_retry_after_is_honoured(self):
+        self.stub.responses.append((429, {'Retry-After': '90'}, None))
+
+        self.assertEqual(sync_profile('octocat', now=NOW), 'failed')
+        profile = GitHubProfile.objects.get(login='octocat')
+        self.assertEqual(profile.next_fetch_at, NOW + timedelta(seconds=90))
+
+    def test_graphql_errors_fail_the_sync(self):
+        self.stub.responses.append((200, {}, {'errors': [{'message': 'Could not resolve to a User'}]}))
+
+        self.assertEqual(sync_profile('octocat', now=NOW), 'failed')
+        self.assertIsNone(GitHubProfile.objects.get(login='octocat').last_changed_at)
+
+
+class GridTests(TestCase):
+    def test_round_trip(self):
+        start = date(2024, 1, 7)  # A Sunday
+        days = [(start + timedelta(days=offset), offset % 7, f'#{offset % 3}') for offset in range(0, 300, 2)]
+
+        grid_start, counts, levels, palette = pack_grid(days)
+
+        self.assertEqual(grid_start, start)
+        self.assertEqual(len(counts), CELLS * 2)
+        self.assertEqual(sum(level != EMPTY_LEVEL for level in levels), len(days))
+        cells = unpack_grid(grid_start, counts, levels, palette)
+        self.assertEqual([(day, count, color) for day, _, _, count, color in cells], days)
+        day, week, weekday, _, _ = cells[1]
+        self.assertEqual((day, week, weekday), (date(2024, 1, 9), 0, 2))
+
+    def test_window_starting_on_saturday_keeps_today(self):
+        first = date(2023, 6, 10)  # A Saturday: the window touches 54 weeks
+        today = first + timedelta(days=365)
+        days = [(first + timedelta(days=offset), 1, '#39d353') for offset in range(366)]
+
+        cells = unpack_grid(*pack_grid(days))
+
+        self.assertEqual(len(cells), 366)
+        self.assertEqual(cells[-1][0], today)
+        self.assertEqual(cells[-1][1:3], (53, 0))  # A Sunday, cell 53 * 7
+
+    def test_counts_are_clamped_and_empty_input_packs_nothing(self):
+        cells = unpack_grid(*pack_grid([(date(2024, 1, 7), 70000, '#fff')]))
+
+        self.assertEqual(cells[0][3], 0xFFFF)
+        self.assertEqual(pack_grid([]), (None, b'', b'', []))
+        self.assertEqual(unpack_grid(None, b'', b'', []), [])
@@ -0,0 +1,13 @@
+"""
+GitHub URL configuration for Neural Digital Garden.
+"""
+from django.urls import path
+
+from .views import GitHubViewSet
+
+app_name = 'github'
+
+urlpatterns = [
+    path('profile/', GitHubViewSet.as_view({'get': 'profile'}), name='profile'),
+    path('contributions/', GitHubViewSet.as_view({'get': 'contributions'}), name='contributions'),
+]
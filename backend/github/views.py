@@ -0,0 +1,44 @@
+"""
+GitHub API views for Neural Digital Garden.
+"""
+from django.conf import settings
+from django.http import Http404
+from rest_framework import viewsets
+from rest_framework.response import Response
+
+from core.cache import CachedResponseMixin
+from .models import GitHubProfile
+from .serializers import GitHubProfileSerializer
+from .sync import get_voxel_payload
+
+
+class GitHubViewSet(CachedResponseMixin, viewsets.ViewSet):
+    """Mirrored GitHub data for the configured user, refreshed by a Celery task."""
+    permission_classes = []  # Allow public access
+    cache_tags = ('github.githubprofile', 'github.githubrepository')
+    cache_actions = ('profile',)
+    cache_per_user = False
+
+    def get_login(self):
+        login = getattr(settings, 'GITHUB_USERNAME', '')
+        if not login:
+            raise Http404('GITHUB_USERNAME is not configured.')
+        return login
+
+    def profile(self, request):
+        """Profile, contribution totals and repositories."""
+        profile = (
+            GitHubProfile.objects.prefetch_related('repositories')
+            .filter(login=self.get_login(), last_changed_at__isnull=False)
+            .first()
+        )
+        if profile is None:
+            raise Http404('GitHub data has not been fetched yet.')
+        return Response(GitHubProfileSerializer(profile, context={'request': request}).data)
+
+    def contributions(self, request):
+        """Contribution calendar as terrain voxels (x = week, y = weekday, z = count)."""
+        payload = get_voxel_payload(self.get_login())
+        if payload is None:
+            raise Http404('GitHub data has not been fetched yet.')
+        return Response(payload)
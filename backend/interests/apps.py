@@ -8,3 +8,14 @@ class InterestsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'interests'
     verbose_name = 'Interests'
+
+    def ready(self):
+        from core.cache import invalidate_on_change
+        from core.images import derive_images_on_change
+        from core.snapshots import export_snapshots_on_change
+
+        Interest, Project = self.get_model('Interest'), self.get_model('Project')
+        invalidate_on_change(Interest, Project)
+        derive_images_on_change(Interest, 'image', 'image_variants')
+        derive_images_on_change(Project, 'image', 'image_variants')
+        export_snapshots_on_change(Interest, Project)
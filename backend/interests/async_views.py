@@ -0,0 +1,34 @@
+"""
+Async interests read views for Neural Digital Garden.
+"""
+from core.async_views import AsyncDetailView, AsyncListView
+
+LIST_PARAMS = frozenset({'page', 'page_size', 'ordering', 'fields'})
+
+
+class InterestListView(AsyncListView):
+    """Async ``GET /api/interests/interests/``."""
+    query_params = LIST_PARAMS
+
+
+class InterestDetailView(AsyncDetailView):
+    """Async ``GET /api/interests/interests/<slug>/``."""
+    query_params = frozenset({'fields'})
+
+
+class ProjectListView(AsyncListView):
+    """Async ``GET /api/interests/projects/``."""
+    query_params = LIST_PARAMS | {'technology'}
+
+
+class ProjectDetailView(AsyncDetailView):
+    """Async ``GET /api/interests/projects/<slug>/``."""
+    query_params = frozenset({'fields'})
+
+
+ASYNC_VIEWS = {
+    'interest-list': InterestListView,
+    'interest-detail': InterestDetailView,
+    'project-list': ProjectListView,
+    'project-detail': ProjectDetailView,
+}
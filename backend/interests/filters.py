@@ -0,0 +1,24 @@
+"""
+Interests filter backends for Neural Digital Garden.
+"""
+from rest_framework.filters import BaseFilterBackend
+
+from .models import ProjectTechnology, technology_key
+
+
+class TechnologyFilter(BaseFilterBackend):
+    """Projects using a technology, on ?technology= (repeat it to require several).
+
+    Matches the normalised names in the ``ProjectTechnology`` index, so the
+    comparison ignores case and extra whitespace.
+    """
+    technology_param = 'technology'
+
+    def filter_queryset(self, request, queryset, view):
+        for name in request.query_params.getlist(self.technology_param):
+            key = technology_key(name)
+            if key:
+                queryset = queryset.filter(
+                    pk__in=ProjectTechnology.objects.filter(key=key).values('project_id')
+                )
+        return queryset
@@ -0,0 +1,20 @@
+"""
+Rebuild the project technology index from scratch.
+"""
+from django.core.management.base import BaseCommand
+
+from interests.models import Project, index_technologies
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the ProjectTechnology index from every project\'s technologies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Projects indexed per batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        projects = list(Project.objects.order_by('pk').only('technologies'))
+        for start in range(0, len(projects), batch_size):
+            index_technologies(projects[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {len(projects)} project(s).'))
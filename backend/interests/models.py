@@ -1,9 +1,13 @@
 """
 Interests models for Neural Digital Garden.
 """
-from django.db import models
+import copy
+
+from django.db import models, transaction
 from django.utils.text import slugify
 
+from core.cache import invalidate_tags, model_tag
+
 
 class Interest(models.Model):
     """Interest model for Bento Box section."""
@@ -30,6 +34,7 @@ class Interest(models.Model):
     size = models.CharField(max_length=10, choices=SIZE_CHOICES, default='medium')
     icon = models.CharField(max_length=50, blank=True, help_text='Icon name or emoji')
     image = models.ImageField(upload_to='interests/images/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     color = models.CharField(max_length=7, default='#00FFCC', help_text='Hex color code')
     link = models.URLField(blank=True, help_text='External link if applicable')
     order = models.PositiveIntegerField(default=0, help_text='Display order')
@@ -72,6 +77,7 @@ class Project(models.Model):
     start_date = models.DateField(null=True, blank=True)
     end_date = models.DateField(null=True, blank=True)
     image = models.ImageField(upload_to='interests/projects/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     link = models.URLField(blank=True, help_text='Project link or repository')
     github_repo = models.URLField(blank=True, help_text='GitHub repository URL')
     technologies = models.JSONField(default=list, blank=True, help_text='List of technologies used')
@@ -89,10 +95,73 @@ class Project(models.Model):
             models.Index(fields=['order']),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # A copy is remembered, so save() sees in-place edits such as technologies.append()
+        instance._indexed_technologies = copy.deepcopy(instance.__dict__.get('technologies'))
+        return instance
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        reindex = (
+            (update_fields is None or 'technologies' in update_fields)
+            and 'technologies' in self.__dict__
+            and self.technologies != getattr(self, '_indexed_technologies', [])
+        )
+        if not reindex:
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            index_technologies([self])
+        self._indexed_technologies = copy.deepcopy(self.technologies)
+
+
+def technology_key(name):
+    """Normalised form of a technology name, so "Django" and " django " match."""
+    return ' '.join(str(name).split()).casefold()[:100]
+
+
+def index_technologies(projects):
+    """Rewrite the ``ProjectTechnology`` rows of saved projects from their ``technologies`` lists.
+
+    ``Project.save`` does this for one project; anything that writes
+    ``technologies`` without it (``bulk_create``, ``update``) must call it.
+    """
+    entries = []
+    for project in projects:
+        seen = set()
+        technologies = project.technologies if isinstance(project.technologies, list) else []
+        for name in technologies:
+            if not isinstance(name, str) or not (key := technology_key(name)) or key in seen:
+                continue
+            seen.add(key)
+            entries.append(ProjectTechnology(project=project, key=key, name=' '.join(name.split())[:100]))
+    with transaction.atomic():
+        ProjectTechnology.objects.filter(project__in=[project.pk for project in projects]).delete()
+        ProjectTechnology.objects.bulk_create(entries, batch_size=2000)
+    # bulk_create and queryset deletes send no signals
+    transaction.on_commit(lambda: invalidate_tags(model_tag(ProjectTechnology)))
+
+
+class ProjectTechnology(models.Model):
+    """One technology of a project, indexed from ``Project.technologies`` for filtering and facets."""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='technology_entries')
+    key = models.CharField(max_length=100, help_text='Normalised name used for matching')
+    name = models.CharField(max_length=100, help_text='Name as written on the project')
+
+    class Meta:
+        ordering = ['key']
+        constraints = [
+            # Also the index behind ?technology= lookups and the per-technology counts
+            models.UniqueConstraint(fields=['key', 'project'], name='interests_projecttech_unique_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} in project {self.project_id}'
@@ -2,68 +2,100 @@
 Interests serializers for Neural Digital Garden.
 """
 from rest_framework import serializers
+
+from core.fieldsets import DynamicFieldsMixin, Value, ValuesSerializer, file_value, srcset_value
+from core.images import SrcsetField
 from .models import Interest, Project
 
 
-class InterestSerializer(serializers.ModelSerializer):
+class InterestSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Interest model."""
+    image_srcset = SrcsetField(source='image_variants')
 
     class Meta:
         model = Interest
         fields = [
             'id', 'title', 'slug', 'description', 'category', 'size',
-            'icon', 'image', 'color', 'link', 'order', 'is_active',
+            'icon', 'image', 'image_srcset', 'color', 'link', 'order', 'is_active',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['slug', 'created_at', 'updated_at']
 
 
-class InterestListSerializer(serializers.ModelSerializer):
+class InterestListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Interest list view (lightweight)."""
+    image_srcset = SrcsetField(source='image_variants')
 
     class Meta:
         model = Interest
         fields = [
             'id', 'title', 'slug', 'description', 'category', 'size',
-            'icon', 'image', 'color', 'link', 'order', 'is_active'
+            'icon', 'image', 'image_srcset', 'color', 'link', 'order', 'is_active'
         ]
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class InterestListValuesSerializer(ValuesSerializer):
+    """Fast path for InterestListSerializer over ``values()`` rows."""
+    serializer_class = InterestListSerializer
+    fields = {
+        **{name: Value() for name in ('id', 'title', 'slug', 'description', 'category', 'size', 'icon')},
+        'image': file_value(),
+        'image_srcset': srcset_value('image_variants'),
+        **{name: Value() for name in ('color', 'link', 'order', 'is_active')},
+    }
+    extra_columns = ('order', 'title', 'created_at')  # Ordering keys
+
+
+class ProjectSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Project model."""
+    image_srcset = SrcsetField(source='image_variants')
 
     class Meta:
         model = Project
         fields = [
             'id', 'title', 'slug', 'description', 'short_description',
-            'status', 'progress', 'start_date', 'end_date', 'image',
+            'status', 'progress', 'start_date', 'end_date', 'image', 'image_srcset',
             'link', 'github_repo', 'technologies', 'order', 'is_featured',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['slug', 'created_at', 'updated_at']
 
 
-class ProjectListSerializer(serializers.ModelSerializer):
+class ProjectListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Project list view (lightweight)."""
+    image_srcset = SrcsetField(source='image_variants')
 
     class Meta:
         model = Project
         fields = [
             'id', 'title', 'slug', 'short_description', 'status',
-            'progress', 'image', 'link', 'github_repo', 'technologies',
+            'progress', 'image', 'image_srcset', 'link', 'github_repo', 'technologies',
             'order', 'is_featured'
         ]
 
 
-class ProjectDetailSerializer(serializers.ModelSerializer):
+class ProjectDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Project detail view."""
+    image_srcset = SrcsetField(source='image_variants')
 
     class Meta:
         model = Project
         fields = [
             'id', 'title', 'slug', 'description', 'short_description',
-            'status', 'progress', 'start_date', 'end_date', 'image',
+            'status', 'progress', 'start_date', 'end_date', 'image', 'image_srcset',
             'link', 'github_repo', 'technologies', 'order', 'is_featured',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['slug', 'created_at', 'updated_at']
+
+
+class ProjectListValuesSerializer(ValuesSerializer):
+    """Fast path for ProjectListSerializer over ``values()`` rows."""
+    serializer_class = ProjectListSerializer
+    fields = {
+        **{name: Value() for name in ('id', 'title', 'slug', 'short_description', 'status', 'progress')},
+        'image': file_value(),
+        'image_srcset': srcset_value('image_variants'),
+        **{name: Value() for name in ('link', 'github_repo', 'technologies', 'order', 'is_featured')},
+    }
+    extra_columns = ('order', 'title', 'created_at', 'progress')  # Ordering keys
@@ -1,10 +1,12 @@
 """
 Interests URL configuration for Neural Digital Garden.
 """
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework.urlpatterns import format_suffix_patterns
 
+from core.async_views import async_read_patterns
+from .async_views import ASYNC_VIEWS
 from .views import InterestViewSet, ProjectViewSet
 
 # Create a router and register our viewsets
@@ -18,4 +20,6 @@ urlpatterns = [
     path('', include(router.urls)),
 ]
 
-urlpatterns = format_suffix_patterns(urlpatterns)
+# Under ASGI, hot public reads are answered by async views ahead of the router
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns.insert(0, path('', include(async_read_patterns(router, ASYNC_VIEWS))))
@@ -1,22 +1,36 @@
 """
 Interests API views for Neural Digital Garden.
 """
+from django.db.models import Count, Min
 from rest_framework import viewsets, filters
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .models import Interest, Project
+from core.cache import CachedResponseMixin
+from core.conditional import ConditionalGetMixin
+from core.fieldsets import SparseFieldsetMixin, ValuesListMixin
+from .filters import TechnologyFilter
+from .models import Interest, Project, ProjectTechnology
 from .serializers import (
     InterestSerializer,
     InterestListSerializer,
+    InterestListValuesSerializer,
     ProjectSerializer,
     ProjectListSerializer,
+    ProjectListValuesSerializer,
     ProjectDetailSerializer
 )
 
 
-class InterestViewSet(viewsets.ModelViewSet):
+class InterestViewSet(
+    ConditionalGetMixin, CachedResponseMixin, SparseFieldsetMixin, ValuesListMixin, viewsets.ModelViewSet
+):
     """ViewSet for Interest model."""
+    values_serializer_class = InterestListValuesSerializer
     permission_classes = []  # Allow public access
+    lookup_field = 'slug'
+    cache_tags = ('interests.interest',)
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'size', 'is_active']
     search_fields = ['title', 'description']
@@ -34,10 +48,17 @@ class InterestViewSet(viewsets.ModelViewSet):
         return InterestSerializer
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(
+    ConditionalGetMixin, CachedResponseMixin, SparseFieldsetMixin, ValuesListMixin, viewsets.ModelViewSet
+):
     """ViewSet for Project model."""
+    queryset = Project.objects.all()
+    values_serializer_class = ProjectListValuesSerializer
     permission_classes = []  # Allow public access
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    lookup_field = 'slug'
+    cache_tags = ('interests.project', 'interests.projecttechnology')
+    cache_actions = ('list', 'retrieve', 'technologies')
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, TechnologyFilter]
     filterset_fields = ['status', 'is_featured']
     search_fields = ['title', 'description', 'short_description']
     ordering_fields = ['order', 'title', 'created_at', 'progress']
@@ -50,3 +71,17 @@ class ProjectViewSet(viewsets.ModelViewSet):
         elif self.action == 'retrieve':
             return ProjectDetailSerializer
         return ProjectSerializer
+
+    @action(detail=False, methods=['get'])
+    def technologies(self, request):
+        """Count projects per technology, over the projects the list's filters select."""
+        entries = ProjectTechnology.objects.all()
+        if request.query_params:
+            projects = self.filter_queryset(self.get_queryset())
+            entries = entries.filter(project__in=projects.order_by().values('pk'))
+        facets = (
+            entries.values('key')
+            .annotate(name=Min('name'), count=Count('project'))
+            .order_by('-count', 'key')
+        )
+        return Response(list(facets))